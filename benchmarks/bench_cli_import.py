@@ -0,0 +1,58 @@
+'''
+A standalone benchmark to measure the startup cost of the CLI using
+``python -X importtime``, along with the wall-clock time of ``--help``.
+
+Usage: python benchmarks/bench_cli_import.py [-n ITERATIONS] [--max-import-ms MSEC]
+
+With ``--max-import-ms``, it exits with a non-zero status if the median import
+time of the CLI package exceeds the given threshold so that it can be used to
+guard against regressions.
+'''
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+def measure_import(module_name: str) -> float:
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, check=True)
+    for line in proc.stderr.decode().splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module_name:
+            return int(parts[1]) / 1e3
+    raise RuntimeError(f'Could not find the import time of {module_name}')
+
+
+def measure_help() -> float:
+    begin = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'ai.backend.client.cli', '--help'],
+                   stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - begin) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--iterations', type=int, default=10)
+    parser.add_argument('--max-import-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    cli_import = statistics.median(
+        measure_import('ai.backend.client.cli') for _ in range(args.iterations))
+    session_import = statistics.median(
+        measure_import('ai.backend.client.session') for _ in range(args.iterations))
+    help_time = statistics.median(measure_help() for _ in range(args.iterations))
+    print(f'import ai.backend.client.cli:     {cli_import:8.1f} msec')
+    print(f'import ai.backend.client.session: {session_import:8.1f} msec (for reference)')
+    print(f'backend.ai --help (wall-clock):   {help_time:8.1f} msec')
+    if args.max_import_ms is not None and cli_import > args.max_import_ms:
+        print(f'The CLI import time exceeds {args.max_import_ms} msec!')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
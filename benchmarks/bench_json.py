@@ -0,0 +1,71 @@
+'''
+A standalone benchmark to compare the JSON codecs on decoding a large
+``compute_session_list`` GraphQL response and encoding it back.
+
+Usage: python benchmarks/bench_json.py [-r ROWS] [-n ITERATIONS]
+'''
+
+import argparse
+from collections import OrderedDict
+import functools
+import json
+import timeit
+import uuid
+
+from ai.backend.client import codec
+
+
+def make_payload(rows: int) -> str:
+    items = []
+    for idx in range(rows):
+        items.append({
+            'id': str(uuid.uuid4()),
+            'sess_id': f'session-{idx}',
+            'name': f'session-{idx}',
+            'image': 'index.docker.io/lablup/python:3.6-ubuntu18.04',
+            'type': 'INTERACTIVE',
+            'status': 'RUNNING',
+            'status_info': None,
+            'status_data': None,
+            'created_at': '2020-02-20T10:20:30.123456+00:00',
+            'terminated_at': None,
+            'occupied_slots': '{"cpu": "1", "mem": "1073741824", "cuda.shares": "0.5"}',
+            'agent': f'i-agent{idx % 32:02d}',
+            'tag': None,
+            'result': 'UNDEFINED',
+            'mounts': ['mydata', 'shared'],
+        })
+    return json.dumps({
+        'compute_session_list': {
+            'total_count': rows,
+            'items': items,
+        },
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', '--rows', type=int, default=50_000)
+    parser.add_argument('-n', '--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.rows)
+    print(f'payload: {args.rows} rows, {len(payload) / 1e6:.1f} MB')
+
+    legacy_loads = functools.partial(json.loads, object_pairs_hook=OrderedDict)
+    legacy = timeit.timeit(lambda: legacy_loads(payload), number=args.iterations)
+    print(f'{"json+OrderedDict":>16s}: '
+          f'loads {legacy / args.iterations * 1e3:8.2f} msec')
+    for name in codec.available_codecs():
+        c = codec.set_codec(name)
+        data = c.loads(payload)
+        t_loads = timeit.timeit(lambda: c.loads(payload), number=args.iterations)
+        t_dumps = timeit.timeit(lambda: c.dumps(data), number=args.iterations)
+        print(f'{name:>16s}: '
+              f'loads {t_loads / args.iterations * 1e3:8.2f} msec, '
+              f'dumps {t_dumps / args.iterations * 1e3:8.2f} msec '
+              f'({legacy / t_loads:.1f}x faster loads)')
+
+
+if __name__ == '__main__':
+    main()
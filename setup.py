@@ -43,6 +43,9 @@ typecheck_requires = [
 dev_requires = [
     'pytest-sugar>=0.9.1',
 ]
+fastjson_requires = [
+    'orjson>=3.0',
+]
 docs_requires = [
     'sphinx~=2.2',
     'sphinx-intl>=2.0',
@@ -101,6 +104,7 @@ setup(
         'lint': lint_requires,
         'typecheck': typecheck_requires,
         'docs': docs_requires,
+        'fastjson': fastjson_requires,
     },
     data_files=[],
     entry_points={
@@ -1,13 +1,50 @@
-from . import exceptions
-from . import session
+import ast
+import importlib
+import importlib.util
+import sys
 
-__all__ = (
-    *exceptions.__all__,
-    *session.__all__,
-)
+from . import exceptions
 
 __version__ = '19.12.0b1'
 
 
 def get_user_agent():
     return 'Backend.AI Client for Python {0}'.format(__version__)
+
+
+def _read_module_all(name):
+    # Read the ``__all__`` of a submodule from its source without executing it,
+    # so that the names are known before the submodule is imported.
+    spec = importlib.util.find_spec(f'.{name}', __name__)
+    with open(spec.origin, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), spec.origin)
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and
+                any(isinstance(t, ast.Name) and t.id == '__all__' for t in node.targets)):
+            return tuple(ast.literal_eval(node.value))
+    return ()
+
+
+# The session module and its public names are imported on demand
+# so that the CLI and light-weight users do not pay for importing aiohttp.
+_lazy_names = {
+    **{name: 'exceptions' for name in exceptions.__all__},
+    **{name: 'session' for name in _read_module_all('session')},
+}
+
+__all__ = tuple(_lazy_names)
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        if name == 'session':
+            return importlib.import_module(f'.{name}', __name__)
+        if name in _lazy_names:
+            module = importlib.import_module(f'.{_lazy_names[name]}', __name__)
+            return getattr(module, name)
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+else:
+    from . import session  # noqa: F401
+    from .exceptions import *  # noqa: F401,F403
+    from .session import *  # noqa: F401,F403
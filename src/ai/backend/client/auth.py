@@ -1,4 +1,5 @@
 import enum
+import functools
 import hashlib
 import hmac
 
@@ -8,8 +9,11 @@ __all__ = (
     'AuthToken',
     'AuthTokenTypes',
     'generate_signature',
+    'get_sign_key',
 )
 
+SIGN_KEY_CACHE_SIZE = 256
+
 
 class AuthTokenTypes(enum.Enum):
     KEYPAIR = 'keypair'
@@ -22,13 +26,29 @@ class AuthToken:
     content = attr.ib(default=None)                 # type: str
 
 
+@functools.lru_cache(maxsize=SIGN_KEY_CACHE_SIZE)
+def get_sign_key(secret_key: str, date_str: str,
+                 hostname: str, hash_type: str) -> bytes:
+    '''
+    Derives the per-day, per-host signing key from the secret key.
+
+    The derived key only changes when the date or the endpoint host changes,
+    so the results are kept in a bounded LRU cache keyed by all the inputs.
+    The cache is safe to share across threads.
+
+    :param date_str: The request date formatted as ``YYYYMMDD``.
+    '''
+    sign_key = hmac.new(secret_key.encode(),
+                        date_str.encode(), hash_type).digest()
+    return hmac.new(sign_key, hostname.encode(), hash_type).digest()
+
+
 def generate_signature(method, version, endpoint,
                        date, rel_url, content_type, content,
                        access_key, secret_key, hash_type):
     '''
     Generates the API request signature from the given parameters.
     '''
-    hash_type = hash_type
     hostname = endpoint._val.netloc  # FIXME: migrate to public API
     if version >= 'v4.20181215':
         content = b''
@@ -48,10 +68,8 @@ def generate_signature(method, version, endpoint,
     )
     sign_bytes = sign_str.encode()
 
-    sign_key = hmac.new(secret_key.encode(),
-                        date.strftime('%Y%m%d').encode(), hash_type).digest()
-    sign_key = hmac.new(sign_key, hostname.encode(), hash_type).digest()
-
+    sign_key = get_sign_key(secret_key, date.strftime('%Y%m%d'),
+                            hostname, hash_type)
     signature = hmac.new(sign_key, sign_bytes, hash_type).hexdigest()
     headers = {
         'Authorization': 'BackendAI signMethod=HMAC-{}, credential={}:{}'.format(
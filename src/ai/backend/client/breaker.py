@@ -0,0 +1,187 @@
+from collections import deque
+import threading
+import time
+from typing import Dict, Tuple
+
+from yarl import URL
+
+from .exceptions import CircuitOpenError
+
+__all__ = (
+    'CircuitBreaker',
+    'CircuitBreakerRegistry',
+)
+
+
+class CircuitBreaker:
+    '''
+    Stops sending requests to a failing scope (an endpoint or its path prefix)
+    for a while so that the callers fail fast instead of waiting for timeouts.
+
+    The circuit starts *closed* and lets all requests pass.  It trips *open*
+    after *failure_threshold* consecutive failures or when the failure ratio of
+    the last *window_size* requests reaches *error_rate_threshold*, and then
+    rejects all requests for *cooldown* seconds.  After that, it becomes
+    *half-open* and lets a limited number of probe requests pass.  A successful
+    probe closes the circuit while a failed one opens it again.
+
+    It is safe to use across multiple threads.
+
+    :param scope: The name of the guarded scope used in the error messages.
+    :param failure_threshold: The number of consecutive failures to trip.
+    :param error_rate_threshold: The failure ratio (0 to 1) to trip.
+    :param window_size: The number of recent requests to calculate the failure ratio.
+    :param min_requests: The minimum number of recent requests to apply
+        *error_rate_threshold*.
+    :param cooldown: The number of seconds to reject requests after tripping.
+    :param half_open_probes: The maximum number of concurrent probe requests
+        in the half-open state.
+    '''
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    __slots__ = (
+        'scope', 'failure_threshold', 'error_rate_threshold',
+        'min_requests', 'cooldown', 'half_open_probes',
+        '_state', '_consecutive_failures', '_outcomes',
+        '_opened_at', '_probes', '_lock',
+    )
+
+    def __init__(self, scope: str, *,
+                 failure_threshold: int = 5,
+                 error_rate_threshold: float = 0.5,
+                 window_size: int = 20,
+                 min_requests: int = 10,
+                 cooldown: float = 30.0,
+                 half_open_probes: int = 1) -> None:
+        self.scope = scope
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._outcomes = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state
+
+    def _update_state(self, now: float) -> None:
+        if self._state == self.OPEN and now >= self._opened_at + self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+
+    def acquire(self) -> None:
+        '''
+        Checks if a request may be sent.  It must be followed by one of
+        :meth:`record_success`, :meth:`record_failure`, and :meth:`release`.
+
+        :raises CircuitOpenError: if the circuit is open or enough probes are
+            already running in the half-open state.
+        '''
+        now = time.monotonic()
+        with self._lock:
+            self._update_state(now)
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return
+            retry_after = max(0.0, self._opened_at + self.cooldown - now)
+        raise CircuitOpenError(
+            f'The circuit breaker for {self.scope} is open '
+            'due to the recent failures of the API server.',
+            self.scope, retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._outcomes.append(True)
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._consecutive_failures += 1
+            self._outcomes.append(False)
+            if self._state == self.HALF_OPEN:
+                self._trip(now)
+            elif self._state == self.CLOSED and self._should_trip():
+                self._trip(now)
+
+    def release(self) -> None:
+        '''
+        Gives back the probe slot of a request finished without an outcome,
+        e.g., cancelled ones.
+        '''
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _should_trip(self) -> bool:
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._outcomes) < max(1, self.min_requests):
+            return False
+        failures = sum(1 for ok in self._outcomes if not ok)
+        return failures / len(self._outcomes) >= self.error_rate_threshold
+
+    def _trip(self, now: float) -> None:
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._outcomes.clear()
+
+
+class CircuitBreakerRegistry:
+    '''
+    Keeps a :class:`CircuitBreaker` per endpoint, or per endpoint and path prefix.
+
+    The registry is shared by all sessions using the same
+    :class:`~ai.backend.client.config.APIConfig`.
+
+    :param path_depth: The number of leading path segments of the API requests
+        to separate the circuits, e.g., ``1`` makes separate circuits for
+        ``/kernel/...`` and ``/folders/...``.  Zero makes a single circuit
+        per endpoint.
+
+    The other keyword arguments are passed to :class:`CircuitBreaker`.
+    '''
+
+    def __init__(self, *, path_depth: int = 0, **kwargs) -> None:
+        self._path_depth = path_depth
+        self._options = kwargs
+        self._breakers: Dict[Tuple[URL, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get_path_prefix(self, path: str) -> str:
+        if self._path_depth <= 0:
+            return ''
+        segments = [s for s in path.split('?')[0].split('/') if s]
+        return '/'.join(segments[:self._path_depth])
+
+    def get(self, endpoint: URL, path: str = '') -> CircuitBreaker:
+        '''
+        Returns the circuit breaker of the given endpoint and request path.
+        '''
+        prefix = self.get_path_prefix(path)
+        with self._lock:
+            breaker = self._breakers.get((endpoint, prefix))
+            if breaker is None:
+                scope = str(endpoint)
+                if prefix:
+                    scope = f'{scope.rstrip("/")}/{prefix}'
+                breaker = CircuitBreaker(scope, **self._options)
+                self._breakers[(endpoint, prefix)] = breaker
+            return breaker
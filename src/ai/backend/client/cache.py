@@ -0,0 +1,255 @@
+import base64
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import (
+    Any, Hashable, Mapping, Optional, Sequence, Tuple,
+)
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from .compat import current_loop
+from .config import local_cache_path
+
+log = logging.getLogger('ai.backend.client.cache')
+
+__all__ = (
+    'DEFAULT_TTLS',
+    'CachedResponse',
+    'ResponseCache',
+    'get_default_cache',
+)
+
+
+DEFAULT_TTLS = {
+    'System.get_versions': 60.0,
+    'Resource.get_resource_slots': 300.0,
+    'Resource.get_vfolder_types': 300.0,
+    'Resource.get_docker_registries': 60.0,
+    'VFolder.list_hosts': 60.0,
+    'Image.list': 60.0,
+}
+'''
+The default TTLs in seconds for each cacheable API function.
+'''
+
+
+class CachedResponse:
+    '''
+    A snapshot of a successful API response stored in :class:`ResponseCache`.
+    It is used in place of :class:`aiohttp.ClientResponse` as the
+    :attr:`~ai.backend.client.request.Response.raw_response` of cache hits,
+    without the underlying body stream.
+    '''
+
+    __slots__ = ('status', 'reason', 'headers', 'body', 'expires_at')
+
+    def __init__(self, status: int, reason: str,
+                 headers: Sequence[Tuple[str, str]],
+                 body: bytes, expires_at: float) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.body = body
+        self.expires_at = expires_at
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('Content-Type', 'application/octet-stream') \
+                   .split(';')[0].strip().lower()
+
+    @property
+    def charset(self) -> Optional[str]:
+        for param in self.headers.get('Content-Type', '').split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'charset':
+                return value.strip('"')
+        return None
+
+    @property
+    def content_length(self) -> int:
+        return len(self.body)
+
+    def is_expired(self, now: float = None) -> bool:
+        return (time.time() if now is None else now) >= self.expires_at
+
+    def to_json(self) -> Mapping[str, Any]:
+        return {
+            'status': self.status,
+            'reason': self.reason,
+            'headers': [*self.headers.items()],
+            'body': base64.b64encode(self.body).decode('ascii'),
+            'expires_at': self.expires_at,
+        }
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> 'CachedResponse':
+        return cls(
+            data['status'], data['reason'],
+            [tuple(kv) for kv in data['headers']],
+            base64.b64decode(data['body']),
+            data['expires_at'],
+        )
+
+
+class ResponseCache:
+    '''
+    A response cache for slow-changing read-only API functions with per-function
+    TTLs and LRU eviction.
+    It may be shared by multiple sessions and threads.
+
+    Only the API functions whose names are in *ttls* are cached.
+    The cache entries are separated by the API endpoints and the access key.
+
+    :param maxsize: The maximum number of in-memory entries.
+    :param ttls: The TTLs in seconds overriding :data:`DEFAULT_TTLS`.
+        Set the TTL to zero to disable caching of a specific API function.
+    :param disk_path: If set, the entries are also stored as files under this
+        directory so that they survive across processes (e.g., CLI invocations).
+    '''
+
+    def __init__(self, *,
+                 maxsize: int = 256,
+                 ttls: Mapping[str, float] = None,
+                 disk_path: Path = None) -> None:
+        self._maxsize = maxsize
+        self._ttls = {**DEFAULT_TTLS, **(ttls if ttls else {})}
+        self._disk_path = disk_path
+        self._entries: 'OrderedDict[Tuple[str, str], CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def disk_path(self) -> Optional[Path]:
+        return self._disk_path
+
+    def get_ttl(self, name: str) -> float:
+        return self._ttls.get(name, 0)
+
+    @staticmethod
+    def _hash_key(key: Hashable) -> str:
+        return hashlib.sha256(repr(key).encode('utf8')).hexdigest()
+
+    def _get_file_path(self, name: str, hashed_key: str) -> Path:
+        return self._disk_path / f'{name}.{hashed_key}.json'
+
+    async def get(self, name: str, key: Hashable) -> Optional[CachedResponse]:
+        '''
+        Returns the unexpired cached response or ``None``.
+        '''
+        hashed_key = self._hash_key(key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((name, hashed_key))
+            if entry is not None:
+                if not entry.is_expired(now):
+                    self._entries.move_to_end((name, hashed_key))
+                    return entry
+                del self._entries[(name, hashed_key)]
+        if self._disk_path is None:
+            return None
+        entry = await current_loop().run_in_executor(
+            None, self._load, self._get_file_path(name, hashed_key))
+        if entry is None or entry.is_expired(now):
+            return None
+        self._put(name, hashed_key, entry)
+        return entry
+
+    async def set(self, name: str, key: Hashable,
+                  status: int, reason: str,
+                  headers: Mapping[str, str], body: bytes) -> None:
+        '''
+        Stores a response of the API function *name* if it has a positive TTL.
+        '''
+        ttl = self.get_ttl(name)
+        if ttl <= 0:
+            return
+        hashed_key = self._hash_key(key)
+        entry = CachedResponse(status, reason, [*headers.items()], body,
+                               time.time() + ttl)
+        self._put(name, hashed_key, entry)
+        if self._disk_path is not None:
+            await current_loop().run_in_executor(
+                None, self._save, self._get_file_path(name, hashed_key), entry)
+
+    def _put(self, name: str, hashed_key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[(name, hashed_key)] = entry
+            self._entries.move_to_end((name, hashed_key))
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    async def invalidate(self, name: str = None) -> None:
+        '''
+        Removes the cached responses of the API function *name*,
+        or all cached responses if *name* is ``None``.
+        '''
+        with self._lock:
+            for k in [*self._entries.keys()]:
+                if name is None or k[0] == name:
+                    del self._entries[k]
+        if self._disk_path is None:
+            return
+        pattern = '*.json' if name is None else f'{name}.*.json'
+        await current_loop().run_in_executor(None, self._remove_files, pattern)
+
+    def _remove_files(self, pattern: str) -> None:
+        if not self._disk_path.is_dir():
+            return
+        for path in self._disk_path.glob(pattern):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _load(path: Path) -> Optional[CachedResponse]:
+        try:
+            return CachedResponse.from_json(json.loads(path.read_text()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            log.debug('ignoring a broken response cache file: %s', path)
+            return None
+
+    def _save(self, path: Path, entry: CachedResponse) -> None:
+        try:
+            self._disk_path.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self._disk_path), suffix='.tmp')
+        except OSError:
+            log.debug('failed to write a response cache file: %s', path)
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry.to_json(), f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, str(path))
+        except BaseException as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            if not isinstance(e, OSError):
+                raise
+            log.debug('failed to write a response cache file: %s', path)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    '''
+    Returns the process-wide response cache with the on-disk tier under
+    the local cache directory.
+    '''
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(disk_path=local_cache_path / 'responses')
+        return _default_cache
@@ -1,10 +1,13 @@
+from collections import namedtuple
+import importlib
 from pathlib import Path
 import sys
 import warnings
 
 import click
 
-from ..config import APIConfig, set_config
+
+_LazyCommand = namedtuple('_LazyCommand', 'module_name placeholder aliases')
 
 
 class AliasGroup(click.Group):
@@ -12,11 +15,31 @@ class AliasGroup(click.Group):
     Enable command aliases.
 
     ref) https://github.com/click-contrib/click-aliases
+
+    It also supports lazily loaded subcommands registered with
+    :meth:`add_lazy_command`, whose modules are imported only when used.
     """
     def __init__(self, *args, **kwargs):
         super(AliasGroup, self).__init__(*args, **kwargs)
         self._commands = {}
         self._aliases = {}
+        self._lazy_commands = {}
+        self._lazy_aliases = {}
+
+    def add_lazy_command(self, name, module_name, help, aliases=()):
+        """
+        Registers a subcommand defined in the given module without importing it.
+        The short *help* is used to list the subcommands without importing
+        their modules.
+        """
+        # The placeholder is used only to format the help message.
+        # The aliases are kept apart from the ones registered by the real
+        # command so that both can be compared.
+        self._lazy_commands[name] = _LazyCommand(module_name,
+                                                 click.Command(name, help=help),
+                                                 tuple(aliases))
+        for alias in aliases:
+            self._lazy_aliases[alias] = name
 
     def command(self, *args, **kwargs):
         aliases = kwargs.pop('aliases', [])
@@ -51,21 +74,32 @@ class AliasGroup(click.Group):
     def get_command(self, ctx, cmd_name):
         if cmd_name in self._aliases:
             cmd_name = self._aliases[cmd_name]
+        elif cmd_name in self._lazy_aliases:
+            cmd_name = self._lazy_aliases[cmd_name]
+        if cmd_name not in self.commands and cmd_name in self._lazy_commands:
+            # The module registers its commands to this group upon import.
+            importlib.import_module(self._lazy_commands[cmd_name].module_name)
         command = super(AliasGroup, self).get_command(ctx, cmd_name)
         if command:
             return command
 
+    def list_commands(self, ctx):
+        return sorted({*super(AliasGroup, self).list_commands(ctx),
+                       *self._lazy_commands.keys()})
+
     def format_commands(self, ctx, formatter):
         commands = []
         for subcommand in self.list_commands(ctx):
-            cmd = self.get_command(ctx, subcommand)
-            # What is this, the tool lied about a command. Ignore it
+            # Avoid importing the lazy commands' modules just to show the help.
+            cmd = self.commands.get(subcommand)
+            aliases = self._commands.get(subcommand)
             if cmd is None:
-                continue
+                cmd = self._lazy_commands[subcommand].placeholder
+                aliases = self._lazy_commands[subcommand].aliases
             if cmd.hidden:
                 continue
-            if subcommand in self._commands:
-                aliases = ','.join(sorted(self._commands[subcommand]))
+            if aliases:
+                aliases = ','.join(sorted(aliases))
                 subcommand = '{0} ({1})'.format(subcommand, aliases)
             commands.append((subcommand, cmd))
 
@@ -91,6 +125,7 @@ def main(skip_sslcert_validation):
     """
     Backend.AI command line interface.
     """
+    from ..config import APIConfig, set_config
     config = APIConfig(skip_sslcert_validation=skip_sslcert_validation)
     set_config(config)
 
@@ -117,9 +152,39 @@ def run_alias():
 
 
 def _attach_command():
-    from . import admin, config, app, files, logs, manager, proxy, ps, run  # noqa
-    from . import vfolder       # noqa
-    from . import session_template  # noqa
+    for name, module_name, help, aliases in [
+        ('admin', 'admin', 'Provides the admin API access.', ()),
+        ('app', 'app', 'Run a local proxy to a service provided by Backend.AI '
+                       'compute sessions.', ()),
+        ('apps', 'app', 'List available additional arguments and environment '
+                        'variables when starting service.', ()),
+        ('config', 'config', 'Shows the current configuration.', ()),
+        ('download', 'files', 'Download files from a running container.', ()),
+        ('events', 'run', 'Monitor the lifecycle events of a compute session.', ()),
+        ('info', 'run', 'Show detailed information for a running compute session.', ()),
+        ('login', 'config', 'Log-in to the console API proxy.', ()),
+        ('logout', 'config', 'Log-out from the console API proxy and clears '
+                             'the local cookie data.', ()),
+        ('logs', 'logs', 'Shows the output logs of a running container.', ()),
+        ('ls', 'files', 'List files in a path of a running container.', ()),
+        ('manager', 'manager', 'Provides manager-related operations.', ()),
+        ('proxy', 'proxy', 'Run a non-encrypted non-authorized API proxy server.', ()),
+        ('ps', 'ps', 'Lists the current running compute sessions for '
+                     'the current keypair.', ()),
+        ('run', 'run', 'Run the given code snippet or files in a session.', ()),
+        ('session-template', 'session_template', 'Provides task template operations',
+         ('sesstpl', )),
+        ('start', 'run', 'Prepare and start a single compute session '
+                         'without executing codes.', ()),
+        ('start-template', 'run', 'Prepare and start a single compute session '
+                                  'without executing codes.', ()),
+        ('task-logs', 'logs', 'Shows the output logs of a batch task.', ()),
+        ('terminate', 'run', 'Terminate the given session(s).', ('rm', 'kill')),
+        ('update-password', 'config', "Update user's password.", ()),
+        ('upload', 'files', "Upload files to user's home folder.", ()),
+        ('vfolder', 'vfolder', 'Provides virtual folder operations.', ()),
+    ]:
+        main.add_lazy_command(name, f'{__name__}.{module_name}', help, aliases)
 
 
 _attach_command()
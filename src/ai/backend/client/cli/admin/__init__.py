@@ -1,7 +1,7 @@
-from .. import main
+from .. import AliasGroup, main
 
 
-@main.group()
+@main.group(cls=AliasGroup)
 def admin():
     '''
     Provides the admin API access.
@@ -9,10 +9,39 @@ def admin():
 
 
 def _attach_command():
-    from . import (  # noqa
-        agents, domains, etcd, groups, images, keypairs, resources, resource_policies,
-        scaling_groups, sessions, users, vfolders
-    )
+    for name, module_name, help in [
+        ('agent', 'agents', 'Show the information about the given agent.'),
+        ('agents', 'agents', 'List and manage agents.'),
+        ('alias-image', 'images', 'Add an image alias.'),
+        ('dealias-image', 'images', 'Remove an image alias.'),
+        ('domain', 'domains', 'Show the information about the given domain.'),
+        ('domains', 'domains', 'List and manage domains.'),
+        ('etcd', 'etcd', 'List and manage ETCD configurations.'),
+        ('group', 'groups', 'Show the information about the given group.'),
+        ('groups', 'groups', 'List and manage groups.'),
+        ('images', 'images', 'Show the list of registered images in this cluster.'),
+        ('keypair', 'keypairs', 'Show the server-side information of the currently '
+                                'configured access key.'),
+        ('keypair-resource-policies', 'resource_policies',
+         'List and manage keypair resource policies.'),
+        ('keypair-resource-policy', 'resource_policies',
+         'Show details about a keypair resource policy.'),
+        ('keypairs', 'keypairs', 'List and manage keypairs.'),
+        ('list-scaling-groups', 'scaling_groups', ''),
+        ('rescan-images', 'images', 'Update the kernel image metadata from all '
+                                    'configured docker registries.'),
+        ('resources', 'resources', 'Manage resources.'),
+        ('scaling-group', 'scaling_groups',
+         'Show the information about the given scaling group.'),
+        ('scaling-groups', 'scaling_groups', 'List and manage scaling groups.'),
+        ('session', 'sessions', 'Show detailed information for a running compute session.'),
+        ('sessions', 'sessions', 'List and manage compute sessions.'),
+        ('user', 'users', 'Show the information about the given user by email.'),
+        ('users', 'users', 'List and manage users.'),
+        ('vfolders', 'vfolders', 'List and manage virtual folders.'),
+        ('watcher', 'agents', 'Provides agent watcher operations.'),
+    ]:
+        admin.add_lazy_command(name, f'{__name__}.{module_name}', help)
 
 
 _attach_command()
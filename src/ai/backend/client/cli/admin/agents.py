@@ -4,7 +4,7 @@ import click
 from tabulate import tabulate
 
 from . import admin
-from ...session import Session, is_legacy_server
+from ...session import Session
 from ..pretty import print_error
 
 
@@ -25,10 +25,10 @@ def agent(agent_id):
         ('Total slots', 'available_slots'),
         ('Occupied slots', 'occupied_slots'),
     ]
-    if is_legacy_server():
-        del fields[9]
-        del fields[6]
     with Session() as session:
+        if session.is_legacy_server:
+            del fields[9]
+            del fields[6]
         try:
             resp = session.Agent.detail(agent_id=agent_id,
                                         fields=(item[1] for item in fields))
@@ -63,9 +63,6 @@ def agents(status, all):
         ('Total slots', 'available_slots'),
         ('Occupied slots', 'occupied_slots'),
     ]
-    if is_legacy_server():
-        del fields[9]
-        del fields[6]
 
     def execute_paginated_query(limit, offset):
         try:
@@ -111,6 +108,9 @@ def agents(status, all):
                 break
 
     with Session() as session:
+        if session.is_legacy_server:
+            del fields[9]
+            del fields[6]
         paginating_interval = 10
         if all:
             click.echo_via_pager(_generate_paginated_results(paginating_interval))
@@ -23,7 +23,7 @@ def list_scaling_groups(group):
         print(resp)
 
 
-@admin.command()
+@admin.command(name='scaling-group')
 @click.option('-n', '--name', type=str, default=None,
               help="Name of a scaling group.")
 def scaling_group(name):
@@ -5,8 +5,7 @@ from tabulate import tabulate
 import textwrap
 
 from . import admin
-from ...helper import is_admin
-from ...session import Session, is_legacy_server
+from ...session import Session
 from ...versioning import get_naming, apply_version_aware_fields
 from ..pretty import print_error, print_fail
 
@@ -68,7 +67,7 @@ def sessions(status, access_key, name_only, show_tid, dead, running, all, detail
         with Session() as session:
             name_key = get_naming(session.api_version, 'name_gql_field')
             fields.append(format_options['name'])
-            if is_admin(session) and not is_legacy_server():
+            if session.is_admin and not session.is_legacy_server:
                 fields.append(format_options['owner'])
     except Exception as e:
         print_error(e)
@@ -254,9 +253,9 @@ def session(name):
         ('IO Current Scratch Size', 'io_cur_scratch_size'),
         ('CPU Using (%)', 'cpu_using'),
     ]
-    if is_legacy_server():
-        del fields[4]  # tag
     with Session() as session:
+        if session.is_legacy_server:
+            del fields[4]  # tag
         fields = apply_version_aware_fields(session, fields)
         name_key = get_naming(session, 'name_gql_field')
         q = 'query($name: String!) {' \
@@ -8,6 +8,7 @@ import re
 import secrets
 import string
 import sys
+import textwrap
 import traceback
 
 import aiohttp
@@ -21,8 +22,9 @@ from .admin.sessions import session as cli_admin_session
 from ..config import local_cache_path
 from ..compat import asyncio_run, current_loop
 from ..exceptions import BackendError, BackendAPIError
-from ..session import Session, AsyncSession, is_legacy_server
+from ..session import Session, AsyncSession
 from ..utils import undefined
+from ..versioning import get_naming
 from .pretty import (
     print_info, print_wait, print_done, print_error, print_fail, print_warn,
     format_info,
@@ -194,6 +196,42 @@ async def exec_terminal(compute_session, *,
     raise NotImplementedError
 
 
+_terminable_statuses = [
+    'PENDING', 'PREPARING', 'PULLING', 'BUILDING', 'RUNNING', 'RESTARTING',
+    'RESIZING', 'SUSPENDED', 'TERMINATING', 'ERROR',
+]
+
+
+def _list_sessions(session, status, access_key=None, page_size=100):
+    '''
+    Returns the names and owner access keys of all compute sessions
+    in the given status.
+    '''
+    name_key = get_naming(session.api_version, 'name_gql_field')
+    q = textwrap.dedent('''
+    query($limit:Int!, $offset:Int!, $ak:String, $status:String) {
+      compute_session_list(
+          limit:$limit, offset:$offset, access_key:$ak, status:$status) {
+        items { $name_key access_key }
+        total_count
+      }
+    }''').strip().replace('$name_key', name_key)
+    sessions = []
+    offset = 0
+    while True:
+        result = session.Admin.query(q, {
+            'limit': page_size,
+            'offset': offset,
+            'status': status,
+            'ak': access_key,
+        })['compute_session_list']
+        sessions.extend((item[name_key], item['access_key']) for item in result['items'])
+        offset += page_size
+        if not result['items'] or offset >= result['total_count']:
+            break
+    return sessions
+
+
 def _noop(*args, **kwargs):
     pass
 
@@ -229,7 +267,7 @@ def _format_stats(stats):
                 val = '{:,}'.format(Decimal(metric['current']))
                 unit = 'msec'
             elif unit == 'percent':
-                val = metric['pct']
+                val = metric.get('pct', metric['current'])
                 unit = '%'
             else:
                 val = metric['current']
@@ -251,6 +289,48 @@ def _format_stats(stats):
     return tabulate(formatted)
 
 
+def _aggregate_stats(stats_list):
+    '''
+    Sums up the statistics of multiple sessions into the format of a single
+    session's statistics for :func:`_format_stats`.
+    The percentage metrics are averaged instead.
+    '''
+    versions = {stats.get('version', 1) for stats in stats_list}
+    if len(versions) != 1:
+        return None
+    version = versions.pop()
+    aggregated = {'version': version, 'status': None}
+    if version == 1:
+        for stats in stats_list:
+            for key, val in stats.items():
+                if key in ('version', 'status') or val is None:
+                    continue
+                aggregated[key] = aggregated.get(key, 0) + Decimal(str(val))
+    else:
+        counts = collections.Counter()
+        for stats in stats_list:
+            for key, metric in stats.items():
+                if key in ('version', 'status') or not isinstance(metric, dict):
+                    continue
+                agg_metric = aggregated.setdefault(key, {'unit_hint': metric['unit_hint']})
+                for field in ('current', 'stats.max', 'pct'):
+                    if metric.get(field) is None:
+                        continue
+                    agg_metric[field] = agg_metric.get(field, 0) + Decimal(str(metric[field]))
+                    counts[key, field] += 1
+        for key, metric in aggregated.items():
+            if not isinstance(metric, dict):
+                continue
+            averaged = metric['unit_hint'] == 'percent'
+            for field in ('current', 'stats.max', 'pct'):
+                if field not in metric:
+                    continue
+                if averaged or field == 'pct':
+                    metric[field] = (metric[field] / counts[key, field]).quantize(Decimal('0.01'))
+                metric[field] = str(metric[field])
+    return aggregated
+
+
 def _prepare_resource_arg(resources):
     if resources:
         resources = {k: v for k, v in map(lambda s: s.split('=', 1), resources)}
@@ -670,25 +750,24 @@ def run(image, files, name,                                # base args
                     stdout.close()
                     stderr.close()
 
-    def _run_cases_legacy():
+    def _run_cases_legacy(session):
         if name is None:
             name_prefix = f'pysdk-{secrets.token_hex(5)}'
         else:
             name_prefix = name
         vprint_info('Session token prefix: {0}'.format(name_prefix))
         vprint_info('In the legacy mode, all cases will run serially!')
-        with Session() as session:
-            for idx, case in enumerate(case_set.keys()):
-                if is_multi:
-                    _name = '{0}-{1}'.format(name_prefix, idx)
-                else:
-                    _name = name_prefix
-                envs = dict(case[0])
-                clean_cmd = clean if clean else '*'
-                build_cmd = case[1]
-                exec_cmd = case[2]
-                _run_legacy(session, idx, _name, envs,
-                            clean_cmd, build_cmd, exec_cmd)
+        for idx, case in enumerate(case_set.keys()):
+            if is_multi:
+                _name = '{0}-{1}'.format(name_prefix, idx)
+            else:
+                _name = name_prefix
+            envs = dict(case[0])
+            clean_cmd = clean if clean else '*'
+            build_cmd = case[1]
+            exec_cmd = case[2]
+            _run_legacy(session, idx, _name, envs,
+                        clean_cmd, build_cmd, exec_cmd)
 
     async def _run_cases():
         loop = current_loop()
@@ -702,7 +781,12 @@ def run(image, files, name,                                # base args
                        '~/.cache/backend.ai/client-logs directory.')
         async with AsyncSession() as session:
             tasks = []
-            # TODO: limit max-parallelism using aiojobs
+            parallel_sema = asyncio.Semaphore(max_parallel if is_multi else 1)
+
+            async def _run_bounded(*args, **kwargs):
+                async with parallel_sema:
+                    await _run(*args, **kwargs)
+
             for idx, case in enumerate(case_set.keys()):
                 if is_multi:
                     _name = '{0}-{1}'.format(name_prefix, idx)
@@ -713,9 +797,9 @@ def run(image, files, name,                                # base args
                 build_cmd = case[1]
                 exec_cmd = case[2]
                 t = loop.create_task(
-                    _run(session, idx, _name, envs,
-                         clean_cmd, build_cmd, exec_cmd,
-                         is_multi=is_multi))
+                    _run_bounded(session, idx, _name, envs,
+                                 clean_cmd, build_cmd, exec_cmd,
+                                 is_multi=is_multi))
                 tasks.append(t)
             results = await asyncio.gather(*tasks, return_exceptions=True)
             if any(map(lambda r: isinstance(r, Exception), results)):
@@ -724,10 +808,11 @@ def run(image, files, name,                                # base args
                 sys.exit(1)
 
     try:
-        if is_legacy_server():
-            _run_cases_legacy()
-        else:
-            asyncio_run(_run_cases())
+        with Session() as session:
+            if session.is_legacy_server:
+                _run_cases_legacy(session)
+                return
+        asyncio_run(_run_cases())
     except Exception as e:
         print_fail('{0}'.format(e))
 
@@ -1032,39 +1117,84 @@ def start_template(
               help='Specify the owner of the target session explicitly.')
 @click.option('-s', '--stats', is_flag=True,
               help='Show resource usage statistics after termination')
-def terminate(name, owner, stats):
+@click.option('--all-matching', metavar='STATUS', default=None,
+              type=click.Choice(_terminable_statuses, case_sensitive=False),
+              help='Terminate all sessions in the given status as well. '
+                   'Combine with "-o" / "--owner" to limit the sessions '
+                   'to a specific access key.')
+@click.option('--max-parallel', metavar='NUM', type=int, default=10,
+              help='The maximum number of sessions terminated in parallel.')
+def terminate(name, owner, stats, all_matching, max_parallel):
     '''
-    Terminate the given session.
+    Terminate the given session(s).
 
     SESSID: session ID or its alias given when creating the session.
     '''
-    print_wait('Terminating the session(s)...')
+    if not name and all_matching is None:
+        print_fail('Specify the sessions to terminate or use "--all-matching".')
+        sys.exit(1)
+    if max_parallel <= 0:
+        print_fail('The number of maximum parallel terminations must be '
+                   'a positive integer.')
+        sys.exit(1)
     with Session() as session:
-        has_failure = False
-        for sess in name:
+        targets = [session.ComputeSession(sess, owner) for sess in name]
+        if all_matching is not None:
             try:
-                compute_session = session.ComputeSession(sess, owner)
-                ret = compute_session.destroy()
-            except BackendAPIError as e:
-                print_error(e)
-                if e.status == 404:
-                    print_info(
-                        'If you are an admin, use "-o" / "--owner" option '
-                        'to terminate other user\'s session.')
-                has_failure = True
+                matched = _list_sessions(session, all_matching.upper(), owner)
             except Exception as e:
                 print_error(e)
-                has_failure = True
-            if has_failure:
                 sys.exit(1)
+            known_names = set(name)
+            for sess, access_key in matched:
+                if sess in known_names:
+                    continue
+                if access_key == session.config.access_key:
+                    access_key = None
+                targets.append(session.ComputeSession(sess, owner or access_key))
+            if not targets:
+                print_info('There are no sessions in the {0} status.'
+                           .format(all_matching.upper()))
+                return
+        print_wait('Terminating {0} session(s)...'.format(len(targets)))
+
+        def _report(result):
+            if not result.ok:
+                print_fail('[{0}] Termination failed.'.format(result.name))
+                print_error(result.error)
+
+        summary = session.ComputeSession.destroy_many(
+            targets, concurrency=max_parallel, on_result=_report)
+        failed = summary.failed
+        if any(isinstance(r.error, BackendAPIError) and r.error.status == 404
+               for r in failed):
+            print_info(
+                'If you are an admin, use "-o" / "--owner" option '
+                'to terminate other user\'s session.')
+        if failed:
+            print_fail('Terminated {0} session(s), {1} failed.'
+                       .format(len(summary.succeeded), len(failed)))
+        elif len(targets) > 1:
+            print_done('Terminated {0} sessions in {1:.1f} seconds.'
+                       .format(len(targets), summary.elapsed))
         else:
             print_done('Done.')
-            if stats:
-                stats = ret.get('stats', None) if ret else None
-                if stats:
-                    print(_format_stats(stats))
+        if stats:
+            collected_stats = summary.stats
+            if len(targets) == 1 and collected_stats:
+                print(_format_stats(collected_stats[0]))
+            elif collected_stats:
+                aggregated = _aggregate_stats(collected_stats)
+                if aggregated is None:
+                    print_warn('Cannot aggregate the statistics of different versions.')
                 else:
-                    print('Statistics is not available.')
+                    print_info('Aggregated statistics of {0} session(s):'
+                               .format(len(collected_stats)))
+                    print(_format_stats(aggregated))
+            else:
+                print('Statistics is not available.')
+        if failed:
+            sys.exit(1)
 
 
 @main.command()
@@ -0,0 +1,166 @@
+'''
+A pluggable JSON codec used to encode the request bodies and decode the response
+bodies.
+
+It uses the fastest available implementation among orjson, ujson, and the
+standard library, in that order.  All of them serialize :class:`pathlib.Path` and
+:class:`decimal.Decimal` objects as strings and decode JSON objects as plain
+dicts, which preserve the key order as well.
+'''
+
+from decimal import Decimal
+import json as modjson
+from pathlib import PurePath
+from typing import Any, Callable, List, Union
+
+__all__ = (
+    'ExtendedJSONEncoder',
+    'JSONCodec',
+    'available_codecs',
+    'get_codec',
+    'set_codec',
+    'dumps',
+    'loads',
+)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, PurePath):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class ExtendedJSONEncoder(modjson.JSONEncoder):
+
+    def default(self, obj):
+        if isinstance(obj, (PurePath, Decimal)):
+            return _default(obj)
+        return super().default(obj)
+
+
+class JSONCodec:
+    '''
+    A pair of the JSON encoder and decoder functions.
+
+    :param name: The name of the underlying implementation.
+    :param dumps: A function to serialize an object into a string.
+    :param loads: A function to deserialize a string or bytes into an object.
+    '''
+
+    __slots__ = ('name', 'dumps', 'loads')
+
+    def __init__(self, name: str,
+                 dumps: Callable[[Any], str],
+                 loads: Callable[[Union[str, bytes]], Any]) -> None:
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self) -> str:
+        return f'<JSONCodec {self.name}>'
+
+
+def _make_stdlib_codec() -> JSONCodec:
+    return JSONCodec(
+        'json',
+        lambda obj: modjson.dumps(obj, cls=ExtendedJSONEncoder),
+        modjson.loads,
+    )
+
+
+def _make_orjson_codec() -> JSONCodec:
+    import orjson
+    # orjson serializes Decimal only via the default hook and rejects
+    # non-string keys without OPT_NON_STR_KEYS, unlike the stdlib.
+    options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=options).decode('utf-8')
+
+    return JSONCodec('orjson', dumps, orjson.loads)
+
+
+def _make_ujson_codec() -> JSONCodec:
+    import ujson
+    # The "default" hook is available since ujson 5.1, and some versions
+    # serialize Decimal as a float without calling it.
+    if ujson.dumps([Decimal('0.1'), PurePath('/')], default=_default) != '["0.1","/"]':
+        raise TypeError('ujson does not serialize Decimal and Path as strings')
+
+    def dumps(obj: Any) -> str:
+        return ujson.dumps(obj, default=_default, ensure_ascii=False,
+                           escape_forward_slashes=False)
+
+    return JSONCodec('ujson', dumps, ujson.loads)
+
+
+_codec_factories = {
+    'orjson': _make_orjson_codec,
+    'ujson': _make_ujson_codec,
+    'json': _make_stdlib_codec,
+}
+
+
+def available_codecs() -> List[str]:
+    '''
+    Returns the names of the JSON codecs usable in the current environment,
+    from the fastest one.
+    '''
+    names = []
+    for name, factory in _codec_factories.items():
+        try:
+            factory()
+        except (ImportError, TypeError):
+            continue
+        names.append(name)
+    return names
+
+
+def set_codec(name: str = None) -> JSONCodec:
+    '''
+    Changes the process-wide JSON codec.
+
+    :param name: One of ``"orjson"``, ``"ujson"``, and ``"json"``.
+        If ``None``, the fastest available one is chosen.
+    '''
+    global _codec
+    if name is None:
+        for factory in _codec_factories.values():
+            try:
+                _codec = factory()
+            except (ImportError, TypeError):
+                continue
+            return _codec
+    try:
+        factory = _codec_factories[name]
+    except KeyError:
+        raise ValueError(f'Unknown JSON codec: {name!r}')
+    _codec = factory()
+    return _codec
+
+
+def get_codec() -> JSONCodec:
+    '''
+    Returns the current process-wide JSON codec.
+    '''
+    return _codec
+
+
+def dumps(obj: Any) -> str:
+    '''
+    Serializes the given object into a JSON string using the current codec.
+    '''
+    return _codec.dumps(obj)
+
+
+def loads(s: Union[str, bytes]) -> Any:
+    '''
+    Deserializes the given JSON string or bytes using the current codec.
+    '''
+    return _codec.loads(s)
+
+
+_codec = _make_stdlib_codec()
+set_codec()
@@ -3,13 +3,17 @@ from pathlib import Path
 import random
 import re
 from typing import (
-    Any, Callable, Iterable, Union,
+    Any, Callable, Iterable, Optional, Union,
     List, Tuple, Sequence,
 )
 
 import appdirs
 from yarl import URL
 
+from .breaker import CircuitBreakerRegistry
+from .endpoint import EndpointSelector
+from .ratelimit import RateLimiter
+
 __all__ = [
     'parse_api_version',
     'get_config',
@@ -75,17 +79,49 @@ def bool_env(v: str) -> bool:
 
 def _clean_urls(v: str) -> List[URL]:
     if isinstance(v, URL):
-        return [v]
-    if isinstance(v, str):
+        urls = [v]
+    elif isinstance(v, str):
         urls = []
         for entry in v.split(','):
             url = URL(entry)
-            if not url.is_absolute():
+            if url.scheme != 'unix' and not url.is_absolute():
                 raise ValueError('URL {} is not absolute.'.format(url))
             urls.append(url)
+    if any(url.scheme == 'unix' for url in urls):
+        if len(urls) > 1:
+            raise ValueError('A unix socket endpoint cannot be used with other endpoints.')
+        if not urls[0].path or urls[0].path == '/':
+            raise ValueError('URL {} does not have the socket path.'.format(urls[0]))
     return urls
 
 
+def _clean_optional_int(v):
+    if v is None or isinstance(v, int):
+        return v
+    if v.lower() in ('', 'none'):
+        return None
+    return int(v)
+
+
+def _clean_optional_float(v):
+    if v is None or isinstance(v, (int, float)):
+        return v
+    if v.lower() in ('', 'none'):
+        return None
+    return float(v)
+
+
+def _clean_compression(v):
+    if v is None:
+        return None
+    v = v.lower()
+    if v in ('', 'none', 'no'):
+        return None
+    if v not in ('gzip', 'deflate'):
+        raise ValueError(f'Unsupported request compression: {v}')
+    return v
+
+
 def _clean_tokens(v):
     if isinstance(v, str):
         if not v:
@@ -101,6 +137,9 @@ class APIConfig:
     environment variables or as the explicit arguments.
 
     :param endpoint: The URL prefix to make API requests via HTTP/HTTPS.
+        It may be also a unix domain socket path like
+        ``"unix:///run/backend.ai/manager.sock"`` to send plain HTTP requests
+        through the socket to a co-located server, without any path prefix.
         If this is given as ``str`` and contains multiple URLs separated by comma,
         the underlying HTTP request-response facility will perform client-side
         load balancing and automatic fail-over using them, assuming that all those
@@ -129,6 +168,61 @@ class APIConfig:
         access key) to be automatically mounted upon any
         :func:`Kernel.get_or_create()
         <ai.backend.client.kernel.Kernel.get_or_create>` calls.
+    :param connection_pool_size: The maximum number of simultaneous connections
+        kept in the connection pool of a session.  Zero means no limit.
+    :param connection_pool_size_per_host: The maximum number of simultaneous
+        connections to a single endpoint host.  Zero means no limit.
+    :param keepalive_timeout: The number of seconds to keep idle connections alive
+        for reuse.  It is ignored when *force_close* is set.
+    :param dns_cache_ttl: The number of seconds to cache resolved DNS records.
+        ``None`` means caching them forever.
+    :param force_close: Close the underlying connections after every request
+        instead of keeping them alive.
+    :param response_cache: Let sessions cache the responses of slow-changing
+        read-only API functions in the process-wide
+        :class:`~ai.backend.client.cache.ResponseCache`, which also stores them
+        under the local cache directory to share them across processes.
+    :param api_version_cache_ttl: The number of seconds to reuse the server API
+        version stored in the local cache directory instead of probing the server
+        when opening sessions.  Zero disables the cache.
+    :param rate_limit_read: The maximum number of read-only API requests per second
+        sent to each endpoint by all sessions using this configuration.
+        Zero means no limit.
+    :param rate_limit_mutate: The maximum number of other API requests per second,
+        except the compute session creation requests.  Zero means no limit.
+    :param rate_limit_create: The maximum number of compute session creation
+        requests per second.  Zero means no limit.
+    :param rate_limit_burst: The maximum number of requests sent at once after
+        idle periods in each rate-limited category.  ``None`` means the same to
+        the rate of each category.
+    :param circuit_breaker_threshold: The number of consecutive failures (connection
+        errors, timeouts, and 5xx responses) to open the circuit breaker of an
+        endpoint, which makes the subsequent requests fail fast with
+        :class:`~ai.backend.client.exceptions.CircuitOpenError`.
+        Zero disables the circuit breakers.
+    :param circuit_breaker_error_rate: The failure ratio (0 to 1) of the recent
+        requests to open the circuit breaker.
+    :param circuit_breaker_cooldown: The number of seconds to keep the circuit
+        breaker open before letting a probe request pass.
+    :param circuit_breaker_path_depth: The number of leading API path segments to
+        separate the circuit breakers of an endpoint.  Zero means a single circuit
+        breaker per endpoint.
+    :param request_compression: Either ``"gzip"`` or ``"deflate"`` to compress
+        the request bodies on the fly with the ``Content-Encoding`` header.
+        ``None`` (the default) disables compression.  It is not applied to the
+        API versions older than v4.20181215 which sign the request bodies.
+    :param request_compression_threshold: The minimum request body size in bytes
+        to compress.
+    :param request_compression_types: The list of content types to compress.
+        An entry may be a wildcard like ``"text/*"``.  For multipart uploads,
+        the body is compressed only if all attached files have these content
+        types and known sizes.  The files with the generic
+        ``"application/octet-stream"`` type are checked by the types guessed
+        from their names.
+    :param shared_client_pool: Let sessions share the underlying HTTP clients
+        and their keep-alive connections via the process-wide
+        :class:`~ai.backend.client.session.ClientPool`, which is useful when
+        opening many short-lived sessions.
     '''
 
     DEFAULTS = {
@@ -140,6 +234,29 @@ class APIConfig:
         'group': 'default',
         'connection_timeout': 10.0,
         'read_timeout': None,
+        'connection_pool_size': 100,
+        'connection_pool_size_per_host': 0,
+        'keepalive_timeout': 15.0,
+        'dns_cache_ttl': 10,
+        'force_close': False,
+        'api_version_cache_ttl': 3600.0,
+        'rate_limit_read': 0.0,
+        'rate_limit_mutate': 0.0,
+        'rate_limit_create': 0.0,
+        'rate_limit_burst': None,
+        'circuit_breaker_threshold': 0,
+        'circuit_breaker_error_rate': 0.5,
+        'circuit_breaker_cooldown': 30.0,
+        'circuit_breaker_path_depth': 0,
+        'request_compression': None,
+        'request_compression_threshold': 4096,
+        'request_compression_types': (
+            'application/json',
+            'application/javascript',
+            'application/x-yaml',
+            'application/xml',
+            'text/*',
+        ),
     }
     '''
     The default values except the access and secret keys.
@@ -158,12 +275,38 @@ class APIConfig:
                  vfolder_mounts: Iterable[str] = None,
                  skip_sslcert_validation: bool = None,
                  connection_timeout: float = None,
-                 read_timeout: float = None) -> None:
+                 read_timeout: float = None,
+                 connection_pool_size: int = None,
+                 connection_pool_size_per_host: int = None,
+                 keepalive_timeout: float = None,
+                 dns_cache_ttl: int = None,
+                 force_close: bool = None,
+                 response_cache: bool = None,
+                 api_version_cache_ttl: float = None,
+                 rate_limit_read: float = None,
+                 rate_limit_mutate: float = None,
+                 rate_limit_create: float = None,
+                 rate_limit_burst: float = None,
+                 circuit_breaker_threshold: int = None,
+                 circuit_breaker_error_rate: float = None,
+                 circuit_breaker_cooldown: float = None,
+                 circuit_breaker_path_depth: int = None,
+                 request_compression: str = None,
+                 request_compression_threshold: int = None,
+                 request_compression_types: Iterable[str] = None,
+                 shared_client_pool: bool = None) -> None:
         from . import get_user_agent  # noqa; to avoid circular imports
         self._endpoints = (
             _clean_urls(endpoint) if endpoint else
             get_env('ENDPOINT', self.DEFAULTS['endpoint'], clean=_clean_urls))
+        self._unix_socket_path: Optional[str] = None
+        if self._endpoints[0].scheme == 'unix':
+            # The requests are made to a placeholder HTTP URL and routed
+            # to the socket by the connector.
+            self._unix_socket_path = self._endpoints[0].path
+            self._endpoints = [URL('http://localhost')]
         random.shuffle(self._endpoints)
+        self._endpoint_selector = EndpointSelector(self._endpoints)
         self._endpoint_type = endpoint_type if endpoint_type \
                               else get_env('ENDPOINT_TYPE', self.DEFAULTS['endpoint_type'])
         self._domain = domain if domain else get_env('DOMAIN', self.DEFAULTS['domain'])
@@ -191,6 +334,83 @@ class APIConfig:
             get_env('CONNECTION_TIMEOUT', self.DEFAULTS['connection_timeout'])
         self._read_timeout = read_timeout if read_timeout else \
             get_env('READ_TIMEOUT', self.DEFAULTS['read_timeout'])
+        self._connection_pool_size = connection_pool_size \
+            if connection_pool_size is not None else \
+            get_env('CONNECTION_POOL_SIZE', self.DEFAULTS['connection_pool_size'],
+                    clean=int)
+        self._connection_pool_size_per_host = connection_pool_size_per_host \
+            if connection_pool_size_per_host is not None else \
+            get_env('CONNECTION_POOL_SIZE_PER_HOST',
+                    self.DEFAULTS['connection_pool_size_per_host'], clean=int)
+        self._keepalive_timeout = keepalive_timeout \
+            if keepalive_timeout is not None else \
+            get_env('KEEPALIVE_TIMEOUT', self.DEFAULTS['keepalive_timeout'], clean=float)
+        self._dns_cache_ttl = dns_cache_ttl if dns_cache_ttl is not None else \
+            get_env('DNS_CACHE_TTL', self.DEFAULTS['dns_cache_ttl'], clean=_clean_optional_int)
+        self._force_close = force_close if force_close is not None else \
+            get_env('FORCE_CLOSE', 'no', clean=bool_env)
+        self._response_cache = response_cache if response_cache is not None else \
+            get_env('RESPONSE_CACHE', 'no', clean=bool_env)
+        self._api_version_cache_ttl = api_version_cache_ttl \
+            if api_version_cache_ttl is not None else \
+            get_env('API_VERSION_CACHE_TTL', self.DEFAULTS['api_version_cache_ttl'],
+                    clean=float)
+        self._rate_limit_read = rate_limit_read if rate_limit_read is not None else \
+            get_env('RATE_LIMIT_READ', self.DEFAULTS['rate_limit_read'], clean=float)
+        self._rate_limit_mutate = rate_limit_mutate if rate_limit_mutate is not None else \
+            get_env('RATE_LIMIT_MUTATE', self.DEFAULTS['rate_limit_mutate'], clean=float)
+        self._rate_limit_create = rate_limit_create if rate_limit_create is not None else \
+            get_env('RATE_LIMIT_CREATE', self.DEFAULTS['rate_limit_create'], clean=float)
+        self._rate_limit_burst = rate_limit_burst if rate_limit_burst is not None else \
+            get_env('RATE_LIMIT_BURST', self.DEFAULTS['rate_limit_burst'],
+                    clean=_clean_optional_float)
+        self._rate_limiter = None
+        if max(self._rate_limit_read, self._rate_limit_mutate, self._rate_limit_create) > 0:
+            self._rate_limiter = RateLimiter(
+                read_rate=self._rate_limit_read,
+                mutate_rate=self._rate_limit_mutate,
+                create_rate=self._rate_limit_create,
+                burst=self._rate_limit_burst,
+            )
+        self._circuit_breaker_threshold = circuit_breaker_threshold \
+            if circuit_breaker_threshold is not None else \
+            get_env('CIRCUIT_BREAKER_THRESHOLD', self.DEFAULTS['circuit_breaker_threshold'],
+                    clean=int)
+        self._circuit_breaker_error_rate = circuit_breaker_error_rate \
+            if circuit_breaker_error_rate is not None else \
+            get_env('CIRCUIT_BREAKER_ERROR_RATE', self.DEFAULTS['circuit_breaker_error_rate'],
+                    clean=float)
+        self._circuit_breaker_cooldown = circuit_breaker_cooldown \
+            if circuit_breaker_cooldown is not None else \
+            get_env('CIRCUIT_BREAKER_COOLDOWN', self.DEFAULTS['circuit_breaker_cooldown'],
+                    clean=float)
+        self._circuit_breaker_path_depth = circuit_breaker_path_depth \
+            if circuit_breaker_path_depth is not None else \
+            get_env('CIRCUIT_BREAKER_PATH_DEPTH', self.DEFAULTS['circuit_breaker_path_depth'],
+                    clean=int)
+        self._circuit_breakers = None
+        if self._circuit_breaker_threshold > 0:
+            self._circuit_breakers = CircuitBreakerRegistry(
+                path_depth=self._circuit_breaker_path_depth,
+                failure_threshold=self._circuit_breaker_threshold,
+                error_rate_threshold=self._circuit_breaker_error_rate,
+                cooldown=self._circuit_breaker_cooldown,
+            )
+        self._request_compression = _clean_compression(request_compression) \
+            if request_compression else \
+            get_env('REQUEST_COMPRESSION', self.DEFAULTS['request_compression'],
+                    clean=_clean_compression)
+        self._request_compression_threshold = request_compression_threshold \
+            if request_compression_threshold is not None else \
+            get_env('REQUEST_COMPRESSION_THRESHOLD',
+                    self.DEFAULTS['request_compression_threshold'], clean=int)
+        self._request_compression_types = tuple(request_compression_types) \
+            if request_compression_types is not None else \
+            get_env('REQUEST_COMPRESSION_TYPES',
+                    self.DEFAULTS['request_compression_types'], clean=_clean_tokens)
+        self._shared_client_pool = shared_client_pool \
+            if shared_client_pool is not None else \
+            get_env('SHARED_CLIENT_POOL', 'no', clean=bool_env)
 
     @property
     def is_anonymous(self) -> bool:
@@ -199,21 +419,40 @@ class APIConfig:
     @property
     def endpoint(self) -> URL:
         '''
-        The currently active endpoint URL.
-        This may change if there are multiple configured endpoints
-        and the current one is not accessible.
+        The endpoint URL used by the last request, or the primary one if no
+        request has been made yet.
+        The endpoint of each request is chosen by :attr:`endpoint_selector`
+        depending on the observed latency and health, so this may change if
+        there are multiple configured endpoints.
         '''
-        return self._endpoints[0]
+        return self._endpoint_selector.current
 
     @property
     def endpoints(self) -> Sequence[URL]:
         '''All configured endpoint URLs.'''
         return self._endpoints
 
+    @property
+    def unix_socket_path(self) -> Optional[str]:
+        '''
+        The unix domain socket path to connect to the API server,
+        or ``None`` if the endpoints are HTTP/HTTPS URLs.
+        '''
+        return self._unix_socket_path
+
+    @property
+    def endpoint_selector(self) -> EndpointSelector:
+        '''
+        The :class:`~ai.backend.client.endpoint.EndpointSelector` instance which
+        chooses the endpoint for each API request.
+        '''
+        return self._endpoint_selector
+
     def rotate_endpoints(self):
         if len(self._endpoints) > 1:
             item = self._endpoints.pop(0)
             self._endpoints.append(item)
+        self._endpoint_selector.rotate()
 
     @property
     def endpoint_type(self) -> str:
@@ -277,6 +516,118 @@ class APIConfig:
         '''The maximum allowed waiting time for the first byte of the response from the server.'''
         return self._read_timeout
 
+    @property
+    def connection_pool_size(self) -> int:
+        '''The maximum number of simultaneous connections in the connection pool.'''
+        return self._connection_pool_size
+
+    @property
+    def connection_pool_size_per_host(self) -> int:
+        '''The maximum number of simultaneous connections to a single endpoint host.'''
+        return self._connection_pool_size_per_host
+
+    @property
+    def keepalive_timeout(self) -> float:
+        '''The number of seconds to keep idle connections alive for reuse.'''
+        return self._keepalive_timeout
+
+    @property
+    def dns_cache_ttl(self) -> Optional[int]:
+        '''The number of seconds to cache resolved DNS records.'''
+        return self._dns_cache_ttl
+
+    @property
+    def force_close(self) -> bool:
+        '''Whether to close the connections after every request.'''
+        return self._force_close
+
+    @property
+    def response_cache(self) -> bool:
+        '''Whether to use the process-wide response cache by default.'''
+        return self._response_cache
+
+    @property
+    def api_version_cache_ttl(self) -> float:
+        '''The number of seconds to reuse the cached server API version.'''
+        return self._api_version_cache_ttl
+
+    @property
+    def rate_limit_read(self) -> float:
+        '''The maximum number of read-only requests per second.'''
+        return self._rate_limit_read
+
+    @property
+    def rate_limit_mutate(self) -> float:
+        '''The maximum number of mutating requests per second.'''
+        return self._rate_limit_mutate
+
+    @property
+    def rate_limit_create(self) -> float:
+        '''The maximum number of compute session creation requests per second.'''
+        return self._rate_limit_create
+
+    @property
+    def rate_limit_burst(self) -> Optional[float]:
+        '''The maximum number of requests in a burst.'''
+        return self._rate_limit_burst
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        '''
+        The :class:`~ai.backend.client.ratelimit.RateLimiter` instance shared by
+        the sessions using this configuration, or ``None`` if no rate limit is set.
+        '''
+        return self._rate_limiter
+
+    @property
+    def circuit_breaker_threshold(self) -> int:
+        '''The number of consecutive failures to open a circuit breaker.'''
+        return self._circuit_breaker_threshold
+
+    @property
+    def circuit_breaker_error_rate(self) -> float:
+        '''The failure ratio of the recent requests to open a circuit breaker.'''
+        return self._circuit_breaker_error_rate
+
+    @property
+    def circuit_breaker_cooldown(self) -> float:
+        '''The number of seconds to keep a circuit breaker open.'''
+        return self._circuit_breaker_cooldown
+
+    @property
+    def circuit_breaker_path_depth(self) -> int:
+        '''The number of leading API path segments to separate circuit breakers.'''
+        return self._circuit_breaker_path_depth
+
+    @property
+    def circuit_breakers(self) -> Optional[CircuitBreakerRegistry]:
+        '''
+        The :class:`~ai.backend.client.breaker.CircuitBreakerRegistry` instance
+        shared by the sessions using this configuration, or ``None`` if the
+        circuit breakers are disabled.
+        '''
+        return self._circuit_breakers
+
+    @property
+    def request_compression(self) -> Optional[str]:
+        '''The content encoding to compress the request bodies.'''
+        return self._request_compression
+
+    @property
+    def request_compression_threshold(self) -> int:
+        '''The minimum request body size to compress.'''
+        return self._request_compression_threshold
+
+    @property
+    def request_compression_types(self) -> Tuple[str, ...]:
+        '''The content types of the request bodies to compress.'''
+        return self._request_compression_types
+
+    @property
+    def shared_client_pool(self) -> bool:
+        '''Whether to use the process-wide client pool by default.'''
+        return self._shared_client_pool
+
 
 def get_config():
     '''
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import time
+from typing import Optional
+
+import aiohttp
+from yarl import URL
+
+log = logging.getLogger('ai.backend.client.cookie')
+
+__all__ = (
+    'PersistentCookieJar',
+)
+
+
+class PersistentCookieJar(aiohttp.CookieJar):
+    '''
+    A cookie jar which is kept in sync with a cookie file shared by multiple
+    client processes, used for the "session" endpoint type.
+
+    The file is loaded when it is changed by others (e.g., ``backend.ai login``)
+    by checking its modification time at most once per *check_interval* seconds,
+    and the cookies updated by the server are written back asynchronously
+    in the default executor.  To avoid recreating a cookie file removed by
+    ``backend.ai logout``, it only overwrites an existing file.
+
+    It must be created and used in the event loop of the owning session.
+
+    :param path: The path of the cookie file.
+    :param check_interval: The minimum interval in seconds to check the file
+        modification time.
+    '''
+
+    def __init__(self, path: Path, *,
+                 check_interval: float = 1.0, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._path = path
+        self._check_interval = check_interval
+        self._next_check = 0.0
+        self._mtime: Optional[float] = None
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        self._owner_loop = asyncio.get_event_loop()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _get_mtime(self) -> Optional[float]:
+        try:
+            return self._path.stat().st_mtime
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        '''
+        Loads the cookie file if it is modified since the last load or save.
+        Returns ``True`` if the cookies are reloaded.
+        '''
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self._check_interval
+        mtime = self._get_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        try:
+            super().load(self._path)
+        except (IOError, PermissionError, pickle.UnpicklingError, EOFError):
+            return False
+        self._mtime = mtime
+        return True
+
+    def load(self, file_path) -> None:
+        super().load(file_path)
+        if Path(file_path) == self._path:
+            self._mtime = self._get_mtime()
+
+    def save(self, file_path) -> None:
+        super().save(file_path)
+        if Path(file_path) == self._path:
+            self._mtime = self._get_mtime()
+
+    def update_cookies(self, cookies, response_url: URL = URL()) -> None:
+        super().update_cookies(cookies, response_url)
+        if not cookies:
+            return
+        self._dirty = True
+        # The CLI may update cookies out of the event loop thread.
+        self._owner_loop.call_soon_threadsafe(self._schedule_save)
+
+    def _schedule_save(self) -> None:
+        if self._save_task is None or self._save_task.done():
+            self._save_task = self._owner_loop.create_task(self._save_dirty())
+
+    async def _save_dirty(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            # Take the snapshot in the event loop thread where the cookies
+            # are updated, in the same format with aiohttp's CookieJar.save().
+            data = pickle.dumps(self._cookies, pickle.HIGHEST_PROTOCOL)
+            loop = asyncio.get_event_loop()
+            mtime = await loop.run_in_executor(None, self._write, data)
+            if mtime is not None:
+                self._mtime = mtime
+
+    def _write(self, data: bytes) -> Optional[float]:
+        if not self._path.exists():
+            return None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=str(self._path.parent), suffix='.tmp')
+        except OSError:
+            log.debug('failed to write the cookie file: %s', self._path)
+            return None
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, str(self._path))
+            return self._get_mtime()
+        except OSError:
+            log.debug('failed to write the cookie file: %s', self._path)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return None
+
+    async def flush(self) -> None:
+        '''
+        Waits until the pending write-back of the cookie file finishes.
+        '''
+        # Let the scheduled _schedule_save() calls run first.
+        await asyncio.sleep(0)
+        if self._save_task is not None:
+            await self._save_task
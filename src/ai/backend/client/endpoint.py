@@ -0,0 +1,201 @@
+from collections import deque
+import random
+import threading
+import time
+from typing import (
+    Container, Iterable, List, Optional,
+)
+
+from yarl import URL
+
+__all__ = (
+    'EndpointStats',
+    'EndpointSelector',
+)
+
+
+class EndpointStats:
+    '''
+    Keeps the health and latency statistics of a single API endpoint.
+    '''
+
+    __slots__ = (
+        'endpoint', 'latency', 'error_rate',
+        'consecutive_failures', 'ejected_until', 'sampled_at',
+    )
+
+    def __init__(self, endpoint: URL) -> None:
+        self.endpoint = endpoint
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        # The last time when the endpoint was reported or chosen to probe.
+        self.sampled_at = float('-inf')
+
+    @property
+    def score(self) -> float:
+        '''
+        The expected latency to get a successful response from this endpoint.
+        Lower is better.  Endpoints which have only failed so far get the
+        infinite score until they are probed again.
+        '''
+        if self.latency is None:
+            return 0.0 if self.error_rate == 0 else float('inf')
+        return self.latency / (1.0 - min(self.error_rate, 0.99))
+
+    def is_live(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class EndpointSelector:
+    '''
+    Chooses a live endpoint for each API request based on the EWMA
+    (exponentially weighted moving average) of the response latency and the
+    error rate observed so far.
+
+    It picks two random live endpoints and uses the better one ("power of two
+    choices"), so that the traffic is spread across the endpoints with similar
+    statistics while the worst one is avoided.  The endpoints without samples
+    for *probe_interval* seconds, including the new ones and the ones recovered
+    from ejection, are probed with the next request so that their statistics
+    do not get stale.
+
+    An endpoint is ejected for *cooldown* seconds after *failure_threshold*
+    consecutive failures.  When the cooldown expires, it is given another
+    chance and a single failure ejects it again until it succeeds.
+    If all endpoints are ejected, the one to recover earliest is chosen.
+
+    The selector is shared by all sessions using the same
+    :class:`~ai.backend.client.config.APIConfig` and is safe to use across
+    multiple threads.
+
+    :param endpoints: The list of endpoint URLs.  Its order is used to break ties.
+    :param ewma_alpha: The smoothing factor of the moving averages.
+    :param failure_threshold: The number of consecutive failures to eject an endpoint.
+    :param cooldown: The number of seconds to exclude an ejected endpoint.
+    :param probe_interval: The number of seconds to probe an endpoint again
+        after its last sample.
+    '''
+
+    def __init__(self, endpoints: Iterable[URL], *,
+                 ewma_alpha: float = 0.3,
+                 failure_threshold: int = 3,
+                 cooldown: float = 30.0,
+                 probe_interval: float = 10.0) -> None:
+        self._stats = [EndpointStats(e) for e in endpoints]
+        assert len(self._stats) > 0, 'There must be at least one endpoint.'
+        self._ewma_alpha = ewma_alpha
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._probe_interval = probe_interval
+        self._recent_latencies = deque(maxlen=256)
+        self._last_selected: Optional[URL] = None
+        self._lock = threading.Lock()
+
+    @property
+    def endpoints(self) -> List[URL]:
+        return [s.endpoint for s in self._stats]
+
+    @property
+    def current(self) -> URL:
+        '''
+        The endpoint chosen by the last :meth:`select` call, or the first one
+        in the tie-breaking order if nothing is selected yet.
+        Reading it does not affect the statistics.
+        '''
+        last_selected = self._last_selected
+        if last_selected is not None:
+            return last_selected
+        return self._stats[0].endpoint
+
+    def get_stats(self, endpoint: URL) -> EndpointStats:
+        for s in self._stats:
+            if s.endpoint == endpoint:
+                return s
+        raise KeyError(endpoint)
+
+    def select(self, exclude: Container[URL] = ()) -> URL:
+        '''
+        Returns a live endpoint to send a request.
+
+        :param exclude: The endpoints to avoid if there are other choices,
+            such as the ones already tried for the current request.
+        '''
+        with self._lock:
+            endpoint = self._select(exclude, time.monotonic())
+            self._last_selected = endpoint
+            return endpoint
+
+    def _select(self, exclude: Container[URL], now: float) -> URL:
+        candidates = [s for s in self._stats if s.endpoint not in exclude]
+        if not candidates:
+            candidates = self._stats
+        live = [s for s in candidates if s.is_live(now)]
+        if not live:
+            return min(candidates, key=lambda s: s.ejected_until).endpoint
+        for s in live:
+            if now - s.sampled_at >= self._probe_interval:
+                # Let only this request probe it until the result is reported.
+                s.sampled_at = now
+                return s.endpoint
+        if len(live) == 1:
+            return live[0].endpoint
+        # Keep the tie-breaking order in the sampled pair.
+        a, b = sorted(random.sample(range(len(live)), 2))
+        if live[b].score < live[a].score:
+            return live[b].endpoint
+        return live[a].endpoint
+
+    def report_success(self, endpoint: URL, latency: float) -> None:
+        '''
+        Records a successful response from the endpoint with its latency in seconds.
+        '''
+        alpha = self._ewma_alpha
+        with self._lock:
+            s = self.get_stats(endpoint)
+            if s.latency is None:
+                s.latency = latency
+            else:
+                s.latency = alpha * latency + (1 - alpha) * s.latency
+            s.error_rate = (1 - alpha) * s.error_rate
+            s.consecutive_failures = 0
+            s.ejected_until = 0.0
+            s.sampled_at = time.monotonic()
+            self._recent_latencies.append(latency)
+
+    def get_latency_percentile(self, percentile: float,
+                               min_samples: int = 16) -> Optional[float]:
+        '''
+        Returns the given percentile (0 to 100) of the recently observed latencies
+        across all endpoints, or ``None`` if there are not enough samples yet.
+        '''
+        with self._lock:
+            samples = sorted(self._recent_latencies)
+        if len(samples) < max(1, min_samples):
+            return None
+        idx = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[idx]
+
+    def report_failure(self, endpoint: URL) -> None:
+        '''
+        Records a failed request to the endpoint and ejects it if necessary.
+        '''
+        alpha = self._ewma_alpha
+        with self._lock:
+            s = self.get_stats(endpoint)
+            s.error_rate = alpha + (1 - alpha) * s.error_rate
+            s.consecutive_failures += 1
+            s.sampled_at = time.monotonic()
+            # A non-zero ejected_until means that the endpoint has been ejected
+            # before and has not succeeded since then.
+            if s.consecutive_failures >= self._failure_threshold or s.ejected_until > 0:
+                s.ejected_until = time.monotonic() + self._cooldown
+
+    def rotate(self) -> None:
+        '''
+        Moves the first endpoint to the end of the tie-breaking order.
+        '''
+        with self._lock:
+            if len(self._stats) > 1:
+                self._stats.append(self._stats.pop(0))
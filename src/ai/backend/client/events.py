@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+import aiohttp
+
+from .compat import current_loop
+from .exceptions import BackendAPIError, BackendClientError
+
+__all__ = (
+    'SessionEventHub',
+    'EventSubscription',
+    'STREAM_RECONNECTED',
+)
+
+log = logging.getLogger('ai.backend.client.events')
+
+#: The name of the synthetic event put into the subscriptions after the
+#: underlying event stream is reconnected, as the events fired while
+#: reconnecting are lost.
+STREAM_RECONNECTED = 'stream_reconnected'
+
+# The API version to watch the events of all sessions with a single stream.
+MULTIPLEXED_API_VERSION = (5, '20191215')
+
+_ALL_SESSIONS = '*'
+_RECONNECT_DELAY = 0.5
+
+
+class _FallbackRequired(Exception):
+    pass
+
+
+class _EventStream:
+
+    __slots__ = ('key', 'task', 'ready', 'refcount')
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.ready = current_loop().create_future()
+        self.refcount = 0
+
+
+class EventSubscription:
+    '''
+    Receives the lifecycle events of a compute session from
+    :class:`SessionEventHub`.  Each event is a dict with the ``event`` and
+    ``data`` keys like the ones from
+    :meth:`SSEResponse.fetch_events() <ai.backend.client.request.SSEResponse.fetch_events>`.
+
+    Iterate it with ``async for`` to receive the events until it is closed.
+    Use it as an async context manager to close it on exit.
+    '''
+
+    __slots__ = ('session_name', '_hub', '_stream', '_queue', '_closed')
+
+    def __init__(self, hub: 'SessionEventHub', session_name: str,
+                 queue_size: int) -> None:
+        self.session_name = session_name
+        self._hub = hub
+        self._stream: Optional[_EventStream] = None
+        self._queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _put(self, event: Optional[Mapping[str, Any]]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            if event is not None:
+                log.warning('dropped an old event of %s due to the full queue',
+                            self.session_name)
+        self._queue.put_nowait(event)
+
+    def _end(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._put(None)
+
+    async def get(self) -> Optional[Mapping[str, Any]]:
+        '''
+        Returns the next event, or ``None`` if the subscription is closed.
+        '''
+        if self._closed and self._queue.empty():
+            return None
+        return await self._queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Mapping[str, Any]:
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+    async def __aenter__(self) -> 'EventSubscription':
+        return self
+
+    async def __aexit__(self, exc_type, exc_obj, exc_tb):
+        self.close()
+        return False
+
+
+class SessionEventHub:
+    '''
+    Watches the lifecycle events of many compute sessions with as few event
+    streams as possible and dispatches them to the per-session subscriptions.
+
+    On the servers supporting it, the hub opens a single event stream for all
+    sessions of the access key and distributes the events by their session names.
+    On older servers or when the server rejects it, the hub falls back to a
+    separate stream per subscribed session, which is shared by the subscriptions
+    of the same session.  The streams are opened on demand, closed when there
+    are no more subscriptions, and reconnected when they are closed by the
+    server or the network.
+
+    It works only with :class:`~ai.backend.client.session.AsyncSession`.
+
+    .. code-block:: python3
+
+       async with AsyncSession() as api_session:
+           async with SessionEventHub(api_session) as hub:
+               async with await hub.subscribe('mysession') as subscription:
+                   async for ev in subscription:
+                       print(ev['event'], json.loads(ev['data']))
+
+    :param api_session: The client session to make the API requests.
+    :param owner_access_key: The access key owning the watched sessions.
+        (Only available to administrators)
+    :param multiplexed: Whether to watch all sessions with a single stream.
+        ``None`` decides it by the server's API version.
+    :param queue_size: The maximum number of pending events of each
+        subscription.  When it is full, the oldest event is dropped.
+        Zero means no limit.
+    '''
+
+    __slots__ = (
+        'owner_access_key', 'queue_size',
+        '_api_session', '_multiplexed', '_streams', '_subscriptions', '_closed',
+    )
+
+    def __init__(self, api_session, *,
+                 owner_access_key: str = None,
+                 multiplexed: bool = None,
+                 queue_size: int = 0) -> None:
+        assert not hasattr(api_session, 'worker_thread'), \
+               'SessionEventHub works only with AsyncSession.'
+        self.owner_access_key = owner_access_key
+        self.queue_size = queue_size
+        self._api_session = api_session
+        self._multiplexed = multiplexed
+        self._streams: Dict[str, _EventStream] = {}
+        self._subscriptions: Dict[str, Set[EventSubscription]] = {}
+        self._closed = False
+
+    async def __aenter__(self) -> 'SessionEventHub':
+        return self
+
+    async def __aexit__(self, exc_type, exc_obj, exc_tb):
+        await self.close()
+        return False
+
+    @property
+    def multiplexed(self) -> bool:
+        '''
+        Whether the hub watches all sessions with a single stream.
+        '''
+        if self._multiplexed is None:
+            return self._api_session.api_version >= MULTIPLEXED_API_VERSION
+        return self._multiplexed
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def get_stats(self) -> Mapping[str, int]:
+        '''
+        Returns the numbers of the open streams, the watched sessions,
+        and the subscriptions.
+        '''
+        return {
+            'streams': len(self._streams),
+            'sessions': len(self._subscriptions),
+            'subscriptions': sum(len(s) for s in self._subscriptions.values()),
+        }
+
+    async def subscribe(self, session_name: str) -> EventSubscription:
+        '''
+        Starts receiving the events of the given compute session.
+        It returns after the underlying event stream is connected, so the
+        events fired before it are not delivered.  Check the session status
+        after subscribing if needed.
+
+        :param session_name: The session name or ID.
+        :raises BackendError: if the event stream cannot be connected.
+        '''
+        assert not self._closed, 'The event hub is already closed.'
+        subscription = EventSubscription(self, session_name, self.queue_size)
+        self._subscriptions.setdefault(session_name, set()).add(subscription)
+        while True:
+            key = _ALL_SESSIONS if self.multiplexed else session_name
+            stream = self._acquire_stream(key)
+            subscription._stream = stream
+            try:
+                await asyncio.shield(stream.ready)
+            except _FallbackRequired:
+                self._release_stream(stream)
+                continue
+            except BaseException:
+                self.unsubscribe(subscription)
+                raise
+            return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        '''
+        Stops receiving the events for the given subscription.
+        '''
+        subscriptions = self._subscriptions.get(subscription.session_name)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.session_name]
+        if subscription._stream is not None:
+            self._release_stream(subscription._stream)
+            subscription._stream = None
+        subscription._end()
+
+    async def close(self) -> None:
+        '''
+        Closes all event streams and subscriptions.
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        for subscriptions in [*self._subscriptions.values()]:
+            for subscription in [*subscriptions]:
+                self.unsubscribe(subscription)
+        tasks = [s.task for s in self._streams.values() if s.task is not None]
+        for task in tasks:
+            task.cancel()
+        self._streams.clear()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _acquire_stream(self, key: str) -> _EventStream:
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = _EventStream(key)
+            stream.task = current_loop().create_task(self._run_stream(stream))
+            self._streams[key] = stream
+        stream.refcount += 1
+        return stream
+
+    def _release_stream(self, stream: _EventStream) -> None:
+        stream.refcount -= 1
+        if stream.refcount > 0:
+            return
+        if self._streams.get(stream.key) is stream:
+            del self._streams[stream.key]
+        if stream.task is not None:
+            stream.task.cancel()
+        if not stream.ready.done():
+            stream.ready.cancel()
+
+    def _dispatch(self, stream: _EventStream, event: Mapping[str, Any]) -> None:
+        if stream.key != _ALL_SESSIONS:
+            targets = self._subscriptions.get(stream.key, ())
+        else:
+            try:
+                data = json.loads(event['data'])
+                names = {data.get('sessionName'), data.get('sessionId')}
+            except (ValueError, AttributeError):
+                return
+            targets = [s for name in names if name is not None
+                       for s in self._subscriptions.get(name, ())]
+        for subscription in [*targets]:
+            subscription._put(event)
+
+    def _get_stream_subscriptions(self, stream: _EventStream) -> List[EventSubscription]:
+        return [
+            subscription
+            for subscriptions in self._subscriptions.values()
+            for subscription in subscriptions
+            if subscription._stream is stream
+        ]
+
+    async def _run_stream(self, stream: _EventStream) -> None:
+        compute_session = self._api_session.ComputeSession(
+            stream.key, self.owner_access_key)
+        while True:
+            try:
+                async with compute_session.stream_events() as sse_response:
+                    if stream.ready.done():
+                        for subscription in self._get_stream_subscriptions(stream):
+                            subscription._put({'event': STREAM_RECONNECTED, 'data': ''})
+                    else:
+                        stream.ready.set_result(None)
+                    async for event in sse_response.fetch_events():
+                        self._dispatch(stream, event)
+            except asyncio.CancelledError:
+                raise
+            except BackendAPIError as e:
+                if stream.ready.done():
+                    log.warning('the event stream of %s is rejected: %r', stream.key, e)
+                    # Close the subscriptions which cannot receive the events anymore.
+                    for subscription in self._get_stream_subscriptions(stream):
+                        self.unsubscribe(subscription)
+                elif stream.key == _ALL_SESSIONS and e.status // 100 == 4:
+                    log.info('falling back to the per-session event streams: %r', e)
+                    self._multiplexed = False
+                    stream.ready.set_exception(_FallbackRequired())
+                else:
+                    stream.ready.set_exception(e)
+                return
+            except (BackendClientError, aiohttp.ClientError) as e:
+                if not stream.ready.done():
+                    stream.ready.set_exception(e)
+                    return
+                log.warning('the event stream of %s is disconnected: %r', stream.key, e)
+            # The stream has been closed.  Reconnect to it.
+            await asyncio.sleep(_RECONNECT_DELAY)
@@ -5,6 +5,7 @@ __all__ = (
     'BackendError',
     'BackendAPIError',
     'BackendClientError',
+    'CircuitOpenError',
     'APIVersionWarning',
 )
 
@@ -53,6 +54,26 @@ class BackendClientError(BackendError):
     pass
 
 
+class CircuitOpenError(BackendClientError):
+    """
+    Raised without sending the request when the circuit breaker of the API
+    endpoint (or its path prefix) is open due to its recent failures.
+    """
+
+    def __init__(self, msg: str, scope: str, retry_after: float):
+        super().__init__(msg, scope, retry_after)
+
+    @property
+    def scope(self) -> str:
+        """The endpoint URL and path prefix of the open circuit."""
+        return self.args[1]
+
+    @property
+    def retry_after(self) -> float:
+        """The number of seconds until the circuit accepts probe requests."""
+        return self.args[2]
+
+
 class APIVersionWarning(UserWarning):
     """
     The warning generated if the server's API version is higher.
@@ -1,4 +1,8 @@
+import asyncio
 import functools
+import weakref
+
+from ..metrics import run_as_function
 
 __all__ = (
     'APIFunctionMeta',
@@ -7,22 +11,51 @@ __all__ = (
 )
 
 
-def _wrap_method(cls, orig_name, meth):
+class _APIMethod:
+    '''
+    A descriptor which converts the accessed API function method into
+    a plain Python function or a coroutine function depending on the session
+    of the class (or its subclass) it is accessed through.
+    This allows subclasses to rebind the session without rewrapping methods.
+    '''
+
+    def __init__(self, orig_name, meth):
+        self._orig_name = orig_name
+        # The wrappers accessed through the classes, which are reused so that
+        # the hot path of API calls does not rebuild them.
+        self._class_wrappers = weakref.WeakKeyDictionary()
+        functools.update_wrapper(self, meth)
 
-    @functools.wraps(meth)
-    def _method(*args, **kwargs):
-        assert cls.session is not None, \
-               'You must use API wrapper functions via a Session object.'
+    def __get__(self, instance, owner):
+        if instance is None:
+            try:
+                return self._class_wrappers[owner]
+            except KeyError:
+                wrapper = self._wrap(getattr(owner, self._orig_name), owner)
+                self._class_wrappers[owner] = wrapper
+                return wrapper
         # We need to keep the original attributes so that they could be correctly
         # bound to the class/instance at runtime.
-        func = getattr(cls, orig_name)
-        coro = func(*args, **kwargs)
-        if hasattr(cls.session, 'worker_thread'):
-            return cls.session.worker_thread.execute(coro)
-        else:
-            return coro
+        return self._wrap(getattr(instance, self._orig_name), owner)
+
+    def _wrap(self, func, owner):
+        name = f'{owner.__name__}.{self.__name__}'
+
+        @functools.wraps(func)
+        def _method(*args, **kwargs):
+            session = owner.session
+            assert session is not None, \
+                   'You must use API wrapper functions via a Session object.'
+            coro = func(*args, **kwargs)
+            if asyncio.iscoroutine(coro):
+                # Label the requests made inside for the session metrics.
+                coro = run_as_function(name, coro)
+            if hasattr(session, 'worker_thread'):
+                return session.worker_thread.execute(coro)
+            else:
+                return coro
 
-    return _method
+        return _method
 
 
 def api_function(meth):
@@ -49,8 +82,7 @@ class APIFunctionMeta(type):
             if hasattr(attr_value, '_backend_api'):
                 orig_name = '_orig_' + attr_name
                 setattr(cls, orig_name, attr_value)
-                wrapped = _wrap_method(cls, orig_name, attr_value)
-                setattr(cls, attr_name, wrapped)
+                setattr(cls, attr_name, _APIMethod(orig_name, attr_value))
 
 
 class BaseFunction(metaclass=APIFunctionMeta):
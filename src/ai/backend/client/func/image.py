@@ -47,7 +47,7 @@ class Image:
             'query': q,
             'variables': variables,
         })
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(cache_name='Image.list') as resp:
             data = await resp.json()
             return data['images']
 
@@ -69,7 +69,9 @@ class Image:
         })
         async with rqst.fetch() as resp:
             data = await resp.json()
-            return data['rescan_images']
+        if cls.session.response_cache is not None:
+            await cls.session.response_cache.invalidate('Image.list')
+        return data['rescan_images']
 
     @api_function
     @classmethod
@@ -90,7 +92,9 @@ class Image:
         })
         async with rqst.fetch() as resp:
             data = await resp.json()
-            return data['alias_image']
+        if cls.session.response_cache is not None:
+            await cls.session.response_cache.invalidate('Image.list')
+        return data['alias_image']
 
     @api_function
     @classmethod
@@ -110,7 +114,9 @@ class Image:
         })
         async with rqst.fetch() as resp:
             data = await resp.json()
-            return data['dealias_image']
+        if cls.session.response_cache is not None:
+            await cls.session.response_cache.invalidate('Image.list')
+        return data['dealias_image']
 
     @api_function
     @classmethod
@@ -46,7 +46,7 @@ class Resource:
         Lists all registered docker registries.
         '''
         rqst = Request(cls.session, 'GET', '/config/docker-registries')
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(cache_name='Resource.get_docker_registries') as resp:
             return await resp.json()
 
     @api_function
@@ -93,14 +93,14 @@ class Resource:
         Get supported resource slots of Backend.AI server.
         '''
         rqst = Request(cls.session, 'GET', '/config/resource-slots')
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(cache_name='Resource.get_resource_slots') as resp:
             return await resp.json()
 
     @api_function
     @classmethod
     async def get_vfolder_types(cls):
         rqst = Request(cls.session, 'GET', '/config/vfolder-types')
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(cache_name='Resource.get_vfolder_types') as resp:
             return await resp.json()
 
     @api_function
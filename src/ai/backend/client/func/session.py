@@ -1,10 +1,13 @@
+import asyncio
 import json
+import math
 import os
 import secrets
 import tarfile
 import tempfile
+import time
 from typing import (
-    Iterable, Union,
+    Any, Awaitable, Callable, Generic, Iterable, List, Optional, Tuple, TypeVar, Union,
     AsyncGenerator,
     Mapping,
     Sequence,
@@ -18,20 +21,37 @@ from tqdm import tqdm
 from .base import api_function
 from ..compat import current_loop
 from ..config import DEFAULT_CHUNK_SIZE
+from ..events import SessionEventHub, STREAM_RECONNECTED
 from ..exceptions import BackendClientError
 from ..request import (
     Request, AttachedFile,
     WebSocketResponse,
     SSEResponse,
 )
+from ..session import AsyncSession
 from ..utils import undefined, ProgressReportingReader
 from ..versioning import get_naming
 
 __all__ = (
     'ComputeSession',
+    'SessionCreationResult',
+    'SessionCreationSummary',
+    'SessionDestructionResult',
+    'SessionDestructionSummary',
 )
 
 
+# The lifecycle events which end waiting for a session startup.
+_STARTED_EVENTS = frozenset(['session_started', 'kernel_started'])
+_FAILED_EVENTS = frozenset([
+    'session_cancelled', 'kernel_cancelled',
+    'session_terminated', 'kernel_terminated',
+    'session_failure',
+])
+_FAILED_STATUSES = frozenset(['TERMINATING', 'TERMINATED', 'CANCELLED', 'ERROR'])
+_EVENT_RECONNECT_DELAY = 0.5
+
+
 def drop(d, dropval):
     newd = {}
     for k, v in d.items():
@@ -42,6 +62,202 @@ def drop(d, dropval):
     return newd
 
 
+class _BulkResult:
+
+    __slots__ = ('index', 'error', 'latency')
+
+    def __init__(self, index: int, error: Optional[Exception], latency: float) -> None:
+        self.index = index
+        self.error = error
+        self.latency = latency
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class SessionCreationResult(_BulkResult):
+    '''
+    The result of a compute session creation made by
+    :meth:`ComputeSession.create_many`.
+
+    :param index: The index of the creation spec.
+    :param spec: The creation spec.
+    :param session: The created :class:`ComputeSession` instance or ``None`` if failed.
+    :param error: The raised exception or ``None`` if succeeded.
+    :param latency: The number of seconds taken to create the session.
+    '''
+
+    __slots__ = ('spec', 'session')
+
+    def __init__(self, index: int, spec: Mapping[str, Any],
+                 session: Optional['ComputeSession'],
+                 error: Optional[Exception],
+                 latency: float) -> None:
+        super().__init__(index, error, latency)
+        self.spec = spec
+        self.session = session
+
+    def __repr__(self) -> str:
+        if self.session is not None:
+            outcome = f'session={self.session.name!r}'
+        else:
+            outcome = f'error={self.error!r}'
+        return (f'<SessionCreationResult index={self.index} {outcome} '
+                f'latency={self.latency:.3f}>')
+
+
+class SessionDestructionResult(_BulkResult):
+    '''
+    The result of a compute session destruction made by
+    :meth:`ComputeSession.destroy_many`.
+
+    :param index: The index of the session name.
+    :param name: The session name.
+    :param response: The response body of the destruction or ``None`` if
+        failed or not available.
+    :param error: The raised exception or ``None`` if succeeded.
+    :param latency: The number of seconds taken to destroy the session.
+    '''
+
+    __slots__ = ('name', 'response')
+
+    def __init__(self, index: int, name: str,
+                 response: Optional[Mapping[str, Any]],
+                 error: Optional[Exception],
+                 latency: float) -> None:
+        super().__init__(index, error, latency)
+        self.name = name
+        self.response = response
+
+    @property
+    def stats(self) -> Optional[Mapping[str, Any]]:
+        '''The last resource usage statistics of the destroyed session, if available.'''
+        if self.response is None:
+            return None
+        return self.response.get('stats')
+
+    def __repr__(self) -> str:
+        outcome = 'ok' if self.ok else f'error={self.error!r}'
+        return (f'<SessionDestructionResult index={self.index} name={self.name!r} '
+                f'{outcome} latency={self.latency:.3f}>')
+
+
+_TResult = TypeVar('_TResult', bound=_BulkResult)
+
+
+class _BulkSummary(Generic[_TResult]):
+
+    __slots__ = ('results', 'elapsed')
+
+    def __init__(self, results: Sequence[_TResult], elapsed: float) -> None:
+        self.results = results
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self) -> List[_TResult]:
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self) -> List[_TResult]:
+        return [r for r in self.results if not r.ok]
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        '''
+        Returns the *q*-th percentile (0 to 100) of the latencies
+        using the nearest-rank method, or ``None`` if there are no results.
+        '''
+        latencies = sorted(r.latency for r in self.results)
+        if not latencies:
+            return None
+        rank = max(1, math.ceil(q / 100 * len(latencies)))
+        return latencies[min(rank, len(latencies)) - 1]
+
+    def to_json(self) -> Mapping[str, Any]:
+        latencies = [r.latency for r in self.results]
+        return {
+            'total': len(self.results),
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'elapsed': self.elapsed,
+            'latency': {
+                'min': min(latencies) if latencies else None,
+                'mean': sum(latencies) / len(latencies) if latencies else None,
+                'p50': self.latency_percentile(50),
+                'p95': self.latency_percentile(95),
+                'max': max(latencies) if latencies else None,
+            },
+            'errors': {r.index: repr(r.error) for r in self.failed},
+        }
+
+
+class SessionCreationSummary(_BulkSummary[SessionCreationResult]):
+    '''
+    The summary of compute session creations made by
+    :meth:`ComputeSession.create_many`.
+
+    :param results: All :class:`SessionCreationResult` instances in the order of
+        the given specs.
+    :param elapsed: The number of seconds taken to finish all creations.
+    '''
+
+    __slots__ = ()
+
+    @property
+    def sessions(self) -> List['ComputeSession']:
+        '''The successfully created sessions in the order of the given specs.'''
+        return [r.session for r in self.results if r.session is not None]
+
+
+class SessionDestructionSummary(_BulkSummary[SessionDestructionResult]):
+    '''
+    The summary of compute session destructions made by
+    :meth:`ComputeSession.destroy_many`.
+
+    :param results: All :class:`SessionDestructionResult` instances in the order
+        of the given session names.
+    :param elapsed: The number of seconds taken to finish all destructions.
+    '''
+
+    __slots__ = ()
+
+    @property
+    def stats(self) -> List[Mapping[str, Any]]:
+        '''The available statistics of the destroyed sessions.'''
+        return [r.stats for r in self.results if r.stats]
+
+
+async def _run_bulk(items: Iterable[Any],
+                    run: Callable[[int, Any], Awaitable[_TResult]], *,
+                    concurrency: int,
+                    on_result: Callable[[_TResult], Any] = None,
+                    ) -> Tuple[List[_TResult], float]:
+    # All workers share the same iterator of the items,
+    # so that the items are consumed lazily as the preceding ones finish.
+    indexed_items = enumerate(items)
+    results: List[_TResult] = []
+
+    async def _worker() -> None:
+        for index, item in indexed_items:
+            result = await run(index, item)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    begin = time.monotonic()
+    loop = current_loop()
+    workers = [loop.create_task(_worker()) for _ in range(max(1, concurrency))]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    results.sort(key=lambda r: r.index)
+    return results, time.monotonic() - begin
+
+
 class ComputeSession:
     '''
     Provides various interactions with compute sessions in Backend.AI.
@@ -77,7 +293,7 @@ class ComputeSession:
         rqst = Request(cls.session, 'GET', f'/{prefix}/_/logs', params={
             'taskId': task_id,
         })
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(coalesce=False) as resp:
             while True:
                 chunk = await resp.raw_response.content.read(chunk_size)
                 if not chunk:
@@ -104,7 +320,9 @@ class ComputeSession:
                             bootstrap_script: str = None,
                             tag: str = None,
                             scaling_group: str = None,
-                            owner_access_key: str = None) -> 'ComputeSession':
+                            owner_access_key: str = None,
+                            wait_by_events: bool = False,
+                            event_hub: SessionEventHub = None) -> 'ComputeSession':
         '''
         Get-or-creates a compute session.
         If *name* is ``None``, it creates a new compute session as long as
@@ -156,16 +374,29 @@ class ComputeSession:
         :param tag: An optional string to annotate extra information.
         :param owner: An optional access key that owns the created session. (Only
             available to administrators)
+        :param wait_by_events: Enqueue the session and then wait for its startup
+            with :meth:`wait_until_running` instead of holding the creation
+            request until the session starts.  *max_wait* is applied on the
+            client side.  If *max_wait* is zero or negative, the creation
+            request waits for the startup in the server as usual.  It only works
+            with :class:`~ai.backend.client.session.AsyncSession`.
+        :param event_hub: The :class:`~ai.backend.client.events.SessionEventHub`
+            used by *wait_by_events*.
 
         :returns: The :class:`ComputeSession` instance.
         '''
+        if wait_by_events:
+            if not isinstance(cls.session, AsyncSession):
+                raise TypeError('wait_by_events is only supported with AsyncSession.')
+            # Without the client-side limit, the event wait could block forever.
+            wait_by_events = max_wait > 0
         if name:
             assert 4 <= len(name) <= 64, \
                    'Client session token should be 4 to 64 characters long.'
         else:
             name = f'pysdk-{secrets.token_hex(5)}'
-        if mounts is None:
-            mounts = []
+        # Copy the mounts to keep the caller's list intact when reusing the spec.
+        mounts = [] if mounts is None else [*mounts]
         if mount_map is None:
             mount_map = {}
         if resources is None:
@@ -206,17 +437,20 @@ class ComputeSession:
                 'domain': domain_name,
                 'group': group_name,
                 'type': type_,
-                'enqueueOnly': enqueue_only,
+                'enqueueOnly': enqueue_only or wait_by_events,
                 'maxWaitSeconds': max_wait,
                 'reuseIfExists': not no_reuse,
                 'startupCommand': startup_command,
             })
+        elif wait_by_events:
+            raise BackendClientError(
+                'The server does not support enqueueing compute sessions.')
         if cls.session.api_version > (4, '20181215'):
             params['image'] = image
         else:
             params['lang'] = image
         rqst.set_json(params)
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(rate_limit_category='create') as resp:
             data = await resp.json()
             o = cls(name, owner_access_key)  # type: ignore
             o.created = data.get('created', True)     # True is for legacy
@@ -224,7 +458,9 @@ class ComputeSession:
             o.service_ports = data.get('servicePorts', [])
             o.domain = domain_name
             o.group = group_name
-            return o
+        if wait_by_events and not enqueue_only and o.status != 'RUNNING':
+            await o._orig_wait_until_running(max_wait, event_hub=event_hub)
+        return o
 
     @api_function
     @classmethod
@@ -346,7 +582,7 @@ class ComputeSession:
         }
         params = drop(params, undefined)
         rqst.set_json(params)
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(rate_limit_category='create') as resp:
             data = await resp.json()
             o = cls(name, owner_access_key)
             o.created = data.get('created', True)     # True is for legacy
@@ -356,6 +592,105 @@ class ComputeSession:
             o.group = group_name
             return o
 
+    @api_function
+    @classmethod
+    async def create_many(cls, specs: Iterable[Mapping[str, Any]], *,
+                          concurrency: int = 10,
+                          timeout: float = None,
+                          on_result: Callable[[SessionCreationResult], Any] = None,
+                          ) -> SessionCreationSummary:
+        '''
+        Creates many compute sessions with a bounded number of concurrent
+        creation requests.
+
+        Each spec is a mapping of the keyword arguments to
+        :meth:`get_or_create`, or to :meth:`create_from_template` if it has
+        the ``template_id`` key.  The specs are consumed lazily as the
+        preceding creations finish.  A failed creation does not stop the others.
+
+        :param specs: The creation specs.
+        :param concurrency: The maximum number of concurrent creation requests.
+        :param timeout: The number of seconds to wait for each creation.
+            ``None`` means no limit.  Note that a timed-out session may still be
+            created by the server later.
+        :param on_result: A callback invoked with each :class:`SessionCreationResult`
+            as soon as the creation finishes, in the order of completion.
+            For synchronous sessions, it is invoked in the session's worker thread.
+
+        :returns: The :class:`SessionCreationSummary` of all creations.
+        '''
+        async def _create(index: int, spec: Mapping[str, Any]) -> SessionCreationResult:
+            begin = time.monotonic()
+            session = None
+            error = None
+            try:
+                if 'template_id' in spec:
+                    coro = cls._orig_create_from_template(**spec)
+                else:
+                    coro = cls._orig_get_or_create(**spec)
+                session = await asyncio.wait_for(coro, timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+            return SessionCreationResult(index, spec, session, error,
+                                         time.monotonic() - begin)
+
+        results, elapsed = await _run_bulk(specs, _create,
+                                           concurrency=concurrency,
+                                           on_result=on_result)
+        return SessionCreationSummary(results, elapsed)
+
+    @api_function
+    @classmethod
+    async def destroy_many(cls, names: Iterable[Union[str, 'ComputeSession']], *,
+                           owner_access_key: str = None,
+                           concurrency: int = 10,
+                           timeout: float = None,
+                           on_result: Callable[[SessionDestructionResult], Any] = None,
+                           ) -> SessionDestructionSummary:
+        '''
+        Destroys many compute sessions with a bounded number of concurrent
+        destruction requests.  A failed destruction does not stop the others.
+
+        :param names: The session names or IDs, or :class:`ComputeSession`
+            instances to destroy the sessions of different owners.
+        :param owner_access_key: The access key owning the sessions given as names.
+            (Only available to administrators)
+        :param concurrency: The maximum number of concurrent destruction requests.
+        :param timeout: The number of seconds to wait for each destruction.
+            ``None`` means no limit.
+        :param on_result: A callback invoked with each :class:`SessionDestructionResult`
+            as soon as the destruction finishes, in the order of completion.
+            For synchronous sessions, it is invoked in the session's worker thread.
+
+        :returns: The :class:`SessionDestructionSummary` of all destructions,
+            which also collects the last resource usage statistics of the sessions.
+        '''
+        async def _destroy(index: int,
+                           target: Union[str, 'ComputeSession']) -> SessionDestructionResult:
+            begin = time.monotonic()
+            if isinstance(target, str):
+                compute_session = cls(target, owner_access_key)
+            else:
+                compute_session = target
+            name = compute_session.name
+            response = None
+            error = None
+            try:
+                response = await asyncio.wait_for(compute_session._orig_destroy(), timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+            return SessionDestructionResult(index, name, response, error,
+                                            time.monotonic() - begin)
+
+        results, elapsed = await _run_bulk(names, _destroy,
+                                           concurrency=concurrency,
+                                           on_result=on_result)
+        return SessionDestructionSummary(results, elapsed)
+
     def __init__(self, name: str, owner_access_key: str = None):
         self.name = name
         self.owner_access_key = owner_access_key
@@ -380,6 +715,87 @@ class ComputeSession:
             if resp.status == 200:
                 return await resp.json()
 
+    @api_function
+    async def wait_until_running(self, timeout: float = None, *,
+                                 event_hub: SessionEventHub = None) -> str:
+        '''
+        Waits until the compute session starts, e.g., after creating it with
+        *enqueue_only*.  It listens to the session's lifecycle events instead of
+        polling the session status, and reconnects if the event stream is closed.
+        It only works with :class:`~ai.backend.client.session.AsyncSession`.
+
+        :param timeout: The number of seconds to wait.  ``None`` means no limit.
+        :param event_hub: The :class:`~ai.backend.client.events.SessionEventHub`
+            to receive the events through, so that many waiting sessions share
+            the event streams.  Otherwise it opens a stream for this session.
+
+        :returns: ``"RUNNING"``, or ``"TIMEOUT"`` if the timeout has passed.
+            In the latter case, the session may still start in the future.
+            It also updates the *status* attribute.
+
+        :raises BackendClientError: if the session is cancelled, terminated, or
+            failed before starting.
+        '''
+        try:
+            if event_hub is not None:
+                coro = self._watch_startup_with_hub(event_hub)
+            else:
+                coro = self._watch_startup()
+            status = await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            status = 'TIMEOUT'
+        self.status = status
+        return status
+
+    async def _check_startup_status(self) -> bool:
+        # Check the status after subscribing to the events
+        # not to miss the ones fired before.
+        info = await self._orig_get_info()
+        status = info.get('status')
+        if status in _FAILED_STATUSES:
+            raise BackendClientError(
+                f'The compute session {self.name} has failed to start ({status}).')
+        return status == 'RUNNING'
+
+    def _check_startup_event(self, ev: Mapping[str, Any]) -> bool:
+        if ev['event'] in _FAILED_EVENTS:
+            try:
+                reason = json.loads(ev['data']).get('reason')
+            except (ValueError, AttributeError):
+                reason = None
+            raise BackendClientError(
+                f'The compute session {self.name} has failed to start '
+                f'({ev["event"]}: {reason}).')
+        return ev['event'] in _STARTED_EVENTS
+
+    async def _watch_startup(self) -> str:
+        while True:
+            async with self.stream_events() as sse_response:
+                if await self._check_startup_status():
+                    return 'RUNNING'
+                try:
+                    async for ev in sse_response.fetch_events():
+                        if self._check_startup_event(ev):
+                            return 'RUNNING'
+                except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError):
+                    pass
+            # The stream has been closed.  Reconnect to it.
+            await asyncio.sleep(_EVENT_RECONNECT_DELAY)
+
+    async def _watch_startup_with_hub(self, event_hub: SessionEventHub) -> str:
+        async with await event_hub.subscribe(self.name) as subscription:
+            if await self._check_startup_status():
+                return 'RUNNING'
+            async for ev in subscription:
+                if ev['event'] == STREAM_RECONNECTED:
+                    # Some events might be lost while reconnecting.
+                    if await self._check_startup_status():
+                        return 'RUNNING'
+                elif self._check_startup_event(ev):
+                    return 'RUNNING'
+        raise BackendClientError(
+            f'The event stream of the compute session {self.name} has been closed.')
+
     @api_function
     async def restart(self):
         '''
@@ -661,7 +1077,7 @@ class ComputeSession:
             'files': [*map(str, files)],
         })
         file_names = []
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(coalesce=False) as resp:
             loop = current_loop()
             tqdm_obj = tqdm(desc='Downloading files',
                             unit='bytes', unit_scale=True,
@@ -748,7 +1164,7 @@ class ComputeSession:
             'GET', f'/stream/{prefix}/_/events',
             params=params,
         )
-        return request.connect_events()
+        return request.connect_events(api_function='ComputeSession.stream_events')
 
     # only supported in AsyncKernel
     def stream_pty(self) -> 'StreamPty':
@@ -767,7 +1183,8 @@ class ComputeSession:
             'GET', f'/stream/{prefix}/{self.name}/pty',
             params=params,
         )
-        return request.connect_websocket(response_cls=StreamPty)
+        return request.connect_websocket(response_cls=StreamPty,
+                                         api_function='ComputeSession.stream_pty')
 
     # only supported in AsyncKernel
     def stream_execute(self, code: str = '', *,
@@ -808,7 +1225,8 @@ class ComputeSession:
                 'options': opts,
             })
 
-        return request.connect_websocket(on_enter=send_code)
+        return request.connect_websocket(on_enter=send_code,
+                                         api_function='ComputeSession.stream_execute')
 
 
 class StreamPty(WebSocketResponse):
@@ -17,7 +17,7 @@ class System:
     @classmethod
     async def get_versions(cls) -> Mapping[str, str]:
         rqst = Request(cls.session, 'GET', '/')
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(cache_name='System.get_versions') as resp:
             return await resp.json()
 
     @api_function
@@ -58,7 +58,7 @@ class VFolder:
     @classmethod
     async def list_hosts(cls):
         rqst = Request(cls.session, 'GET', '/folders/_/hosts')
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(cache_name='VFolder.list_hosts') as resp:
             return await resp.json()
 
     @api_function
@@ -175,7 +175,7 @@ class VFolder:
             'files': files,
         })
         file_names = []
-        async with rqst.fetch() as resp:
+        async with rqst.fetch(coalesce=False) as resp:
             if resp.status // 100 != 2:
                 raise BackendAPIError(resp.status, resp.reason,
                                       await resp.text())
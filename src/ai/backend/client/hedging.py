@@ -0,0 +1,40 @@
+from typing import Optional
+
+from .endpoint import EndpointSelector
+
+__all__ = (
+    'HedgePolicy',
+)
+
+
+class HedgePolicy:
+    '''
+    Configures hedged requests: if a read-only request has not been answered
+    within the hedging delay, a duplicate request is sent to another endpoint
+    and the first response wins while the other one is cancelled.
+
+    Hedging only applies when there are multiple endpoints configured.
+
+    :param delay: The hedging delay in seconds.  When *percentile* is set,
+        this is used until enough latency samples are collected.
+    :param percentile: Use this percentile (0 to 100) of the recently observed
+        response latencies as the hedging delay.
+    :param min_samples: The minimum number of latency samples to use *percentile*.
+    '''
+
+    def __init__(self, *,
+                 delay: float = 0.1,
+                 percentile: Optional[float] = None,
+                 min_samples: int = 16) -> None:
+        if percentile is not None:
+            assert 0 < percentile <= 100, 'percentile must be in (0, 100].'
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+
+    def get_delay(self, selector: EndpointSelector) -> float:
+        if self.percentile is not None:
+            value = selector.get_latency_percentile(self.percentile, self.min_samples)
+            if value is not None:
+                return value
+        return self.delay
@@ -1,3 +1,7 @@
+from .session import AsyncSession
+
 
 def is_admin(session):
-    return session.KeyPair(session.config.access_key).info()['is_admin']
+    if isinstance(session, AsyncSession):
+        raise TypeError('Use "await session.fetch_is_admin()" with AsyncSession.')
+    return session.is_admin
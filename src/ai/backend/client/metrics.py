@@ -0,0 +1,425 @@
+'''
+Client-side timing metrics of the API requests collected via aiohttp's
+request tracing hooks.
+
+Each request is split into the following phases (in seconds):
+
+``dns``
+  Resolving the endpoint hostname.  Not recorded for DNS cache hits.
+
+``queue``
+  Waiting for a free connection in the connection pool.  It is only recorded
+  when the pool limits are reached, so a growing histogram here indicates
+  client-side pool starvation.
+
+``connect``
+  Establishing a new connection including the TLS handshake,
+  excluding the DNS resolution.
+
+``ttfb``
+  From the moment the connection is ready until the response headers arrive.
+  It covers the server-side handling time of the request.
+
+``body``
+  From the response headers until the response is released, i.e., reading the
+  response body.  Only recorded for :meth:`Request.fetch()
+  <ai.backend.client.request.Request.fetch>`.
+
+``total``
+  From the start of the request until the response is released
+  (or the streaming connection is established).
+'''
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import (
+    Any, Dict, Mapping, Optional, Sequence,
+)
+
+import aiohttp
+from yarl import URL
+
+try:
+    import contextvars
+except ImportError:  # Python 3.6
+    contextvars = None
+
+__all__ = (
+    'PHASES',
+    'DEFAULT_BUCKETS',
+    'Histogram',
+    'RequestTiming',
+    'SessionMetrics',
+    'get_current_function',
+    'run_as_function',
+    'set_pending_timing',
+)
+
+
+PHASES = ('dns', 'queue', 'connect', 'ttfb', 'body', 'total')
+'''
+The names of the recorded request phases.
+'''
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+'''
+The default upper bounds of the histogram buckets in seconds.
+'''
+
+
+if contextvars is not None:
+    # The name of the API function being executed, used to label the requests.
+    _current_function = contextvars.ContextVar('_current_function', default=None)
+    # aiohttp's ws_connect() does not take trace_request_ctx.
+    _pending_timing = contextvars.ContextVar('_pending_timing', default=None)
+else:
+    _current_function = None
+    _pending_timing = None
+
+
+def get_current_function() -> Optional[str]:
+    '''
+    Returns the name of the API function (e.g., ``"ComputeSession.create"``)
+    executing in the current context, if any.
+    '''
+    if _current_function is None:
+        return None
+    return _current_function.get()
+
+
+async def run_as_function(name: str, coro):
+    '''
+    Awaits the given coroutine of an API function while labeling the requests
+    made inside it with *name*.
+    '''
+    if _current_function is None:
+        return await coro
+    token = _current_function.set(name)
+    try:
+        return await coro
+    finally:
+        _current_function.reset(token)
+
+
+def set_pending_timing(timing: Optional['RequestTiming']) -> None:
+    '''
+    Passes *timing* to the trace hooks of the next request made in the current
+    context, for the aiohttp APIs which do not take ``trace_request_ctx``
+    such as :meth:`aiohttp.ClientSession.ws_connect`.
+    '''
+    if _pending_timing is not None:
+        _pending_timing.set(timing)
+
+
+class Histogram:
+    '''
+    A histogram of durations with fixed bucket boundaries.
+
+    :param bounds: The sorted upper bounds of the buckets.  Another bucket
+        collects the values larger than the last bound.
+    '''
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        idx = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                idx = i
+                break
+        self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        '''
+        Returns an estimate of the given percentile (0 to 100), which is the upper
+        bound of the bucket containing it, capped by the observed maximum.
+        '''
+        if self.count == 0:
+            return None
+        rank = self.count * percentile / 100
+        accum = 0
+        for bound, count in zip(self.bounds, self.counts):
+            accum += count
+            if accum >= rank and accum > 0:
+                return min(bound, self.max)
+        return self.max
+
+    def to_json(self) -> Mapping[str, Any]:
+        buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets['+Inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': buckets,
+        }
+
+
+class RequestTiming:
+    '''
+    Collects the timestamps of a single HTTP request from the trace hooks
+    and records the phase durations to :class:`SessionMetrics`.
+    '''
+
+    __slots__ = (
+        'metrics', 'endpoint', 'function', 'record_body',
+        'started_at', 'dns_started_at', 'dns_time',
+        'queued_at', 'connecting_at', 'connected_at',
+        'response_at', 'body_received_at', 'finished',
+    )
+
+    def __init__(self, metrics: 'SessionMetrics', endpoint: URL,
+                 function: Optional[str], *, record_body: bool = True) -> None:
+        self.metrics = metrics
+        self.endpoint = str(endpoint)
+        self.function = function
+        self.record_body = record_body
+        self.started_at: Optional[float] = None
+        self.dns_started_at: Optional[float] = None
+        self.dns_time = 0.0
+        self.queued_at: Optional[float] = None
+        self.connecting_at: Optional[float] = None
+        self.connected_at: Optional[float] = None
+        self.response_at: Optional[float] = None
+        self.body_received_at: Optional[float] = None
+        self.finished = False
+
+    def _observe(self, phase: str, value: float) -> None:
+        self.metrics.observe(phase, value, endpoint=self.endpoint, function=self.function)
+
+    def on_request_start(self, now: float) -> None:
+        self.started_at = now
+
+    def on_dns_start(self, now: float) -> None:
+        self.dns_started_at = now
+
+    def on_dns_end(self, now: float) -> None:
+        if self.dns_started_at is not None:
+            self.dns_time = now - self.dns_started_at
+            self._observe('dns', self.dns_time)
+            self.dns_started_at = None
+
+    def on_queued_start(self, now: float) -> None:
+        self.queued_at = now
+
+    def on_queued_end(self, now: float) -> None:
+        if self.queued_at is not None:
+            self._observe('queue', now - self.queued_at)
+            self.queued_at = None
+
+    def on_connection_create_start(self, now: float) -> None:
+        self.connecting_at = now
+        self.dns_time = 0.0
+
+    def on_connection_create_end(self, now: float) -> None:
+        if self.connecting_at is not None:
+            self._observe('connect', max(0.0, now - self.connecting_at - self.dns_time))
+            self.connecting_at = None
+        self.connected_at = now
+
+    def on_connection_reuse(self, now: float) -> None:
+        self.connected_at = now
+
+    def on_response_headers(self, now: float) -> None:
+        self.response_at = now
+        ready_at = self.connected_at if self.connected_at is not None else self.started_at
+        if ready_at is not None:
+            self._observe('ttfb', now - ready_at)
+
+    def on_response_body(self, now: float) -> None:
+        self.body_received_at = now
+
+    def finish(self, *, body_read: bool = True) -> None:
+        '''
+        Records the body transfer and the total time when the response
+        is released.  It is no-op if the request has not started or is already
+        finished.
+
+        :param body_read: Whether the caller has consumed the response body.
+            ``False`` for the responses discarded without reading.
+        '''
+        if self.finished or self.started_at is None:
+            return
+        self.finished = True
+        now = time.monotonic()
+        if self.record_body and body_read and self.response_at is not None:
+            end = self.body_received_at if self.body_received_at is not None else now
+            self._observe('body', end - self.response_at)
+        self._observe('total', now - self.started_at)
+
+
+def _get_timing(trace_config_ctx: SimpleNamespace) -> Optional[RequestTiming]:
+    timing = trace_config_ctx.trace_request_ctx
+    if isinstance(timing, RequestTiming):
+        return timing
+    return None
+
+
+def _make_trace_hook(method_name: str):
+
+    async def _hook(session, trace_config_ctx, params):
+        timing = _get_timing(trace_config_ctx)
+        if timing is not None:
+            getattr(timing, method_name)(time.monotonic())
+
+    return _hook
+
+
+def _create_trace_config_ctx(trace_request_ctx=None) -> SimpleNamespace:
+    if trace_request_ctx is None and _pending_timing is not None:
+        trace_request_ctx = _pending_timing.get()
+        if trace_request_ctx is not None:
+            # Consume it so that the subsequent requests are not mislabeled.
+            _pending_timing.set(None)
+    return SimpleNamespace(trace_request_ctx=trace_request_ctx)
+
+
+_trace_signals = (
+    ('on_request_start', 'on_request_start'),
+    ('on_dns_resolvehost_start', 'on_dns_start'),
+    ('on_dns_resolvehost_end', 'on_dns_end'),
+    ('on_connection_queued_start', 'on_queued_start'),
+    ('on_connection_queued_end', 'on_queued_end'),
+    ('on_connection_create_start', 'on_connection_create_start'),
+    ('on_connection_create_end', 'on_connection_create_end'),
+    ('on_connection_reuseconn', 'on_connection_reuse'),
+    ('on_request_end', 'on_response_headers'),
+    ('on_response_chunk_received', 'on_response_body'),
+)
+
+
+class SessionMetrics:
+    '''
+    Aggregates the request timings of API sessions into histograms per API
+    endpoint and per API function.
+
+    Every session creates its own instance by default, but an instance may be
+    shared by multiple sessions and threads to aggregate them together.
+
+    :param bounds: The upper bounds of the histogram buckets in seconds.
+    '''
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._bounds = tuple(bounds)
+        self._by_endpoint: Dict[str, Dict[str, Histogram]] = {}
+        self._by_function: Dict[str, Dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def create_trace_config() -> aiohttp.TraceConfig:
+        '''
+        Creates an aiohttp trace config which records the timings of the requests
+        passing a :class:`RequestTiming` as ``trace_request_ctx``.
+
+        The timings go to the metrics which started each :class:`RequestTiming`,
+        so a single trace config may serve the sessions with different metrics.
+        '''
+        trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=_create_trace_config_ctx)
+        for signal_name, method_name in _trace_signals:
+            getattr(trace_config, signal_name).append(_make_trace_hook(method_name))
+        return trace_config
+
+    def start_request(self, endpoint: URL, function: str = None, *,
+                      record_body: bool = True) -> RequestTiming:
+        '''
+        Creates a timing collector of a new request to *endpoint*.
+
+        :param function: The name of the API function making the request.
+            If ``None``, the timings are only recorded per endpoint.
+        :param record_body: Whether to record the body transfer time.
+        '''
+        return RequestTiming(self, endpoint, function, record_body=record_body)
+
+    def observe(self, phase: str, value: float, *,
+                endpoint: str, function: str = None) -> None:
+        with self._lock:
+            self._get_or_create(self._by_endpoint, endpoint, phase).observe(value)
+            if function is not None:
+                self._get_or_create(self._by_function, function, phase).observe(value)
+
+    def _get_or_create(self, table: Dict[str, Dict[str, Histogram]],
+                       key: str, phase: str) -> Histogram:
+        histograms = table.get(key)
+        if histograms is None:
+            histograms = table[key] = {}
+        hist = histograms.get(phase)
+        if hist is None:
+            hist = histograms[phase] = Histogram(self._bounds)
+        return hist
+
+    def get_histogram(self, phase: str, *,
+                      endpoint: str = None,
+                      function: str = None) -> Optional[Histogram]:
+        '''
+        Returns the histogram of the given phase for either the given endpoint
+        or API function, or ``None`` if there is no record.
+        '''
+        assert (endpoint is None) != (function is None), \
+               'Either endpoint or function must be given.'
+        with self._lock:
+            if endpoint is not None:
+                histograms = self._by_endpoint.get(str(endpoint), {})
+            else:
+                histograms = self._by_function.get(function, {})
+            return histograms.get(phase)
+
+    def reset(self) -> None:
+        '''
+        Discards all records.
+        '''
+        with self._lock:
+            self._by_endpoint.clear()
+            self._by_function.clear()
+
+    def to_json(self) -> Mapping[str, Any]:
+        '''
+        Returns a JSON-serializable snapshot of all histograms.
+        '''
+        with self._lock:
+            return {
+                'endpoints': {
+                    key: {phase: hist.to_json() for phase, hist in histograms.items()}
+                    for key, histograms in self._by_endpoint.items()
+                },
+                'functions': {
+                    key: {phase: hist.to_json() for phase, hist in histograms.items()}
+                    for key, histograms in self._by_function.items()
+                },
+            }
+
+    def dumps(self, **kwargs) -> str:
+        '''
+        Serializes :meth:`to_json` into a JSON string.
+        The keyword arguments are passed to :func:`json.dumps`.
+        '''
+        return json.dumps(self.to_json(), **kwargs)
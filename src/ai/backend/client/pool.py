@@ -0,0 +1,395 @@
+import asyncio
+import collections
+import functools
+import logging
+import time
+from typing import (
+    Any, Deque, Dict, Hashable, Mapping, Optional, Set, Tuple,
+)
+
+from .compat import current_loop
+from .exceptions import BackendClientError
+
+__all__ = (
+    'SessionPool',
+)
+
+log = logging.getLogger('ai.backend.client.pool')
+
+RESET_MODES = ('restart', 'recreate', None)
+
+# The interval to retry the failed creations when the expiration is disabled.
+_RETRY_INTERVAL = 30.0
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+class _WarmSession:
+
+    __slots__ = ('compute_session', 'idle_since', 'uses')
+
+    def __init__(self, compute_session) -> None:
+        self.compute_session = compute_session
+        self.idle_since = time.monotonic()
+        self.uses = 0
+
+
+class _SpecPool:
+
+    __slots__ = ('key', 'options', 'idle', 'creating', 'refill_task')
+
+    def __init__(self, key: Hashable, options: Mapping[str, Any]) -> None:
+        self.key = key
+        self.options = options
+        self.idle: Deque[_WarmSession] = collections.deque()
+        self.creating = 0
+        self.refill_task: Optional[asyncio.Task] = None
+
+
+class _SessionLease:
+
+    __slots__ = ('_pool', '_image', '_options', '_compute_session')
+
+    def __init__(self, pool: 'SessionPool', image: str, options: Mapping[str, Any]) -> None:
+        self._pool = pool
+        self._image = image
+        self._options = options
+        self._compute_session = None
+
+    async def __aenter__(self):
+        self._compute_session = await self._pool.acquire(self._image, **self._options)
+        return self._compute_session
+
+    async def __aexit__(self, exc_type, exc_obj, exc_tb):
+        await self._pool.release(self._compute_session)
+        return False
+
+
+class SessionPool:
+    '''
+    Keeps pre-created compute sessions warm for each distinct creation spec
+    (the image and other :meth:`ComputeSession.get_or_create()
+    <ai.backend.client.func.session.ComputeSession.get_or_create>` options such
+    as resources and mounts) and leases them to the callers, so that they get
+    ready-to-use sessions without waiting for the scheduling and container startup.
+
+    A spec is registered on its first lease or :meth:`warm_up` call, and then
+    the pool keeps *size* idle sessions of it by creating new ones in the
+    background.  A released session is reset and returned to the pool, and the
+    most recently released one is leased first.  Idle sessions unused for
+    *idle_timeout* seconds are destroyed, and then the pool creates fresh ones
+    only if it has less than *size* idle sessions.  The failed creations are
+    retried periodically.
+
+    It works only with :class:`~ai.backend.client.session.AsyncSession`.
+
+    .. code-block:: python3
+
+       async with AsyncSession() as api_session:
+           async with SessionPool(api_session, size=4) as pool:
+               async with pool.lease('python:3.7', resources={'cpu': 1}) as sess:
+                   await sess.execute(code='print("hello")')
+
+    :param api_session: The client session to make the API requests.
+    :param size: The number of idle sessions kept warm for each spec.
+    :param max_idle: The maximum number of idle sessions for each spec.
+        The sessions released beyond it are destroyed.  The default is
+        twice the *size*.
+    :param idle_timeout: The number of seconds to keep an idle session before
+        replacing it.  It should be shorter than the idle timeout of the server.
+        Zero disables the expiration.
+    :param max_uses: The maximum number of leases of a single session before
+        destroying it.  ``None`` means no limit.
+    :param reset: How to reset the released sessions.  ``"restart"`` restarts
+        the session's containers while keeping their scratch directories,
+        ``"recreate"`` destroys the session so that the next lease gets a fresh
+        one, and ``None`` reuses the session as-is.
+    :param create_concurrency: The maximum number of concurrent background
+        creations for each spec.
+    :param create_timeout: The number of seconds to wait for each creation.
+        ``None`` means no limit.  The sessions created after the timeout are
+        destroyed.
+    '''
+
+    __slots__ = (
+        'size', 'max_idle', 'idle_timeout', 'max_uses', 'reset',
+        'create_concurrency', 'create_timeout',
+        '_api_session', '_spec_pools', '_leased', '_pending_tasks',
+        '_maintenance_task', '_closed', '_hits', '_misses',
+    )
+
+    def __init__(self, api_session, *,
+                 size: int = 2,
+                 max_idle: int = None,
+                 idle_timeout: float = 600.0,
+                 max_uses: int = None,
+                 reset: Optional[str] = 'restart',
+                 create_concurrency: int = 4,
+                 create_timeout: float = None) -> None:
+        assert not hasattr(api_session, 'worker_thread'), \
+               'SessionPool works only with AsyncSession.'
+        if reset not in RESET_MODES:
+            raise ValueError(f'Unsupported reset mode: {reset}')
+        self.size = size
+        self.max_idle = max_idle if max_idle is not None else size * 2
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.reset = reset
+        self.create_concurrency = create_concurrency
+        self.create_timeout = create_timeout
+        self._api_session = api_session
+        self._spec_pools: Dict[Hashable, _SpecPool] = {}
+        self._leased: Dict[int, Tuple[_SpecPool, _WarmSession]] = {}
+        self._pending_tasks: Set[asyncio.Task] = set()
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._hits = 0
+        self._misses = 0
+
+    async def __aenter__(self) -> 'SessionPool':
+        return self
+
+    async def __aexit__(self, exc_type, exc_obj, exc_tb):
+        await self.close()
+        return False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _get_spec_pool(self, image: str, options: Mapping[str, Any]) -> _SpecPool:
+        if 'name' in options:
+            raise ValueError('The pooled sessions cannot have explicit names.')
+        options = {**options, 'image': image}
+        key = _freeze(options)
+        spec_pool = self._spec_pools.get(key)
+        if spec_pool is None:
+            spec_pool = _SpecPool(key, options)
+            self._spec_pools[key] = spec_pool
+            if self._maintenance_task is None:
+                self._maintenance_task = current_loop().create_task(self._maintain())
+        return spec_pool
+
+    async def warm_up(self, image: str, **options) -> None:
+        '''
+        Registers the spec and waits until its idle sessions are ready.
+        The keyword arguments are same to :meth:`ComputeSession.get_or_create()
+        <ai.backend.client.func.session.ComputeSession.get_or_create>` except *name*.
+        '''
+        assert not self._closed, 'The session pool is already closed.'
+        spec_pool = self._get_spec_pool(image, options)
+        self._refill(spec_pool)
+        if spec_pool.refill_task is not None:
+            await asyncio.shield(spec_pool.refill_task)
+
+    def lease(self, image: str, **options) -> _SessionLease:
+        '''
+        Returns an async context manager which acquires a compute session
+        of the given spec and releases it on exit.
+        '''
+        return _SessionLease(self, image, options)
+
+    async def acquire(self, image: str, **options):
+        '''
+        Takes an idle compute session of the given spec, or creates a new one if
+        there is none.  The returned session must be given back via :meth:`release`.
+        The keyword arguments are same to :meth:`ComputeSession.get_or_create()
+        <ai.backend.client.func.session.ComputeSession.get_or_create>` except *name*.
+
+        :returns: The :class:`~ai.backend.client.func.session.ComputeSession` instance.
+        '''
+        assert not self._closed, 'The session pool is already closed.'
+        spec_pool = self._get_spec_pool(image, options)
+        if spec_pool.idle:
+            warm = spec_pool.idle.pop()
+            self._hits += 1
+        else:
+            self._misses += 1
+            warm = _WarmSession(await self._create(spec_pool))
+        warm.uses += 1
+        self._leased[id(warm.compute_session)] = (spec_pool, warm)
+        self._refill(spec_pool)
+        return warm.compute_session
+
+    async def release(self, compute_session, *, discard: bool = False) -> None:
+        '''
+        Gives back a compute session returned by :meth:`acquire`.
+
+        :param discard: Destroy the session instead of returning it to the pool,
+            e.g., when it is in an unknown state.
+        '''
+        entry = self._leased.pop(id(compute_session), None)
+        if entry is None:
+            raise ValueError('The compute session is not leased from this pool.')
+        spec_pool, warm = entry
+        if (discard or self._closed or self.reset == 'recreate' or
+                (self.max_uses is not None and warm.uses >= self.max_uses)):
+            self._destroy_in_background(compute_session)
+            self._refill(spec_pool)
+            return
+        if self.reset == 'restart':
+            try:
+                await compute_session.restart()
+            except Exception:
+                log.warning('failed to restart the pooled session %s',
+                            compute_session.name, exc_info=True)
+                self._destroy_in_background(compute_session)
+                self._refill(spec_pool)
+                return
+        self._add_idle(spec_pool, warm)
+
+    async def close(self) -> None:
+        '''
+        Destroys all idle sessions and stops the background tasks.
+        The sessions being leased are destroyed when released.
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            await asyncio.gather(self._maintenance_task, return_exceptions=True)
+        # Let the ongoing creations finish so that their sessions are destroyed.
+        await asyncio.gather(*[
+            spec_pool.refill_task for spec_pool in self._spec_pools.values()
+            if spec_pool.refill_task is not None
+        ], return_exceptions=True)
+        idle_sessions = []
+        for spec_pool in self._spec_pools.values():
+            idle_sessions.extend(warm.compute_session for warm in spec_pool.idle)
+            spec_pool.idle.clear()
+        if idle_sessions:
+            summary = await self._api_session.ComputeSession.destroy_many(
+                idle_sessions, concurrency=self.create_concurrency)
+            for result in summary.failed:
+                log.warning('failed to destroy the pooled session %s: %r',
+                            result.name, result.error)
+        if self._pending_tasks:
+            await asyncio.gather(*self._pending_tasks, return_exceptions=True)
+
+    def get_stats(self) -> Mapping[str, int]:
+        '''
+        Returns the numbers of the registered specs, the idle, leased, and
+        being-created sessions, and the leases served by idle sessions (hits)
+        or by new sessions (misses).
+        '''
+        return {
+            'specs': len(self._spec_pools),
+            'idle': sum(len(p.idle) for p in self._spec_pools.values()),
+            'leased': len(self._leased),
+            'creating': sum(p.creating for p in self._spec_pools.values()),
+            'hits': self._hits,
+            'misses': self._misses,
+        }
+
+    async def _create(self, spec_pool: _SpecPool):
+        # Do not cancel the creation request on timeouts, as the server may
+        # still create the session; it is destroyed when the request finishes.
+        task = current_loop().create_task(
+            self._api_session.ComputeSession.get_or_create(**spec_pool.options))
+        try:
+            compute_session = await asyncio.wait_for(asyncio.shield(task),
+                                                     self.create_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._run_in_background(self._destroy_late(task))
+            raise
+        if compute_session.status != 'RUNNING':
+            self._destroy_in_background(compute_session)
+            raise BackendClientError(
+                f'The compute session {compute_session.name} is not running '
+                f'({compute_session.status}).')
+        return compute_session
+
+    def _refill(self, spec_pool: _SpecPool) -> None:
+        if self._closed:
+            return
+        if spec_pool.refill_task is not None and not spec_pool.refill_task.done():
+            return
+        shortage = self.size - len(spec_pool.idle) - spec_pool.creating
+        if shortage <= 0:
+            return
+        task = current_loop().create_task(self._fill(spec_pool, shortage))
+        task.add_done_callback(functools.partial(self._on_filled, spec_pool))
+        spec_pool.refill_task = task
+
+    def _on_filled(self, spec_pool: _SpecPool, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None or task.result() > 0:
+            # Leave the retries of the failed creations to the maintenance task.
+            return
+        # Make up for the sessions leased while filling.
+        self._refill(spec_pool)
+
+    async def _fill(self, spec_pool: _SpecPool, count: int) -> int:
+        spec_pool.creating += count
+        semaphore = asyncio.Semaphore(self.create_concurrency)
+        failures = 0
+
+        async def _fill_one():
+            nonlocal failures
+            try:
+                async with semaphore:
+                    compute_session = await self._create(spec_pool)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                log.warning('failed to create a pooled session of %s: %r',
+                            spec_pool.options['image'], e)
+            else:
+                self._add_idle(spec_pool, _WarmSession(compute_session))
+            finally:
+                spec_pool.creating -= 1
+
+        await asyncio.gather(*[_fill_one() for _ in range(count)])
+        return failures
+
+    def _add_idle(self, spec_pool: _SpecPool, warm: _WarmSession) -> None:
+        if self._closed or len(spec_pool.idle) >= max(self.size, self.max_idle):
+            self._destroy_in_background(warm.compute_session)
+            return
+        warm.idle_since = time.monotonic()
+        spec_pool.idle.append(warm)
+
+    def _destroy_in_background(self, compute_session) -> None:
+        self._run_in_background(self._destroy(compute_session))
+
+    async def _destroy(self, compute_session) -> None:
+        try:
+            await compute_session.destroy()
+        except Exception:
+            log.warning('failed to destroy the pooled session %s',
+                        compute_session.name, exc_info=True)
+
+    async def _destroy_late(self, task: asyncio.Task) -> None:
+        try:
+            compute_session = await task
+        except Exception:
+            return
+        await self._destroy(compute_session)
+
+    def _run_in_background(self, coro) -> None:
+        task = current_loop().create_task(coro)
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+
+    async def _maintain(self) -> None:
+        expires = self.idle_timeout > 0
+        interval = min(_RETRY_INTERVAL, self.idle_timeout / 2) if expires else _RETRY_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for spec_pool in [*self._spec_pools.values()]:
+                while expires and spec_pool.idle and \
+                        now - spec_pool.idle[0].idle_since >= self.idle_timeout:
+                    warm = spec_pool.idle.popleft()
+                    self._destroy_in_background(warm.compute_session)
+                # This also retries the failed creations.
+                self._refill(spec_pool)
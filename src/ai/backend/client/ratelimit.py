@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from yarl import URL
+
+__all__ = (
+    'RATE_LIMIT_CATEGORIES',
+    'TokenBucket',
+    'RateLimiter',
+)
+
+
+RATE_LIMIT_CATEGORIES = ('read', 'mutate', 'create')
+'''
+The request categories having separate rate limit budgets:
+read-only requests, other requests changing the server-side states,
+and compute session creation requests.
+'''
+
+
+class TokenBucket:
+    '''
+    A token bucket which refills *rate* tokens per second up to *burst* tokens.
+
+    Each request reserves a token in advance and waits until its reservation
+    becomes due, so that the waiting requests are served in the FIFO order
+    without busy polling.  It is safe to use across multiple threads and
+    event loops.
+
+    :param rate: The number of tokens refilled per second.
+    :param burst: The maximum number of tokens accumulated while idle.
+        Defaults to *rate* (but at least one).
+    '''
+
+    __slots__ = ('rate', 'burst', '_tokens', '_updated_at', '_lock')
+
+    def __init__(self, rate: float, burst: float = None) -> None:
+        assert rate > 0, 'The rate must be a positive number.'
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        # While paused, _updated_at is in the future and nothing is refilled.
+        if now > self._updated_at:
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+    def reserve(self) -> float:
+        '''
+        Takes a token and returns the number of seconds to wait before using it.
+        '''
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            self._tokens -= 1
+            delay = max(0.0, self._updated_at - now)
+            if self._tokens < 0:
+                delay += -self._tokens / self.rate
+            return delay
+
+    def pause(self, delay: float) -> None:
+        '''
+        Stops refilling the tokens for *delay* seconds and discards the remaining
+        ones, e.g., when the server asks to retry after the delay.
+        '''
+        resume_at = time.monotonic() + delay
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated_at = max(self._updated_at, resume_at)
+
+    async def acquire(self) -> None:
+        '''
+        Waits until a token is available.
+        '''
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    '''
+    Limits the rate of the API requests with a :class:`TokenBucket` per endpoint
+    and per request category in :data:`RATE_LIMIT_CATEGORIES`.
+
+    The rate limiter is shared by all sessions using the same
+    :class:`~ai.backend.client.config.APIConfig`.
+
+    :param read_rate: The maximum number of read-only requests per second.
+    :param mutate_rate: The maximum number of other requests per second.
+    :param create_rate: The maximum number of compute session creation requests
+        per second.
+    :param burst: The maximum number of requests in a burst for all categories.
+        Defaults to the rate of each category (but at least one).
+
+    A zero rate disables limiting the category.
+    '''
+
+    def __init__(self, *,
+                 read_rate: float = 0,
+                 mutate_rate: float = 0,
+                 create_rate: float = 0,
+                 burst: float = None) -> None:
+        self._rates = {
+            'read': read_rate,
+            'mutate': mutate_rate,
+            'create': create_rate,
+        }
+        self._burst = burst
+        self._buckets: Dict[Tuple[URL, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def get_rate(self, category: str) -> float:
+        return self._rates[category]
+
+    def get_bucket(self, endpoint: URL, category: str) -> Optional[TokenBucket]:
+        '''
+        Returns the token bucket of the given endpoint and category,
+        or ``None`` if the category is not limited.
+        '''
+        rate = self._rates[category]
+        if rate <= 0:
+            return None
+        with self._lock:
+            bucket = self._buckets.get((endpoint, category))
+            if bucket is None:
+                bucket = TokenBucket(rate, self._burst)
+                self._buckets[(endpoint, category)] = bucket
+            return bucket
+
+    async def acquire(self, endpoint: URL, category: str) -> None:
+        '''
+        Waits until a request of the category can be sent to the endpoint.
+        '''
+        bucket = self.get_bucket(endpoint, category)
+        if bucket is not None:
+            await bucket.acquire()
+
+    def pause(self, endpoint: URL, category: str, delay: float) -> bool:
+        '''
+        Holds the requests of the category to the endpoint for *delay* seconds,
+        e.g., as requested by the ``Retry-After`` header of a 429 response.
+        Returns ``False`` if the category is not limited.
+        '''
+        bucket = self.get_bucket(endpoint, category)
+        if bucket is None:
+            return False
+        bucket.pause(delay)
+        return True
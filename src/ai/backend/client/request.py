@@ -1,23 +1,41 @@
-from collections import OrderedDict, namedtuple
+import asyncio
+from collections import namedtuple
 from datetime import datetime
-from decimal import Decimal
-import functools
+import fnmatch
+import hashlib
 import io
 import logging
-from pathlib import Path
-from typing import Any, Callable, Mapping, Sequence, Union
+import os
+import re
+import time
+from typing import (
+    Any, Callable, Hashable, Mapping, Optional, Sequence, Tuple, Union,
+)
 
 import aiohttp
 from aiohttp.client import _RequestContextManager, _WSRequestContextManager
 import aiohttp.web
-import appdirs
 from dateutil.tz import tzutc
 from multidict import CIMultiDict
-import json as modjson
+from yarl import URL
 
 from .auth import generate_signature
-from .exceptions import BackendClientError, BackendAPIError
+from .cache import ResponseCache
+from .codec import (  # noqa: F401 (ExtendedJSONEncoder for backward compatibility)
+    ExtendedJSONEncoder,
+    dumps as json_dumps,
+    loads as json_loads,
+)
+from .cookie import PersistentCookieJar
+from .endpoint import EndpointSelector
+from .exceptions import BackendClientError, BackendAPIError, CircuitOpenError
+from .hedging import HedgePolicy
+from .metrics import RequestTiming, get_current_function, set_pending_timing
+from .retry import RetryPolicy
+from .versioning import is_api_version_mismatch, is_version_dependent_path
+from .compat import current_loop
 from .session import BaseSession, Session as SyncSession, AsyncSession
+from .utils import guess_content_type
 
 log = logging.getLogger('ai.backend.client.request')
 
@@ -56,14 +74,35 @@ A struct that represents an attached file to the API request.
 '''
 
 
-class ExtendedJSONEncoder(modjson.JSONEncoder):
+_gql_read_query_regex = re.compile(r'^(\s|#[^\n]*\n)*(query\b|\{)')
 
-    def default(self, obj):
-        if isinstance(obj, Path):
-            return str(obj)
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return super().default(obj)
+
+def _is_gql_read_query(query: str) -> bool:
+    '''
+    Checks if the given GraphQL document is a query without mutations.
+    '''
+    return _gql_read_query_regex.match(query) is not None
+
+
+def _get_stream_size(stream) -> Optional[int]:
+    '''
+    Returns the number of remaining bytes of the given file-like object,
+    or ``None`` if it is unknown.
+    '''
+    try:
+        return os.fstat(stream.fileno()).st_size - stream.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    # In-memory buffers have no file descriptors but are seekable.
+    try:
+        if not stream.seekable():
+            return None
+        pos = stream.tell()
+        end = stream.seek(0, io.SEEK_END)
+        stream.seek(pos)
+        return end - pos
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
 
 
 class Request:
@@ -74,7 +113,7 @@ class Request:
     __slots__ = (
         'config', 'session', 'method', 'path',
         'date', 'headers', 'params', 'content_type',
-        '_content', '_attached_files',
+        '_content', '_attached_files', '_gql_read_only',
         'reporthook',
     )
 
@@ -83,6 +122,8 @@ class Request:
         'PUT', 'PATCH', 'DELETE',
         'OPTIONS'])
 
+    _safe_methods = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
     def __init__(self, session: BaseSession,
                  method: str = 'GET',
                  path: str = None,
@@ -118,6 +159,7 @@ class Request:
             ('X-BackendAI-Version', self.config.version),
         ])
         self._attached_files = None
+        self._gql_read_only = False
         self.set_content(content, content_type=content_type)
         self.reporthook = reporthook
 
@@ -130,6 +172,14 @@ class Request:
         '''
         return self._content
 
+    @property
+    def is_read_only(self) -> bool:
+        '''
+        Checks if the request only reads data from the server, i.e., it uses
+        a safe HTTP method or carries a GraphQL query without mutations.
+        '''
+        return self.method in self._safe_methods or self._gql_read_only
+
     def set_content(self, value: RequestContent, *,
                     content_type: str = None):
         '''
@@ -137,6 +187,7 @@ class Request:
         '''
         assert self._attached_files is None, \
                'cannot set content because you already attached files.'
+        self._gql_read_only = False
         guessed_content_type = 'application/octet-stream'
         if value is None:
             guessed_content_type = 'text/plain'
@@ -154,8 +205,9 @@ class Request:
         '''
         A shortcut for set_content() with JSON objects.
         '''
-        self.set_content(modjson.dumps(value, cls=ExtendedJSONEncoder),
-                         content_type='application/json')
+        self.set_content(json_dumps(value), content_type='application/json')
+        if isinstance(value, Mapping) and isinstance(value.get('query'), str):
+            self._gql_read_only = _is_gql_read_query(value['query'])
 
     def attach_files(self, files: Sequence[AttachedFile]):
         '''
@@ -165,13 +217,16 @@ class Request:
         self.content_type = 'multipart/form-data'
         self._attached_files = files
 
-    def _sign(self, rel_url, access_key=None, secret_key=None, hash_type=None):
+    def _sign(self, rel_url, access_key=None, secret_key=None, hash_type=None,
+              endpoint=None):
         '''
         Calculates the signature of the given request and adds the
         Authorization HTTP header.
         It should be called at the very end of request preparation and before
         sending the request to the server.
         '''
+        if endpoint is None:
+            endpoint = self.config.endpoint
         if access_key is None:
             access_key = self.config.access_key
         if secret_key is None:
@@ -180,17 +235,14 @@ class Request:
             hash_type = self.config.hash_type
         if self.config.endpoint_type == 'api':
             hdrs, _ = generate_signature(
-                self.method, self.config.version, self.config.endpoint,
+                self.method, self.config.version, endpoint,
                 self.date, str(rel_url), self.content_type, self._content,
                 access_key, secret_key, hash_type)
             self.headers.update(hdrs)
         elif self.config.endpoint_type == 'session':
-            local_state_path = Path(appdirs.user_state_dir('backend.ai', 'Lablup'))
-            try:
-                self.session.aiohttp_session.cookie_jar.load(
-                    local_state_path / 'cookie.dat')
-            except (IOError, PermissionError):
-                pass
+            cookie_jar = self.session.aiohttp_session.cookie_jar
+            if isinstance(cookie_jar, PersistentCookieJar):
+                cookie_jar.reload_if_changed()
         else:
             raise ValueError('unsupported endpoint type')
 
@@ -210,14 +262,60 @@ class Request:
         else:
             return self._content
 
-    def _build_url(self):
-        base_url = self.config.endpoint.path.rstrip('/')
+    def _get_content_encoding(self) -> Optional[str]:
+        '''
+        Decides the content encoding to compress the request body on the fly
+        according to the configuration, or returns ``None`` to send it as-is.
+        '''
+        encoding = self.config.request_compression
+        if encoding is None or 'Content-Encoding' in self.headers:
+            return None
+        if self.config.version < 'v4.20181215':
+            # The signature includes the hash of the uncompressed body.
+            return None
+        patterns = self.config.request_compression_types
+
+        def _is_compressible(content_type: str) -> bool:
+            content_type = content_type.split(';')[0].strip().lower()
+            return any(fnmatch.fnmatchcase(content_type, p) for p in patterns)
+
+        def _is_compressible_file(f: AttachedFile) -> bool:
+            if f.content_type.split(';')[0].strip().lower() == 'application/octet-stream':
+                # The uploads are sent as generic binaries, so judge by the file names.
+                return _is_compressible(guess_content_type(f.filename))
+            return _is_compressible(f.content_type)
+
+        threshold = self.config.request_compression_threshold
+        if self._attached_files is not None:
+            # The whole multipart body is compressed at once, so compress it
+            # only if every part is compressible and the total size is known.
+            total_size = 0
+            for f in self._attached_files:
+                if not _is_compressible_file(f):
+                    return None
+                size = _get_stream_size(f.stream)
+                if size is None:
+                    return None
+                total_size += size
+            return encoding if total_size >= max(1, threshold) else None
+        if not isinstance(self._content, (bytes, bytearray)):
+            return None
+        if len(self._content) < max(1, threshold):
+            return None
+        if not _is_compressible(self.content_type):
+            return None
+        return encoding
+
+    def _build_url(self, endpoint=None):
+        if endpoint is None:
+            endpoint = self.config.endpoint
+        base_url = endpoint.path.rstrip('/')
         query_path = self.path.lstrip('/') if len(self.path) > 0 else ''
         if self.config.endpoint_type == 'session':
             if not query_path.startswith('server'):
                 query_path = 'func/{0}'.format(query_path)
         path = '{0}/{1}'.format(base_url, query_path)
-        url = self.config.endpoint.with_path(path)
+        url = endpoint.with_path(path)
         if self.params:
             url = url.with_query(self.params)
         return url
@@ -250,6 +348,28 @@ class Request:
             rqst = Request(sess, 'GET', ...)
             async with rqst.fetch() as resp:
               print(await resp.text())
+
+        :param retry_policy: Overrides the session's retry policy for this request.
+        :param hedge_policy: Overrides the session's hedging policy for this request.
+            It only takes effect for read-only requests when there are multiple
+            endpoints.
+        :param coalesce: Overrides the session's
+            :attr:`~ai.backend.client.session.BaseSession.coalesce_reads` setting
+            for this request.  When enabled for a read-only request, identical
+            requests running concurrently share a single round trip and the
+            response body is read into the memory at once, so it should not be
+            used for large streaming responses.
+        :param cache_name: The name of the API function to look up the session's
+            :attr:`~ai.backend.client.session.BaseSession.response_cache`.
+            Only read-only requests are cached.
+        :param api_function: The name of the API function to label the request
+            timings in the session's
+            :attr:`~ai.backend.client.session.BaseSession.metrics`.
+            Defaults to the API function being executed.
+        :param rate_limit_category: The category in
+            :data:`~ai.backend.client.ratelimit.RATE_LIMIT_CATEGORIES` to apply the
+            rate limits of the session's configuration.
+            Defaults to ``"read"`` for read-only requests and ``"mutate"`` for others.
         '''
         assert self.method in self._allowed_methods, \
                'Disallowed HTTP method: {}'.format(self.method)
@@ -258,24 +378,81 @@ class Request:
         if self.content_type is not None and 'Content-Type' not in self.headers:
             self.headers['Content-Type'] = self.content_type
         force_anonymous = kwargs.pop('anonymous', False)
+        retry_policy = kwargs.pop('retry_policy', None)
+        if retry_policy is None:
+            retry_policy = self.session.retry_policy
+        # Streamed bodies cannot be sent again.
+        replayable = (self._attached_files is None and
+                      isinstance(self._content, (bytes, bytearray)))
+        idempotent = replayable and (
+            retry_policy.is_idempotent(self.method) or self.is_read_only)
+        hedge_policy = kwargs.pop('hedge_policy', self.session.hedge_policy)
+        if not (idempotent and self.is_read_only and len(self.config.endpoints) > 1):
+            hedge_policy = None
+        cacheable = replayable and self.is_read_only and 'response_cls' not in kwargs
+        coalesce = kwargs.pop('coalesce', self.session.coalesce_reads)
+        coalesce_key = None
+        if coalesce and cacheable:
+            coalesce_key = self._get_request_key(force_anonymous)
+        cache_name = kwargs.pop('cache_name', None)
+        api_function = kwargs.pop('api_function', None) or get_current_function()
+        rate_limit_category = kwargs.pop('rate_limit_category', None)
+        if rate_limit_category is None:
+            rate_limit_category = 'read' if self.is_read_only else 'mutate'
+        content_encoding = self._get_content_encoding()
+        response_cache = self.session.response_cache
+        cache_key = None
+        if (response_cache is not None and cache_name is not None and cacheable and
+                response_cache.get_ttl(cache_name) > 0):
+            cache_key = (
+                tuple(map(str, sorted(self.config.endpoints))),
+                self.config.unix_socket_path,
+                self.config.access_key,
+                self._get_request_key(force_anonymous),
+            )
+        else:
+            response_cache = None
 
-        def _rqst_ctx_builder():
+        def _rqst_ctx_builder(endpoint, timing):
             timeout_config = aiohttp.ClientTimeout(
                 total=None, connect=None,
                 sock_connect=self.config.connection_timeout,
                 sock_read=self.config.read_timeout,
             )
-            full_url = self._build_url()
+            full_url = self._build_url(endpoint)
             if not self.config.is_anonymous and not force_anonymous:
-                self._sign(full_url.relative())
+                self._sign(full_url.relative(), endpoint=endpoint)
             return self.session.aiohttp_session.request(
                 self.method,
                 str(full_url),
                 data=self._pack_content(),
+                compress=content_encoding,
                 timeout=timeout_config,
-                headers=self.headers)
-
-        return FetchContextManager(self.session, _rqst_ctx_builder, **kwargs)
+                headers=self.headers,
+                trace_request_ctx=timing)
+
+        return FetchContextManager(self.session, _rqst_ctx_builder,
+                                   retry_policy=retry_policy,
+                                   idempotent=idempotent,
+                                   hedge_policy=hedge_policy,
+                                   coalesce_key=coalesce_key,
+                                   response_cache=response_cache,
+                                   cache_name=cache_name,
+                                   cache_key=cache_key,
+                                   api_function=api_function,
+                                   rate_limit_category=rate_limit_category,
+                                   path=self.path,
+                                   **kwargs)
+
+    def _get_request_key(self, anonymous: bool) -> Hashable:
+        params = tuple(sorted(
+            (str(k), str(v)) for k, v in self.params.items()
+        )) if self.params else ()
+        return (
+            self.method, self.path, params, self.content_type,
+            hashlib.sha256(self._content).hexdigest(),
+            anonymous,
+        )
 
     def connect_websocket(self, **kwargs) -> 'WebSocketContextManager':
         '''
@@ -285,6 +462,10 @@ class Request:
 
           This method only works with
           :class:`~ai.backend.client.session.AsyncSession`.
+
+        :param api_function: The name of the API function to label the connection
+            timings in the session's
+            :attr:`~ai.backend.client.session.BaseSession.metrics`.
         '''
         assert isinstance(self.session, AsyncSession), \
                'Cannot use websockets with sessions in the synchronous mode'
@@ -293,17 +474,19 @@ class Request:
         self.headers['Date'] = self.date.isoformat()
         # websocket is always a "binary" stream.
         self.content_type = 'application/octet-stream'
+        api_function = kwargs.pop('api_function', None) or get_current_function()
 
-        def _ws_ctx_builder():
-            full_url = self._build_url()
+        def _ws_ctx_builder(endpoint):
+            full_url = self._build_url(endpoint)
             if not self.config.is_anonymous:
-                self._sign(full_url.relative())
+                self._sign(full_url.relative(), endpoint=endpoint)
             return self.session.aiohttp_session.ws_connect(
                 str(full_url),
                 autoping=True, heartbeat=30.0,
                 headers=self.headers)
 
-        return WebSocketContextManager(self.session, _ws_ctx_builder, **kwargs)
+        return WebSocketContextManager(self.session, _ws_ctx_builder,
+                                       api_function=api_function, **kwargs)
 
     def connect_events(self, **kwargs) -> 'SSEContextManager':
         '''
@@ -313,6 +496,10 @@ class Request:
 
           This method only works with
           :class:`~ai.backend.client.session.AsyncSession`.
+
+        :param api_function: The name of the API function to label the connection
+            timings in the session's
+            :attr:`~ai.backend.client.session.BaseSession.metrics`.
         '''
         assert isinstance(self.session, AsyncSession), \
                'Cannot use event streams with sessions in the synchronous mode'
@@ -320,23 +507,71 @@ class Request:
         self.date = datetime.now(tzutc())
         self.headers['Date'] = self.date.isoformat()
         self.content_type = 'application/octet-stream'
+        api_function = kwargs.pop('api_function', None) or get_current_function()
 
-        def _rqst_ctx_builder():
+        def _rqst_ctx_builder(endpoint, timing):
             timeout_config = aiohttp.ClientTimeout(
                 total=None, connect=None,
                 sock_connect=self.config.connection_timeout,
                 sock_read=self.config.read_timeout,
             )
-            full_url = self._build_url()
+            full_url = self._build_url(endpoint)
             if not self.config.is_anonymous:
-                self._sign(full_url.relative())
+                self._sign(full_url.relative(), endpoint=endpoint)
             return self.session.aiohttp_session.request(
                 self.method,
                 str(full_url),
                 timeout=timeout_config,
-                headers=self.headers)
+                headers=self.headers,
+                trace_request_ctx=timing)
 
-        return SSEContextManager(self.session, _rqst_ctx_builder, **kwargs)
+        return SSEContextManager(self.session, _rqst_ctx_builder,
+                                 api_function=api_function, path=self.path,
+                                 **kwargs)
+
+
+async def _measure_latency(selector: EndpointSelector, endpoint: URL, coro):
+    '''
+    Awaits the given connection coroutine while reporting its latency and
+    failures to the endpoint selector.
+    Server-side errors (5xx) are also counted as endpoint failures.
+    '''
+    begin = time.monotonic()
+    try:
+        ret = await coro
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+        selector.report_failure(endpoint)
+        raise
+    status = getattr(ret, 'status', 200)
+    if status // 100 == 5:
+        selector.report_failure(endpoint)
+    else:
+        selector.report_success(endpoint, time.monotonic() - begin)
+    return ret
+
+
+async def _check_api_version_mismatch(session, status: int, msg: str, path: str) -> None:
+    # Negotiate at most once per session so that repeated user errors
+    # do not make the session hammer the server with version queries.
+    if session.config.api_version_cache_ttl <= 0 or session._api_version_verified:
+        return
+    if (is_api_version_mismatch(status, msg) or
+            (status in (400, 404) and is_version_dependent_path(path))):
+        # The API version read from the cache may be outdated, which results in
+        # wrong API paths and parameters.  Negotiate it again for the subsequent
+        # requests of this session and the next sessions.
+        await session._verify_api_version()
+
+
+async def _discard_hedged_request(task: asyncio.Future) -> None:
+    if not task.done():
+        task.cancel()
+    try:
+        rqst_ctx, timing, _ = await task
+    except (asyncio.CancelledError, Exception):
+        return
+    await rqst_ctx.__aexit__(None, None, None)
+    timing.finish(body_read=False)
 
 
 class Response:
@@ -348,18 +583,25 @@ class Response:
 
     :func:`text`, :func:`json` methods return the resolved content directly with
     plain synchronous Session while they return the coroutines with AsyncSession.
+
+    If *body* is given, the response body has been already read into the memory
+    (e.g., shared by coalesced requests) and the read methods return it instead of
+    reading the underlying stream.
     '''
 
     __slots__ = (
         '_session', '_raw_response', '_async_mode',
+        '_buffer',
     )
 
     def __init__(self, session: BaseSession,
                  underlying_response: aiohttp.ClientResponse, *,
-                 async_mode: bool = False):
+                 async_mode: bool = False,
+                 body: bytes = None):
         self._session = session
         self._raw_response = underlying_response
         self._async_mode = async_mode
+        self._buffer = io.BytesIO(body) if body is not None else None
 
     @property
     def session(self) -> BaseSession:
@@ -394,29 +636,52 @@ class Response:
         return self._raw_response.content
 
     def text(self) -> str:
+        if self._buffer is not None:
+            coro = self._buffered_text()
+        else:
+            coro = self._raw_response.text()
         if self._async_mode:
-            return self._raw_response.text()
+            return coro
         else:
-            return self._session.worker_thread.execute(self._raw_response.text())
+            return self._session.worker_thread.execute(coro)
 
-    def json(self, *, loads=modjson.loads) -> Any:
-        loads = functools.partial(loads, object_pairs_hook=OrderedDict)
+    def json(self, *, loads: Callable[[str], Any] = None) -> Any:
+        '''
+        Decodes the response body as JSON using :func:`ai.backend.client.codec.loads`
+        or the given *loads* function.
+        '''
+        if loads is None:
+            loads = json_loads
+        if self._buffer is not None:
+            coro = self._buffered_json(loads)
+        else:
+            coro = self._raw_response.json(loads=loads)
         if self._async_mode:
-            return self._raw_response.json(loads=loads)
+            return coro
         else:
-            return self._session.worker_thread.execute(
-                self._raw_response.json(loads=loads))
+            return self._session.worker_thread.execute(coro)
+
+    async def _buffered_text(self) -> str:
+        encoding = self._raw_response.charset or 'utf-8'
+        return self._buffer.getvalue().decode(encoding)
+
+    async def _buffered_json(self, loads) -> Any:
+        return loads(await self._buffered_text())
 
     def read(self, n=-1) -> bytes:
         return self._session.worker_thread.execute(self.aread(n))
 
     async def aread(self, n=-1) -> bytes:
+        if self._buffer is not None:
+            return self._buffer.read(n)
         return await self._raw_response.content.read(n)
 
     def readall(self) -> bytes:
-        return self._session.worker_thread.execute(self._areadall())
+        return self._session.worker_thread.execute(self.areadall())
 
     async def areadall(self) -> bytes:
+        if self._buffer is not None:
+            return self._buffer.read()
         return await self._raw_response.content.read(-1)
 
 
@@ -429,21 +694,44 @@ class FetchContextManager:
 
     __slots__ = (
         'session', 'rqst_ctx_builder', 'response_cls',
-        'check_status',
+        'check_status', 'retry_policy', 'idempotent', 'hedge_policy',
+        'coalesce_key', 'response_cache', 'cache_name', 'cache_key',
+        'api_function', 'rate_limit_category', 'path',
         '_async_mode',
-        '_rqst_ctx',
+        '_rqst_ctx', '_timing',
     )
 
     def __init__(self, session: BaseSession,
-                 rqst_ctx_builder: Callable[[], _RequestContextManager], *,
+                 rqst_ctx_builder: Callable[[URL, RequestTiming], _RequestContextManager], *,
                  response_cls: Response = Response,
-                 check_status: bool = True):
+                 check_status: bool = True,
+                 retry_policy: RetryPolicy = None,
+                 idempotent: bool = False,
+                 hedge_policy: HedgePolicy = None,
+                 coalesce_key: Hashable = None,
+                 response_cache: ResponseCache = None,
+                 cache_name: str = None,
+                 cache_key: Hashable = None,
+                 api_function: str = None,
+                 rate_limit_category: str = 'mutate',
+                 path: str = ''):
         self.session = session
         self.rqst_ctx_builder = rqst_ctx_builder
         self.response_cls = response_cls
         self.check_status = check_status
+        self.retry_policy = retry_policy if retry_policy else session.retry_policy
+        self.idempotent = idempotent
+        self.hedge_policy = hedge_policy
+        self.coalesce_key = coalesce_key
+        self.response_cache = response_cache
+        self.cache_name = cache_name
+        self.cache_key = cache_key
+        self.api_function = api_function
+        self.rate_limit_category = rate_limit_category
+        self.path = path
         self._async_mode = True
         self._rqst_ctx = None
+        self._timing = None
 
     def __enter__(self):
         assert isinstance(self.session, SyncSession)
@@ -451,38 +739,222 @@ class FetchContextManager:
         return self.session.worker_thread.execute(self.__aenter__())
 
     async def __aenter__(self):
-        max_retries = len(self.session.config.endpoints)
-        retry_count = 0
+        if self.response_cache is None and self.coalesce_key is None:
+            return await self._enter()
+        if self.response_cache is not None:
+            cached = await self.response_cache.get(self.cache_name, self.cache_key)
+            if cached is not None:
+                return self.response_cls(self.session, cached,
+                                         async_mode=self._async_mode,
+                                         body=cached.body)
+        if self.coalesce_key is not None:
+            raw_resp, body = await self._enter_coalesced()
+        else:
+            raw_resp, body = await self._enter_buffered()
+        if self.response_cache is not None and raw_resp.status // 100 == 2:
+            await self.response_cache.set(
+                self.cache_name, self.cache_key,
+                raw_resp.status, raw_resp.reason, raw_resp.headers, body)
+        return self.response_cls(self.session, raw_resp,
+                                 async_mode=self._async_mode,
+                                 body=body)
+
+    async def _enter_buffered(self):
+        resp = await self._enter()
+        try:
+            body = await resp.raw_response.read()
+        finally:
+            await self._rqst_ctx.__aexit__(None, None, None)
+            self._rqst_ctx = None
+            self._timing.finish()
+        return resp.raw_response, body
+
+    async def _enter_coalesced(self):
+        # Identical concurrent requests share the result of the first one
+        # (the leader) whose response body is read into the memory.
+        inflight = self.session._inflight_reads
         while True:
+            fut = inflight.get(self.coalesce_key)
+            if fut is not None:
+                try:
+                    raw_resp, body = await asyncio.shield(fut)
+                except asyncio.CancelledError:
+                    if fut.cancelled():
+                        # The leader is cancelled. Retry by ourselves.
+                        continue
+                    raise
+                break
+            fut = current_loop().create_future()
+            inflight[self.coalesce_key] = fut
             try:
-                retry_count += 1
-                self._rqst_ctx = self.rqst_ctx_builder()
-                raw_resp = await self._rqst_ctx.__aenter__()
+                raw_resp, body = await self._enter_buffered()
+            except asyncio.CancelledError:
+                fut.cancel()
+                raise
+            except Exception as e:
+                fut.set_exception(e)
+                # Mark the exception as retrieved when there are no followers.
+                fut.exception()
+                raise
+            else:
+                fut.set_result((raw_resp, body))
+            finally:
+                del inflight[self.coalesce_key]
+            break
+        return raw_resp, body
+
+    async def _enter(self):
+        selector = self.session.config.endpoint_selector
+        rate_limiter = self.session.config.rate_limiter
+        policy = self.retry_policy
+        attempt = 0
+        tried_endpoints = set()
+        while True:
+            endpoint = selector.select(exclude=tried_endpoints)
+            tried_endpoints.add(endpoint)
+            attempt += 1
+            try:
+                if self.hedge_policy is not None:
+                    self._rqst_ctx, self._timing, raw_resp = await self._send_hedged(
+                        self.hedge_policy, selector, endpoint, tried_endpoints)
+                else:
+                    self._rqst_ctx, self._timing, raw_resp = await self._send(
+                        selector, endpoint)
+                if raw_resp.status == 429 and rate_limiter is not None:
+                    # The server has not processed the request, so it is safe
+                    # to retry even non-idempotent ones.
+                    delay = policy.get_delay(attempt, raw_resp.headers.get('Retry-After'))
+                    paused = rate_limiter.pause(endpoint, self.rate_limit_category, delay)
+                    if attempt < policy.max_attempts:
+                        await self._rqst_ctx.__aexit__(None, None, None)
+                        self._timing.finish(body_read=False)
+                        if not paused:
+                            await asyncio.sleep(delay)
+                        continue
+                if (attempt < policy.max_attempts and
+                        policy.should_retry_status(raw_resp.status, self.idempotent)):
+                    delay = policy.get_delay(attempt, raw_resp.headers.get('Retry-After'))
+                    await self._rqst_ctx.__aexit__(None, None, None)
+                    self._timing.finish(body_read=False)
+                    await asyncio.sleep(delay)
+                    continue
                 if self.check_status and raw_resp.status // 100 != 2:
                     msg = await raw_resp.text()
+                    self._timing.finish()
+                    await _check_api_version_mismatch(
+                        self.session, raw_resp.status, msg, self.path)
                     raise BackendAPIError(raw_resp.status, raw_resp.reason, msg)
                 return self.response_cls(self.session, raw_resp,
                                          async_mode=self._async_mode)
+            except CircuitOpenError:
+                if len(tried_endpoints) >= len(selector.endpoints):
+                    raise
+                # Try other endpoints without counting it as an attempt.
+                attempt -= 1
+                continue
             except aiohttp.ClientConnectionError as e:
-                if retry_count == max_retries:
+                if (attempt >= policy.max_attempts or
+                        not policy.should_retry_error(e, self.idempotent)):
                     msg = 'Request to the API endpoint has failed.\n' \
                           'Check your network connection and/or the server status.\n' \
                           '\u279c {!r}'.format(e)
                     raise BackendClientError(msg) from e
-                else:
-                    self.session.config.rotate_endpoints()
-                    continue
+                await asyncio.sleep(policy.get_delay(attempt))
+                continue
+            except asyncio.TimeoutError as e:
+                if (attempt >= policy.max_attempts or
+                        not policy.should_retry_error(e, self.idempotent)):
+                    raise
+                await asyncio.sleep(policy.get_delay(attempt))
+                continue
             except aiohttp.ClientResponseError as e:
                 msg = 'API endpoint response error.\n' \
                       '\u279c {!r}'.format(e)
                 raise BackendClientError(msg) from e
 
+    async def _send(
+        self,
+        selector: EndpointSelector,
+        endpoint: URL,
+    ) -> Tuple[_RequestContextManager, RequestTiming, aiohttp.ClientResponse]:
+        circuit_breakers = self.session.config.circuit_breakers
+        if circuit_breakers is None:
+            return await self._send_unguarded(selector, endpoint)
+        breaker = circuit_breakers.get(endpoint, self.path)
+        breaker.acquire()
+        try:
+            rqst_ctx, timing, raw_resp = await self._send_unguarded(selector, endpoint)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        # Server-side errors (5xx) are also counted as failures.
+        if raw_resp.status // 100 == 5:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return rqst_ctx, timing, raw_resp
+
+    async def _send_unguarded(
+        self,
+        selector: EndpointSelector,
+        endpoint: URL,
+    ) -> Tuple[_RequestContextManager, RequestTiming, aiohttp.ClientResponse]:
+        rate_limiter = self.session.config.rate_limiter
+        if rate_limiter is not None:
+            await rate_limiter.acquire(endpoint, self.rate_limit_category)
+        timing = self.session.metrics.start_request(endpoint, self.api_function)
+        rqst_ctx = self.rqst_ctx_builder(endpoint, timing)
+        raw_resp = await _measure_latency(selector, endpoint, rqst_ctx.__aenter__())
+        return rqst_ctx, timing, raw_resp
+
+    async def _send_hedged(
+        self,
+        hedge_policy: HedgePolicy,
+        selector: EndpointSelector,
+        endpoint: URL,
+        tried_endpoints: set,
+    ) -> Tuple[_RequestContextManager, RequestTiming, aiohttp.ClientResponse]:
+        primary = asyncio.ensure_future(self._send(selector, endpoint))
+        done, _ = await asyncio.wait([primary], timeout=hedge_policy.get_delay(selector))
+        if done:
+            return primary.result()
+        hedge_endpoint = selector.select(exclude=tried_endpoints)
+        if hedge_endpoint in tried_endpoints:
+            # There is no other endpoint to send the duplicate.
+            return await primary
+        tried_endpoints.add(hedge_endpoint)
+        hedge = asyncio.ensure_future(self._send(selector, hedge_endpoint))
+        tasks = [primary, hedge]
+        winner: Optional[asyncio.Future] = None
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return task.result()
+            # Both have failed.
+            return primary.result()
+        finally:
+            for task in tasks:
+                if task is not winner:
+                    await _discard_hedged_request(task)
+
     def __exit__(self, *args):
         return self.session.worker_thread.execute(self.__aexit__(*args))
 
     async def __aexit__(self, *args):
+        if self._rqst_ctx is None:
+            # The response is already read into the memory and released.
+            return None
         ret = await self._rqst_ctx.__aexit__(*args)
         self._rqst_ctx = None
+        self._timing.finish()
         return ret
 
 
@@ -560,28 +1032,42 @@ class WebSocketContextManager:
 
     __slots__ = (
         'session', 'ws_ctx_builder', 'response_cls',
-        'on_enter',
+        'on_enter', 'api_function',
         '_ws_ctx',
     )
 
     def __init__(self, session: BaseSession,
-                 ws_ctx_builder: Callable[[], _WSRequestContextManager], *,
+                 ws_ctx_builder: Callable[[URL], _WSRequestContextManager], *,
                  on_enter: Callable = None,
-                 response_cls: WebSocketResponse = WebSocketResponse):
+                 response_cls: WebSocketResponse = WebSocketResponse,
+                 api_function: str = None):
         self.session = session
         self.ws_ctx_builder = ws_ctx_builder
         self.response_cls = response_cls
         self.on_enter = on_enter
+        self.api_function = api_function
         self._ws_ctx = None
 
     async def __aenter__(self):
+        selector = self.session.config.endpoint_selector
         max_retries = len(self.session.config.endpoints)
         retry_count = 0
+        tried_endpoints = set()
         while True:
+            endpoint = selector.select(exclude=tried_endpoints)
+            tried_endpoints.add(endpoint)
             try:
                 retry_count += 1
-                self._ws_ctx = self.ws_ctx_builder()
-                raw_ws = await self._ws_ctx.__aenter__()
+                timing = self.session.metrics.start_request(
+                    endpoint, self.api_function, record_body=False)
+                self._ws_ctx = self.ws_ctx_builder(endpoint)
+                set_pending_timing(timing)
+                try:
+                    raw_ws = await _measure_latency(
+                        selector, endpoint, self._ws_ctx.__aenter__())
+                finally:
+                    set_pending_timing(None)
+                timing.finish()
             except aiohttp.ClientConnectionError as e:
                 if retry_count == max_retries:
                     msg = 'Request to the API endpoint has failed.\n' \
@@ -589,7 +1075,6 @@ class WebSocketContextManager:
                           'Error detail: {!r}'.format(e)
                     raise BackendClientError(msg) from e
                 else:
-                    self.session.config.rotate_endpoints()
                     continue
             except aiohttp.ClientResponseError as e:
                 msg = 'API endpoint response error.\n' \
@@ -665,28 +1150,42 @@ class SSEResponse(Response):
 class SSEContextManager:
 
     __slots__ = (
-        'session', 'rqst_ctx_builder', 'response_cls',
+        'session', 'rqst_ctx_builder', 'response_cls', 'api_function', 'path',
         '_rqst_ctx',
     )
 
     def __init__(self, session: BaseSession,
-                 rqst_ctx_builder: Callable[[], _RequestContextManager], *,
-                 response_cls: SSEResponse = SSEResponse):
+                 rqst_ctx_builder: Callable[[URL, RequestTiming], _RequestContextManager], *,
+                 response_cls: SSEResponse = SSEResponse,
+                 api_function: str = None,
+                 path: str = ''):
         self.session = session
         self.rqst_ctx_builder = rqst_ctx_builder
         self.response_cls = response_cls
+        self.api_function = api_function
+        self.path = path
         self._rqst_ctx = None
 
     async def __aenter__(self):
+        selector = self.session.config.endpoint_selector
         max_retries = len(self.session.config.endpoints)
         retry_count = 0
+        tried_endpoints = set()
         while True:
+            endpoint = selector.select(exclude=tried_endpoints)
+            tried_endpoints.add(endpoint)
             try:
                 retry_count += 1
-                self._rqst_ctx = self.rqst_ctx_builder()
-                raw_resp = await self._rqst_ctx.__aenter__()
+                timing = self.session.metrics.start_request(
+                    endpoint, self.api_function, record_body=False)
+                self._rqst_ctx = self.rqst_ctx_builder(endpoint, timing)
+                raw_resp = await _measure_latency(
+                    selector, endpoint, self._rqst_ctx.__aenter__())
+                timing.finish()
                 if raw_resp.status // 100 != 2:
                     msg = await raw_resp.text()
+                    await _check_api_version_mismatch(
+                        self.session, raw_resp.status, msg, self.path)
                     raise BackendAPIError(raw_resp.status, raw_resp.reason, msg)
                 return self.response_cls(self.session, raw_resp)
             except aiohttp.ClientConnectionError as e:
@@ -696,7 +1195,6 @@ class SSEContextManager:
                           '\u279c {!r}'.format(e)
                     raise BackendClientError(msg) from e
                 else:
-                    self.session.config.rotate_endpoints()
                     continue
             except aiohttp.ClientResponseError as e:
                 msg = 'API endpoint response error.\n' \
@@ -0,0 +1,100 @@
+import asyncio
+import random
+from typing import AbstractSet, Optional
+
+import aiohttp
+
+__all__ = (
+    'RetryPolicy',
+    'NO_RETRY',
+)
+
+
+class RetryPolicy:
+    '''
+    Decides whether and when to retry a failed API request.
+
+    Connection failures before sending anything to the server are always
+    retried.  Other failures -- broken connections, timeouts, and the
+    *retry_statuses* responses -- are retried only for idempotent requests
+    by default, because the server might have already processed the request.
+    Requests with streamed bodies (e.g., file uploads) are treated as
+    non-idempotent since they cannot be sent again.
+
+    The delay between attempts grows exponentially from *base_delay* up to
+    *max_delay* with "full jitter", and a larger ``Retry-After`` response
+    header value takes precedence.
+
+    :param max_attempts: The maximum number of attempts including the first one.
+    :param base_delay: The upper bound of the first delay in seconds.
+    :param max_delay: The upper bound of the exponentially growing delays in seconds.
+    :param retry_statuses: The set of HTTP status codes to retry.
+    :param retry_timeouts: Whether to retry on timeouts.
+    :param retry_non_idempotent: Apply the idempotent-request rules to all requests.
+    '''
+
+    idempotent_methods = frozenset([
+        'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS',
+    ])
+
+    def __init__(self, *,
+                 max_attempts: int = 3,
+                 base_delay: float = 0.1,
+                 max_delay: float = 5.0,
+                 retry_statuses: AbstractSet[int] = frozenset({502, 503, 504}),
+                 retry_timeouts: bool = True,
+                 retry_non_idempotent: bool = False) -> None:
+        assert max_attempts >= 1, 'max_attempts must be a positive integer.'
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_timeouts = retry_timeouts
+        self.retry_non_idempotent = retry_non_idempotent
+
+    def is_idempotent(self, method: str) -> bool:
+        return self.retry_non_idempotent or method.upper() in self.idempotent_methods
+
+    def should_retry_status(self, status: int, idempotent: bool) -> bool:
+        return idempotent and status in self.retry_statuses
+
+    def should_retry_error(self, error: BaseException, idempotent: bool) -> bool:
+        if isinstance(error, aiohttp.ClientConnectorError):
+            # The request has not reached the server at all.
+            return True
+        if not idempotent:
+            return False
+        if isinstance(error, asyncio.TimeoutError):
+            return self.retry_timeouts
+        return isinstance(error, aiohttp.ClientConnectionError)
+
+    def get_delay(self, attempt: int, retry_after: str = None) -> float:
+        '''
+        Returns the number of seconds to wait before the next attempt.
+
+        :param attempt: The number of attempts made so far.
+        :param retry_after: The ``Retry-After`` header value of the last response.
+        '''
+        delay = random.uniform(0, min(self.max_delay,
+                                      self.base_delay * (2 ** (attempt - 1))))
+        server_delay = _parse_retry_after(retry_after)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        return delay
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # We only support the delay-seconds form since the HTTP-date form
+    # depends on the clock synchronization with the server.
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+'''
+A retry policy which never retries.
+'''
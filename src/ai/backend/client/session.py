@@ -1,21 +1,36 @@
 import abc
 import asyncio
+import atexit
+import functools
+import importlib
+import logging
 import threading
-from typing import Tuple
-import queue
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
 import warnings
+import weakref
 
 import aiohttp
 from multidict import CIMultiDict
 
-from .config import APIConfig, get_config, parse_api_version
+from .cache import ResponseCache, get_default_cache
+from .compat import current_loop
+from .config import APIConfig, get_config, local_state_path, parse_api_version
+from .cookie import PersistentCookieJar
 from .exceptions import APIVersionWarning
+from .hedging import HedgePolicy
+from .metrics import SessionMetrics
+from .retry import RetryPolicy
+from .versioning import APIVersionCache, get_default_version_cache
 
 
+log = logging.getLogger('ai.backend.client.session')
+
 __all__ = (
     'BaseSession',
     'Session',
     'AsyncSession',
+    'ClientPool',
+    'get_default_client_pool',
 )
 
 
@@ -24,19 +39,18 @@ def is_legacy_server():
     Determine execution mode.
 
     Legacy mode: <= v4.20181215
+
+    It opens a new session for the check.  Prefer
+    :attr:`BaseSession.is_legacy_server` of an existing session.
     """
     with Session() as session:
-        ret = session.ComputeSession.hello()
-    bai_version = ret['version']
-    legacy = True if bai_version <= 'v4.20181215' else False
-    return legacy
+        return session.is_legacy_server
 
 
-async def _negotiate_api_version(
+async def _fetch_server_version(
     http_session: aiohttp.ClientSession,
     config: APIConfig,
-) -> Tuple[int, str]:
-    client_version = parse_api_version(config.version)
+) -> Optional[str]:
     try:
         timeout_config = aiohttp.ClientTimeout(
             total=None, connect=None,
@@ -50,55 +64,415 @@ async def _negotiate_api_version(
         async with http_session.get(probe_url, timeout=timeout_config, headers=headers) as resp:
             resp.raise_for_status()
             server_info = await resp.json()
-            server_version = parse_api_version(server_info['version'])
-            if server_version > client_version:
-                warnings.warn(
-                    'The server API version is higher than the client. '
-                    'Please upgrade the client package.',
-                    category=APIVersionWarning,
-                )
-            return min(server_version, client_version)
+            return server_info['version']
     except (asyncio.TimeoutError, aiohttp.ClientError):
-        # fallback to the configured API version
+        return None
+
+
+async def _refresh_server_version(
+    http_session: aiohttp.ClientSession,
+    config: APIConfig,
+    version_cache: APIVersionCache,
+) -> None:
+    server_version = await _fetch_server_version(http_session, config)
+    if server_version is not None:
+        await current_loop().run_in_executor(
+            None, version_cache.set, version_cache.make_key(config), server_version)
+
+
+_version_refresh_tasks: 'weakref.WeakKeyDictionary[aiohttp.ClientSession, asyncio.Task]' = \
+    weakref.WeakKeyDictionary()
+
+
+async def _negotiate_api_version(
+    http_session: aiohttp.ClientSession,
+    config: APIConfig,
+) -> Tuple[int, str]:
+    client_version = parse_api_version(config.version)
+    version_cache = None
+    server_version = None
+    if config.api_version_cache_ttl > 0:
+        version_cache = get_default_version_cache()
+        cached = await current_loop().run_in_executor(
+            None, version_cache.get,
+            version_cache.make_key(config), config.api_version_cache_ttl)
+        if cached is not None:
+            server_version, age = cached
+            if age > config.api_version_cache_ttl / 2 and \
+                    http_session not in _version_refresh_tasks:
+                # Refresh the aging entry without delaying the session.
+                _version_refresh_tasks[http_session] = current_loop().create_task(
+                    _refresh_server_version(http_session, config, version_cache))
+    if server_version is None:
+        server_version = await _fetch_server_version(http_session, config)
+        if server_version is None:
+            # fallback to the configured API version
+            return client_version
+        if version_cache is not None:
+            await current_loop().run_in_executor(
+                None, version_cache.set, version_cache.make_key(config), server_version)
+    try:
+        parsed_server_version = parse_api_version(server_version)
+    except ValueError:
         return client_version
+    if parsed_server_version > client_version:
+        warnings.warn(
+            'The server API version is higher than the client. '
+            'Please upgrade the client package.',
+            category=APIVersionWarning,
+        )
+    return min(parsed_server_version, client_version)
+
+
+def _create_cookie_jar(config: APIConfig) -> Optional[aiohttp.CookieJar]:
+    if config.endpoint_type == 'session':
+        return PersistentCookieJar(local_state_path / 'cookie.dat')
+    return None
+
+
+async def _close_aiohttp_session(http_session: aiohttp.ClientSession) -> None:
+    refresh_task = _version_refresh_tasks.pop(http_session, None)
+    if refresh_task is not None and not refresh_task.done():
+        refresh_task.cancel()
+        await asyncio.gather(refresh_task, return_exceptions=True)
+    cookie_jar = http_session.cookie_jar
+    if isinstance(cookie_jar, PersistentCookieJar):
+        await cookie_jar.flush()
+    await http_session.close()
+
+
+ConnectorFactory = Callable[[APIConfig], aiohttp.BaseConnector]
+'''
+The type of functions creating the aiohttp connectors of sessions.
+'''
+
+
+def _create_connector(config: APIConfig) -> aiohttp.BaseConnector:
+    if config.unix_socket_path is not None:
+        unix_connector_opts = {
+            'limit': config.connection_pool_size,
+            'limit_per_host': config.connection_pool_size_per_host,
+            'force_close': config.force_close,
+        }
+        if not config.force_close:
+            unix_connector_opts['keepalive_timeout'] = config.keepalive_timeout
+        return aiohttp.UnixConnector(config.unix_socket_path, **unix_connector_opts)
+    ssl = None
+    if config.skip_sslcert_validation:
+        ssl = False
+    connector_opts = {
+        'ssl': ssl,
+        'limit': config.connection_pool_size,
+        'limit_per_host': config.connection_pool_size_per_host,
+        'ttl_dns_cache': config.dns_cache_ttl,
+        'force_close': config.force_close,
+    }
+    if not config.force_close:
+        connector_opts['keepalive_timeout'] = config.keepalive_timeout
+    return aiohttp.TCPConnector(**connector_opts)
 
 
 class _SyncWorkerThread(threading.Thread):
-
-    sentinel = object()
+    '''
+    Runs a dedicated event loop forever so that multiple application threads
+    can submit coroutines concurrently.  Each call gets its own future, so
+    results are never mixed up between the callers.
+    '''
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.work_queue = queue.Queue()
-        self.done_queue = queue.Queue()
+        self.loop = asyncio.new_event_loop()
 
     def run(self):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        asyncio.set_event_loop(self.loop)
         try:
-            while True:
-                coro = self.work_queue.get()
-                if coro is self.sentinel:
-                    break
-                try:
-                    result = loop.run_until_complete(coro)
-                except Exception as e:
-                    self.done_queue.put_nowait(e)
-                else:
-                    self.done_queue.put_nowait(result)
-                self.work_queue.task_done()
+            self.loop.run_forever()
         except (SystemExit, KeyboardInterrupt):
             pass
         finally:
-            loop.stop()
+            self.loop.close()
 
     def execute(self, coro):
-        self.work_queue.put(coro)
-        result = self.done_queue.get()
-        self.done_queue.task_done()
-        if isinstance(result, Exception):
-            raise result
-        return result
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return fut.result()
+        except BaseException:
+            fut.cancel()
+            raise
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class _PooledClient:
+
+    __slots__ = ('key', 'loop', 'http_session', 'refcount', 'close_handle')
+
+    def __init__(self, key: Hashable, loop: asyncio.AbstractEventLoop,
+                 http_session: aiohttp.ClientSession) -> None:
+        self.key = key
+        self.loop = loop
+        self.http_session = http_session
+        self.refcount = 0
+        self.close_handle: Optional[asyncio.Handle] = None
+
+
+def _discard_client(http_session: aiohttp.ClientSession) -> None:
+    # The event loop of the client is already closed, so nothing can be awaited.
+    # The connector closes itself synchronously and returns a no-op awaitable
+    # which warns when not awaited.
+    connector = http_session.connector
+    if connector is not None and not connector.closed:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            connector.close()
+
+
+class ClientPool:
+    '''
+    Shares the underlying aiohttp client sessions and their connection pools
+    among multiple :class:`Session` and :class:`AsyncSession` instances, so that
+    short-lived sessions reuse warm keep-alive connections instead of making new
+    TCP and TLS handshakes.
+
+    The clients are separated by the event loop, the access key, and the
+    connection settings of the configuration (the endpoints, the endpoint type,
+    the SSL settings, and the connection pool options), and reference-counted by
+    the sessions using them.  Separating the access keys keeps the cookies of
+    different identities apart.  A client no longer used by any session is kept for *idle_timeout*
+    seconds for the next session and then closed.  The remaining clients are
+    closed at the interpreter exit.
+
+    All :class:`Session` instances using the same pool share a single worker
+    thread running the event loop of their clients.
+
+    :param idle_timeout: The number of seconds to keep an unused client.
+        Zero closes it immediately.
+    '''
+
+    __slots__ = ('idle_timeout', '_clients', '_clients_by_session',
+                 '_worker_thread', '_lock', '__weakref__')
+
+    def __init__(self, *, idle_timeout: float = 60.0) -> None:
+        self.idle_timeout = idle_timeout
+        self._clients: Dict[Hashable, _PooledClient] = {}
+        self._clients_by_session: Dict[aiohttp.ClientSession, _PooledClient] = {}
+        self._worker_thread: Optional[_SyncWorkerThread] = None
+        self._lock = threading.Lock()
+        _live_client_pools.add(self)
+
+    @staticmethod
+    def make_key(config: APIConfig,
+                 connector_factory: ConnectorFactory = None) -> Hashable:
+        '''
+        Returns the key of the configuration to separate the shared clients.
+        '''
+        return (
+            config.endpoint_type,
+            config.access_key,
+            tuple(sorted(str(e) for e in config.endpoints)),
+            config.unix_socket_path,
+            config.skip_sslcert_validation,
+            config.connection_pool_size,
+            config.connection_pool_size_per_host,
+            config.keepalive_timeout,
+            config.dns_cache_ttl,
+            config.force_close,
+            connector_factory,
+        )
+
+    @property
+    def worker_thread(self) -> _SyncWorkerThread:
+        '''
+        The worker thread shared by the synchronous sessions using this pool.
+        It is started on the first access.
+        '''
+        with self._lock:
+            if self._worker_thread is None:
+                self._worker_thread = _SyncWorkerThread(daemon=True)
+                self._worker_thread.start()
+            return self._worker_thread
+
+    def acquire(self, config: APIConfig,
+                connector_factory: ConnectorFactory = None) -> aiohttp.ClientSession:
+        '''
+        Returns the shared client for the given configuration in the current
+        event loop, creating a new one if there is none.
+        It must be called in the thread running the event loop, and each call
+        must be paired with :meth:`release`.
+        '''
+        loop = asyncio.get_event_loop()
+        key = (loop, self.make_key(config, connector_factory))
+        with self._lock:
+            self._discard_stale_clients()
+            client = self._clients.get(key)
+            if client is None:
+                if connector_factory is None:
+                    connector_factory = _create_connector
+                http_session = aiohttp.ClientSession(
+                    connector=connector_factory(config),
+                    cookie_jar=_create_cookie_jar(config),
+                    trace_configs=[SessionMetrics.create_trace_config()])
+                client = _PooledClient(key, loop, http_session)
+                self._clients[key] = client
+                self._clients_by_session[http_session] = client
+            if client.close_handle is not None:
+                client.close_handle.cancel()
+                client.close_handle = None
+            client.refcount += 1
+            return client.http_session
+
+    async def release(self, http_session: aiohttp.ClientSession) -> None:
+        '''
+        Gives back the client returned by :meth:`acquire`.
+        '''
+        with self._lock:
+            client = self._clients_by_session.get(http_session)
+            if client is None:
+                return
+            client.refcount -= 1
+            if client.refcount > 0:
+                return
+            if self.idle_timeout > 0:
+                client.close_handle = client.loop.call_later(
+                    self.idle_timeout, self._close_idle_client, client)
+                return
+            self._remove(client)
+        await _close_aiohttp_session(http_session)
+
+    async def close(self) -> None:
+        '''
+        Closes the unused clients in the current event loop, e.g., before
+        finishing the event loop.
+        '''
+        loop = current_loop()
+        with self._lock:
+            idle_clients = [
+                client for client in self._clients.values()
+                if client.loop is loop and client.refcount == 0
+            ]
+            for client in idle_clients:
+                self._remove(client)
+        for client in idle_clients:
+            await _close_aiohttp_session(client.http_session)
+
+    def _remove(self, client: _PooledClient) -> None:
+        if client.close_handle is not None:
+            client.close_handle.cancel()
+            client.close_handle = None
+        del self._clients[client.key]
+        del self._clients_by_session[client.http_session]
+
+    def _close_idle_client(self, client: _PooledClient) -> None:
+        with self._lock:
+            client.close_handle = None
+            if client.refcount > 0 or self._clients.get(client.key) is not client:
+                return
+            self._remove(client)
+        client.loop.create_task(_close_aiohttp_session(client.http_session))
+
+    def _discard_stale_clients(self) -> None:
+        for client in [*self._clients.values()]:
+            if client.loop.is_closed():
+                self._remove(client)
+                _discard_client(client.http_session)
+
+    def _close_at_exit(self) -> None:
+        with self._lock:
+            clients: List[_PooledClient] = [*self._clients.values()]
+            for client in clients:
+                self._remove(client)
+            worker_thread = self._worker_thread
+            self._worker_thread = None
+
+        async def _close_all(loop_clients):
+            await asyncio.gather(*[
+                _close_aiohttp_session(client.http_session)
+                for client in loop_clients
+            ], return_exceptions=True)
+
+        for client in clients:
+            if worker_thread is not None and client.loop is worker_thread.loop:
+                continue
+            if client.loop.is_closed() or client.loop.is_running():
+                _discard_client(client.http_session)
+            else:
+                client.loop.run_until_complete(_close_all([client]))
+        if worker_thread is not None:
+            try:
+                worker_thread.execute(_close_all([
+                    client for client in clients
+                    if client.loop is worker_thread.loop
+                ]))
+            finally:
+                worker_thread.stop()
+                worker_thread.join()
+
+
+# The pools to close at the interpreter exit, without keeping them alive.
+_live_client_pools: 'weakref.WeakSet[ClientPool]' = weakref.WeakSet()
+
+
+@atexit.register
+def _close_client_pools_at_exit() -> None:
+    for pool in [*_live_client_pools]:
+        pool._close_at_exit()
+
+
+_default_client_pool: Optional[ClientPool] = None
+_default_client_pool_lock = threading.Lock()
+
+
+def get_default_client_pool() -> ClientPool:
+    '''
+    Returns the process-wide :class:`ClientPool` instance used by the sessions
+    when :attr:`~ai.backend.client.config.APIConfig.shared_client_pool` is set.
+    '''
+    global _default_client_pool
+    with _default_client_pool_lock:
+        if _default_client_pool is None:
+            _default_client_pool = ClientPool()
+        return _default_client_pool
+
+
+@functools.lru_cache(maxsize=None)
+def _get_function_class(module_name: str, class_name: str) -> type:
+    # Wrap the API functions only once per process.
+    from .func.base import BaseFunction
+    module = importlib.import_module(f'.func.{module_name}', __package__)
+    orig_cls = getattr(module, class_name)
+    return type(class_name, (BaseFunction, ), {
+        **orig_cls.__dict__,
+        'session': None,
+    })
+
+
+class _FunctionProxy:
+    '''
+    A descriptor which provides an API function class bound to the session
+    instance.  The bound class is a lightweight subclass of the process-wide
+    wrapped function class, created on the first access and cached per session.
+    '''
+
+    def __init__(self, module_name: str, class_name: str) -> None:
+        self.module_name = module_name
+        self.class_name = class_name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        proxies = instance._func_proxies
+        proxy_cls = proxies.get(self.class_name)
+        if proxy_cls is None:
+            base_cls = _get_function_class(self.module_name, self.class_name)
+            proxy_cls = type(self.class_name, (base_cls, ), {
+                '__module__': base_cls.__module__,
+                '__doc__': base_cls.__doc__,
+                'session': instance,
+            })
+            # Another thread may have created one concurrently.
+            proxy_cls = proxies.setdefault(self.class_name, proxy_cls)
+        return proxy_cls
 
 
 class BaseSession(metaclass=abc.ABCMeta):
@@ -108,22 +482,150 @@ class BaseSession(metaclass=abc.ABCMeta):
 
     __slots__ = (
         '_config', '_closed', 'aiohttp_session',
-        'api_version',
-        'System', 'Manager', 'Admin',
-        'Agent', 'AgentWatcher', 'ScalingGroup',
-        'Image', 'ComputeSession', 'SessionTemplate',
-        'Domain', 'Group', 'Auth', 'User', 'KeyPair',
-        'EtcdConfig',
-        'Resource', 'KeypairResourcePolicy',
-        'VFolder',
+        '_retry_policy', '_hedge_policy',
+        '_coalesce_reads', '_inflight_reads', '_response_cache',
+        '_metrics', '_connector_factory', '_client_pool',
+        'api_version', '_api_version_verified', '_is_admin', '_func_proxies',
     )
 
     aiohttp_session: aiohttp.ClientSession
     api_version: Tuple[int, str]
 
-    def __init__(self, *, config: APIConfig = None):
+    System = _FunctionProxy('system', 'System')
+    '''
+    The :class:`~ai.backend.client.func.system.System` function proxy
+    bound to this session.
+    '''
+
+    Admin = _FunctionProxy('admin', 'Admin')
+    '''
+    The :class:`~ai.backend.client.func.admin.Admin` function proxy
+    bound to this session.
+    '''
+
+    Agent = _FunctionProxy('agent', 'Agent')
+    '''
+    The :class:`~ai.backend.client.func.agent.Agent` function proxy
+    bound to this session.
+    '''
+
+    AgentWatcher = _FunctionProxy('agent', 'AgentWatcher')
+    '''
+    The :class:`~ai.backend.client.func.agent.AgentWatcher` function proxy
+    bound to this session.
+    '''
+
+    Auth = _FunctionProxy('auth', 'Auth')
+    '''
+    The :class:`~ai.backend.client.func.auth.Auth` function proxy
+    bound to this session.
+    '''
+
+    EtcdConfig = _FunctionProxy('etcd', 'EtcdConfig')
+    '''
+    The :class:`~ai.backend.client.func.etcd.EtcdConfig` function proxy
+    bound to this session.
+    '''
+
+    Domain = _FunctionProxy('domain', 'Domain')
+    '''
+    The :class:`~ai.backend.client.func.domain.Domain` function proxy
+    bound to this session.
+    '''
+
+    Group = _FunctionProxy('group', 'Group')
+    '''
+    The :class:`~ai.backend.client.func.group.Group` function proxy
+    bound to this session.
+    '''
+
+    Image = _FunctionProxy('image', 'Image')
+    '''
+    The :class:`~ai.backend.client.func.image.Image` function proxy
+    bound to this session.
+    '''
+
+    ComputeSession = _FunctionProxy('session', 'ComputeSession')
+    '''
+    The :class:`~ai.backend.client.func.session.ComputeSession` function proxy
+    bound to this session.
+    '''
+
+    KeyPair = _FunctionProxy('keypair', 'KeyPair')
+    '''
+    The :class:`~ai.backend.client.func.keypair.KeyPair` function proxy
+    bound to this session.
+    '''
+
+    Manager = _FunctionProxy('manager', 'Manager')
+    '''
+    The :class:`~ai.backend.client.func.manager.Manager` function proxy
+    bound to this session.
+    '''
+
+    Resource = _FunctionProxy('resource', 'Resource')
+    '''
+    The :class:`~ai.backend.client.func.resource.Resource` function proxy
+    bound to this session.
+    '''
+
+    KeypairResourcePolicy = _FunctionProxy('keypair_resource_policy', 'KeypairResourcePolicy')
+    '''
+    The :class:`~ai.backend.client.func.keypair_resource_policy.KeypairResourcePolicy` function proxy
+    bound to this session.
+    '''
+
+    User = _FunctionProxy('user', 'User')
+    '''
+    The :class:`~ai.backend.client.func.user.User` function proxy
+    bound to this session.
+    '''
+
+    ScalingGroup = _FunctionProxy('scaling_group', 'ScalingGroup')
+    '''
+    The :class:`~ai.backend.client.func.scaling_group.ScalingGroup` function proxy
+    bound to this session.
+    '''
+
+    SessionTemplate = _FunctionProxy('session_template', 'SessionTemplate')
+    '''
+    The :class:`~ai.backend.client.func.session_template.SessionTemplate` function proxy
+    bound to this session.
+    '''
+
+    VFolder = _FunctionProxy('vfolder', 'VFolder')
+    '''
+    The :class:`~ai.backend.client.func.vfolder.VFolder` function proxy
+    bound to this session.
+    '''
+
+    def __init__(self, *, config: APIConfig = None,
+                 retry_policy: RetryPolicy = None,
+                 hedge_policy: HedgePolicy = None,
+                 coalesce_reads: bool = False,
+                 response_cache: ResponseCache = None,
+                 metrics: SessionMetrics = None,
+                 connector_factory: ConnectorFactory = None,
+                 client_pool: ClientPool = None):
         self._closed = False
         self._config = config if config else get_config()
+        self._retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self._hedge_policy = hedge_policy
+        self._coalesce_reads = coalesce_reads
+        self._inflight_reads: Dict[Hashable, asyncio.Future] = {}
+        if response_cache is None and self._config.response_cache:
+            response_cache = get_default_cache()
+        self._response_cache = response_cache
+        self._metrics = metrics if metrics is not None else SessionMetrics()
+        self._connector_factory = connector_factory
+        if client_pool is None and self._config.shared_client_pool:
+            client_pool = get_default_client_pool()
+        self._client_pool = client_pool
+        # The negotiated API version may come from the version cache
+        # until it is checked against the server.
+        self._api_version_verified = self._config.api_version_cache_ttl <= 0
+        self._is_admin: Optional[bool] = None
+        self._func_proxies: Dict[str, type] = {}
 
     @abc.abstractmethod
     def close(self):
@@ -146,227 +648,172 @@ class BaseSession(metaclass=abc.ABCMeta):
         """
         return self._config
 
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """
+        The default retry policy for the API requests made via this session.
+        """
+        return self._retry_policy
 
-class Session(BaseSession):
-    """
-    An API client session that makes API requests synchronously.
-    You may call (almost) all function proxy methods like a plain Python function.
-    It provides a context manager interface to ensure closing of the session
-    upon errors and scope exits.
-    """
-
-    __slots__ = BaseSession.__slots__ + (
-        '_worker_thread',
-    )
-
-    def __init__(self, *, config: APIConfig = None) -> None:
-        super().__init__(config=config)
-        self._worker_thread = _SyncWorkerThread()
-        self._worker_thread.start()
-
-        async def _create_aiohttp_session() -> aiohttp.ClientSession:
-            ssl = None
-            if self._config.skip_sslcert_validation:
-                ssl = False
-            connector = aiohttp.TCPConnector(ssl=ssl)
-            return aiohttp.ClientSession(connector=connector)
-
-        self.aiohttp_session = self.worker_thread.execute(_create_aiohttp_session())
-
-        from .func.base import BaseFunction
-        from .func.system import System
-        from .func.admin import Admin
-        from .func.agent import Agent, AgentWatcher
-        from .func.auth import Auth
-        from .func.etcd import EtcdConfig
-        from .func.domain import Domain
-        from .func.group import Group
-        from .func.image import Image
-        from .func.session import ComputeSession
-        from .func.keypair import KeyPair
-        from .func.manager import Manager
-        from .func.resource import Resource
-        from .func.keypair_resource_policy import KeypairResourcePolicy
-        from .func.scaling_group import ScalingGroup
-        from .func.session_template import SessionTemplate
-        from .func.user import User
-        from .func.vfolder import VFolder
-
-        self.System = type('System', (BaseFunction, ), {
-            **System.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.system.System` function proxy
-        bound to this session.
-        '''
-
-        self.Admin = type('Admin', (BaseFunction, ), {
-            **Admin.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.admin.Admin` function proxy
-        bound to this session.
-        '''
-
-        self.Agent = type('Agent', (BaseFunction, ), {
-            **Agent.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.agent.Agent` function proxy
-        bound to this session.
-        '''
-
-        self.AgentWatcher = type('AgentWatcher', (BaseFunction, ), {
-            **AgentWatcher.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.agent.AgentWatcher` function proxy
-        bound to this session.
-        '''
+    @property
+    def hedge_policy(self) -> Optional[HedgePolicy]:
+        """
+        The default hedging policy for the read-only API requests made via
+        this session.  Hedging is disabled if this is ``None``.
+        """
+        return self._hedge_policy
 
-        self.Auth = type('Auth', (BaseFunction, ), {
-            **Auth.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.Auth` function proxy
-        bound to this session.
-        '''
+    @property
+    def coalesce_reads(self) -> bool:
+        """
+        Whether identical read-only API requests running concurrently in this
+        session share a single round trip to the server.
+        """
+        return self._coalesce_reads
 
-        self.EtcdConfig = type('EtcdConfig', (BaseFunction, ), {
-            **EtcdConfig.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.EtcdConfig` function proxy
-        bound to this session.
-        '''
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        """
+        The response cache for slow-changing read-only API functions.
+        Caching is disabled if this is ``None``.
+        """
+        return self._response_cache
 
-        self.Domain = type('Domain', (BaseFunction, ), {
-            **Domain.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.agent.Domain` function proxy
-        bound to this session.
-        '''
+    @property
+    def metrics(self) -> SessionMetrics:
+        """
+        The timing histograms of the API requests made via this session,
+        per API endpoint and per API function.
+        """
+        return self._metrics
 
-        self.Group = type('Group', (BaseFunction, ), {
-            **Group.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.agent.Group` function proxy
-        bound to this session.
-        '''
+    @property
+    def client_pool(self) -> Optional[ClientPool]:
+        """
+        The :class:`ClientPool` instance which shares the underlying aiohttp
+        client session of this session with others.  This session owns a
+        private client if this is ``None``.
+        """
+        return self._client_pool
+
+    def _create_aiohttp_session(self) -> aiohttp.ClientSession:
+        if self._client_pool is not None:
+            return self._client_pool.acquire(self._config, self._connector_factory)
+        connector_factory = self._connector_factory
+        if connector_factory is None:
+            connector_factory = _create_connector
+        return aiohttp.ClientSession(
+            connector=connector_factory(self._config),
+            cookie_jar=_create_cookie_jar(self._config),
+            trace_configs=[SessionMetrics.create_trace_config()])
+
+    async def _close_aiohttp_session(self) -> None:
+        if self._client_pool is not None:
+            await self._client_pool.release(self.aiohttp_session)
+        else:
+            await _close_aiohttp_session(self.aiohttp_session)
 
-        self.Image = type('Image', (BaseFunction, ), {
-            **Image.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.image.Image` function proxy
-        bound to this session.
-        '''
+    @property
+    def is_legacy_server(self) -> bool:
+        """
+        Checks if the server is a legacy one (API v4.20181215 or older)
+        using the API version negotiated when entering the session context.
+        """
+        return self.api_version <= (4, '20181215')
 
-        self.ComputeSession = type('ComputeSession', (BaseFunction, ), {
-            **ComputeSession.__dict__,
-            'session': self,
-        })
+    async def _verify_api_version(self) -> None:
         '''
-        The :class:`~ai.backend.client.kernel.ComputeSession` function proxy
-        bound to this session.
+        Negotiates the API version again bypassing the version cache, e.g.,
+        when a request has failed with the API version read from the cache.
+        It updates the cache and :attr:`api_version` if they are outdated.
         '''
+        self._api_version_verified = True
+        version_cache = get_default_version_cache()
+        key = version_cache.make_key(self.config)
+        server_version = await _fetch_server_version(self.aiohttp_session, self.config)
+        if server_version is None:
+            await current_loop().run_in_executor(None, version_cache.invalidate, key)
+            return
+        await current_loop().run_in_executor(None, version_cache.set, key, server_version)
+        try:
+            parsed_server_version = parse_api_version(server_version)
+        except ValueError:
+            return
+        api_version = min(parsed_server_version, parse_api_version(self.config.version))
+        if api_version != self.api_version:
+            log.info('the cached API version is outdated: %r -> %r',
+                     self.api_version, api_version)
+            self.api_version = api_version
 
-        self.KeyPair = type('KeyPair', (BaseFunction, ), {
-            **KeyPair.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.keypair.KeyPair` function proxy
-        bound to this session.
-        '''
+    async def _fetch_is_admin(self) -> bool:
+        if self._is_admin is None:
+            keypair = self.KeyPair(self.config.access_key)
+            info = await keypair._orig_info(fields=('is_admin', ))
+            self._is_admin = info['is_admin']
+        return self._is_admin
 
-        self.Manager = type('Manager', (BaseFunction, ), {
-            **Manager.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.manager.Manager` function proxy
-        bound to this session.
-        '''
 
-        self.Resource = type('Resource', (BaseFunction, ), {
-            **Resource.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.resource.Resource` function proxy
-        bound to this session.
-        '''
+class Session(BaseSession):
+    """
+    An API client session that makes API requests synchronously.
+    You may call (almost) all function proxy methods like a plain Python function.
+    It provides a context manager interface to ensure closing of the session
+    upon errors and scope exits.
 
-        self.KeypairResourcePolicy = type('KeypairResourcePolicy', (BaseFunction, ), {
-            **KeypairResourcePolicy.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.keypair_resource_policy.KeypairResourcePolicy` function proxy
-        bound to this session.
-        '''
+    A single session object may be shared by multiple threads.
+    The API calls are executed concurrently in a dedicated worker thread
+    running an event loop, sharing the same connection pool.
+    """
 
-        self.User = type('User', (BaseFunction, ), {
-            **User.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.user.User` function proxy
-        bound to this session.
-        '''
+    __slots__ = BaseSession.__slots__ + (
+        '_worker_thread',
+    )
 
-        self.ScalingGroup = type('ScalingGroup', (BaseFunction, ), {
-            **ScalingGroup.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.scaling_group.ScalingGroup` function proxy
-        bound to this session.
-        '''
+    def __init__(self, *, config: APIConfig = None,
+                 retry_policy: RetryPolicy = None,
+                 hedge_policy: HedgePolicy = None,
+                 coalesce_reads: bool = False,
+                 response_cache: ResponseCache = None,
+                 metrics: SessionMetrics = None,
+                 connector_factory: ConnectorFactory = None,
+                 client_pool: ClientPool = None) -> None:
+        super().__init__(config=config, retry_policy=retry_policy,
+                         hedge_policy=hedge_policy,
+                         coalesce_reads=coalesce_reads,
+                         response_cache=response_cache,
+                         metrics=metrics,
+                         connector_factory=connector_factory,
+                         client_pool=client_pool)
+        if self._client_pool is not None:
+            self._worker_thread = self._client_pool.worker_thread
+        else:
+            self._worker_thread = _SyncWorkerThread()
+            self._worker_thread.start()
 
-        self.SessionTemplate = type('SessionTemplate', (BaseFunction, ), {
-            **SessionTemplate.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.session_template.SessionTemplate` function proxy
-        bound to this session.
-        '''
+        async def _create_aiohttp_session() -> aiohttp.ClientSession:
+            return self._create_aiohttp_session()
 
-        self.VFolder = type('VFolder', (BaseFunction, ), {
-            **VFolder.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.vfolder.VFolder` function proxy
-        bound to this session.
-        '''
+        self.aiohttp_session = self.worker_thread.execute(_create_aiohttp_session())
 
     def close(self):
         '''
-        Terminates the session.  It schedules the ``close()`` coroutine
-        of the underlying aiohttp session and then enqueues a sentinel
-        object to indicate termination.  Then it waits until the worker
-        thread to self-terminate by joining.
+        Terminates the session.  It executes the ``close()`` coroutine
+        of the underlying aiohttp session, stops the worker thread's
+        event loop, and then waits until the worker thread terminates
+        by joining.
+
+        If the session uses a :class:`ClientPool`, it gives back the shared
+        aiohttp session and keeps the shared worker thread running instead.
         '''
         if self._closed:
             return
         self._closed = True
-        self._worker_thread.work_queue.put(self.aiohttp_session.close())
-        self._worker_thread.work_queue.put(self.worker_thread.sentinel)
-        self._worker_thread.join()
+        try:
+            self._worker_thread.execute(self._close_aiohttp_session())
+        finally:
+            if self._client_pool is None:
+                self._worker_thread.stop()
+                self._worker_thread.join()
 
     @property
     def worker_thread(self):
@@ -376,6 +823,16 @@ class Session(BaseSession):
         '''
         return self._worker_thread
 
+    @property
+    def is_admin(self) -> bool:
+        '''
+        Checks if the caller's keypair has the admin privilege.
+        It is fetched from the server only once per session.
+        '''
+        if self._is_admin is not None:
+            return self._is_admin
+        return self._worker_thread.execute(self._fetch_is_admin())
+
     def __enter__(self):
         assert not self.closed, 'Cannot reuse closed session'
         self.api_version = self.worker_thread.execute(
@@ -397,191 +854,49 @@ class AsyncSession(BaseSession):
 
     __slots__ = BaseSession.__slots__ + ()
 
-    def __init__(self, *, config: APIConfig = None):
-        super().__init__(config=config)
-
-        ssl = None
-        if self._config.skip_sslcert_validation:
-            ssl = False
-        connector = aiohttp.TCPConnector(ssl=ssl)
-        self.aiohttp_session = aiohttp.ClientSession(connector=connector)
-
-        from .func.base import BaseFunction
-        from .func.system import System
-        from .func.admin import Admin
-        from .func.agent import Agent, AgentWatcher
-        from .func.auth import Auth
-        from .func.etcd import EtcdConfig
-        from .func.group import Group
-        from .func.image import Image
-        from .func.session import ComputeSession
-        from .func.keypair import KeyPair
-        from .func.manager import Manager
-        from .func.resource import Resource
-        from .func.keypair_resource_policy import KeypairResourcePolicy
-        from .func.scaling_group import ScalingGroup
-        from .func.session_template import SessionTemplate
-        from .func.user import User
-        from .func.vfolder import VFolder
-
-        self.System = type('System', (BaseFunction, ), {
-            **System.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.system.System` function proxy
-        bound to this session.
-        '''
-
-        self.Admin = type('Admin', (BaseFunction, ), {
-            **Admin.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.admin.Admin` function proxy
-        bound to this session.
-        '''
-
-        self.Agent = type('Agent', (BaseFunction, ), {
-            **Agent.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.agent.Agent` function proxy
-        bound to this session.
-        '''
-
-        self.AgentWatcher = type('AgentWatcher', (BaseFunction, ), {
-            **AgentWatcher.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.agent.AgentWatcher` function proxy
-        bound to this session.
-        '''
-
-        self.Auth = type('Auth', (BaseFunction, ), {
-            **Auth.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.Auth` function proxy
-        bound to this session.
-        '''
-
-        self.EtcdConfig = type('EtcdConfig', (BaseFunction, ), {
-            **EtcdConfig.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.EtcdConfig` function proxy
-        bound to this session.
-        '''
-
-        self.Group = type('Group', (BaseFunction, ), {
-            **Group.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.agent.Group` function proxy
-        bound to this session.
-        '''
-
-        self.Image = type('Image', (BaseFunction, ), {
-            **Image.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.image.Image` function proxy
-        bound to this session.
-        '''
-
-        self.ComputeSession = type('ComputeSession', (BaseFunction, ), {
-            **ComputeSession.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.kernel.ComputeSession` function proxy
-        bound to this session.
-        '''
-
-        self.KeyPair = type('KeyPair', (BaseFunction, ), {
-            **KeyPair.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.keypair.KeyPair` function proxy
-        bound to this session.
-        '''
-
-        self.Manager = type('Manager', (BaseFunction, ), {
-            **Manager.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.manager.Manager` function proxy
-        bound to this session.
-        '''
-
-        self.Resource = type('Resource', (BaseFunction, ), {
-            **Resource.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.resource.Resource` function proxy
-        bound to this session.
-        '''
-
-        self.KeypairResourcePolicy = type('KeypairResourcePolicy', (BaseFunction, ), {
-            **KeypairResourcePolicy.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.keypair_resource_policy.KeypairResourcePolicy` function proxy
-        bound to this session.
-        '''
+    def __init__(self, *, config: APIConfig = None,
+                 retry_policy: RetryPolicy = None,
+                 hedge_policy: HedgePolicy = None,
+                 coalesce_reads: bool = False,
+                 response_cache: ResponseCache = None,
+                 metrics: SessionMetrics = None,
+                 connector_factory: ConnectorFactory = None,
+                 client_pool: ClientPool = None):
+        super().__init__(config=config, retry_policy=retry_policy,
+                         hedge_policy=hedge_policy,
+                         coalesce_reads=coalesce_reads,
+                         response_cache=response_cache,
+                         metrics=metrics,
+                         connector_factory=connector_factory,
+                         client_pool=client_pool)
+
+        self.aiohttp_session = self._create_aiohttp_session()
 
-        self.User = type('User', (BaseFunction, ), {
-            **User.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.user.User` function proxy
-        bound to this session.
-        '''
-
-        self.ScalingGroup = type('ScalingGroup', (BaseFunction, ), {
-            **ScalingGroup.__dict__,
-            'session': self,
-        })
-        '''
-        The :class:`~ai.backend.client.scaling_group.ScalingGroup` function proxy
-        bound to this session.
-        '''
-
-        self.SessionTemplate = type('SessionTemplate', (BaseFunction, ), {
-            **SessionTemplate.__dict__,
-            'session': self,
-        })
+    @property
+    def is_admin(self) -> bool:
         '''
-        The :class:`~ai.backend.client.session_template.SessionTemplate` function proxy
-        bound to this session.
+        Checks if the caller's keypair has the admin privilege.
+        It must be fetched first via :meth:`fetch_is_admin`, as a property
+        cannot make the API request asynchronously.
         '''
+        if self._is_admin is None:
+            raise RuntimeError(
+                'The admin privilege is not fetched yet. '
+                'Await AsyncSession.fetch_is_admin() instead.')
+        return self._is_admin
 
-        self.VFolder = type('VFolder', (BaseFunction, ), {
-            **VFolder.__dict__,
-            'session': self,
-        })
+    async def fetch_is_admin(self) -> bool:
         '''
-        The :class:`~ai.backend.client.vfolder.VFolder` function proxy
-        bound to this session.
+        Checks if the caller's keypair has the admin privilege.
+        It is fetched from the server only once per session.
         '''
+        return await self._fetch_is_admin()
 
     async def close(self):
         if self._closed:
             return
         self._closed = True
-        await self.aiohttp_session.close()
+        await self._close_aiohttp_session()
 
     async def __aenter__(self):
         assert not self.closed, 'Cannot reuse closed session'
@@ -1,4 +1,5 @@
 import io
+import mimetypes
 import os
 
 from tqdm import tqdm
@@ -23,6 +24,14 @@ class Undefined(metaclass=Singleton):
 undefined = Undefined()
 
 
+def guess_content_type(file_path) -> str:
+    '''
+    Guesses the content type of a file to upload from its name.
+    '''
+    content_type, _ = mimetypes.guess_type(str(file_path))
+    return content_type if content_type else 'application/octet-stream'
+
+
 class ProgressReportingReader(io.BufferedReader):
 
     def __init__(self, file_path, *, tqdm_instance=None):
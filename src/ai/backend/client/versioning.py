@@ -1,8 +1,20 @@
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import tempfile
+import threading
+import time
 from typing import (
-    Callable, Union,
+    Callable, Optional, Union,
     Tuple, Sequence,
 )
 
+from .config import APIConfig, local_cache_path
+
+log = logging.getLogger('ai.backend.client.versioning')
+
 
 naming_profile = {
     'path': ('kernel', 'session'),
@@ -30,3 +42,140 @@ def apply_version_aware_fields(
         else:
             version_aware_fields.append((f[0], f[1]))
     return version_aware_fields
+
+
+class APIVersionCache:
+    '''
+    A persistent cache of the API versions reported by the servers, keyed by
+    the endpoint type and the set of endpoints.  It lets short-lived processes
+    such as CLI commands skip the version negotiation round trip when opening
+    sessions.  The entries are kept in a single JSON file shared by processes.
+
+    :param path: The path of the cache file.
+    '''
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @staticmethod
+    def make_key(config: APIConfig) -> str:
+        if config.unix_socket_path is not None:
+            endpoints = f'unix://{config.unix_socket_path}'
+        else:
+            endpoints = ','.join(sorted(str(e) for e in config.endpoints))
+        return f'{config.endpoint_type}:{endpoints}'
+
+    def get(self, key: str, max_age: float) -> Optional[Tuple[str, float]]:
+        '''
+        Returns the cached server API version string and its age in seconds,
+        or ``None`` if there is no entry younger than *max_age* seconds.
+        '''
+        with self._lock:
+            entry = self._read().get(key)
+        if not isinstance(entry, dict):
+            return None
+        try:
+            age = time.time() - float(entry['fetched_at'])
+            version = str(entry['version'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not (0 <= age < max_age):
+            return None
+        return version, age
+
+    def set(self, key: str, version: str) -> None:
+        '''
+        Stores the server API version string.
+        '''
+        with self._lock:
+            data = self._read()
+            data[key] = {'version': version, 'fetched_at': time.time()}
+            self._write(data)
+
+    def invalidate(self, key: str = None) -> None:
+        '''
+        Removes the entry of *key*, or all entries if *key* is ``None``.
+        '''
+        with self._lock:
+            data = self._read()
+            if key is None:
+                data.clear()
+            elif data.pop(key, None) is None:
+                return
+            self._write(data)
+
+    def _read(self) -> dict:
+        try:
+            data = json.loads(self._path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            log.debug('ignoring a broken API version cache file: %s', self._path)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self._path.parent), suffix='.tmp')
+        except OSError:
+            log.debug('failed to write the API version cache file: %s', self._path)
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, str(self._path))
+        except BaseException as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            if not isinstance(e, OSError):
+                raise
+            log.debug('failed to write the API version cache file: %s', self._path)
+
+
+_default_version_cache = None
+_default_version_cache_lock = threading.Lock()
+
+
+def get_default_version_cache() -> APIVersionCache:
+    '''
+    Returns the process-wide API version cache stored in the local cache directory.
+    '''
+    global _default_version_cache
+    with _default_version_cache_lock:
+        if _default_version_cache is None:
+            _default_version_cache = APIVersionCache(local_cache_path / 'api-versions.json')
+        return _default_version_cache
+
+
+_rx_api_version_mismatch = re.compile(r'unsupported api (?:major |minor )?version', re.I)
+
+
+def is_api_version_mismatch(status: int, msg: str) -> bool:
+    '''
+    Checks if the given error response means that the server rejected
+    the API version of the request.
+    '''
+    return status == 400 and _rx_api_version_mismatch.search(msg) is not None
+
+
+def is_version_dependent_path(path: str) -> bool:
+    '''
+    Checks if the given API path is named or parametrized differently across
+    the API versions, so that a stale API version may make it fail.
+    '''
+    segments = path.strip('/').split('/')
+    if segments[0] == 'stream':
+        segments = segments[1:]
+    if not segments:
+        return False
+    if segments[0] in naming_profile['path']:
+        return True
+    return segments[:2] == ['admin', 'graphql']
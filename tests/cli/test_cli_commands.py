@@ -79,3 +79,77 @@ def test_run_file_or_code_required(runner, monkeypatch, example_keypair,
     result = runner.invoke(main, ['run', 'python'])
     assert result.exit_code == 1
     assert 'provide the command-line code snippet' in result.output
+
+
+@pytest.mark.parametrize('group_name', ['main', 'admin'])
+def test_lazy_commands_match_loaded_commands(group_name):
+    import click
+    from ai.backend.client.cli.admin import admin
+    group = main if group_name == 'main' else admin
+    ctx = click.Context(group)
+    lazy_commands = dict(group._lazy_commands)
+    for name in lazy_commands:
+        assert group.get_command(ctx, name) is not None
+    # All loaded commands must be registered as lazy commands
+    # with the same name, aliases and help.
+    assert set(group.commands.keys()) == set(lazy_commands.keys())
+    for name, cmd in group.commands.items():
+        assert cmd.name == name
+        placeholder = lazy_commands[name].placeholder
+        assert cmd.get_short_help_str(200) == placeholder.get_short_help_str(200)
+        assert set(group._commands.get(name, ())) == set(lazy_commands[name].aliases)
+    if group is main:
+        assert group.get_command(ctx, 'rm') is group.get_command(ctx, 'terminate')
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason='The package is imported eagerly in Python 3.6.')
+def test_cli_import_does_not_load_heavy_modules():
+    import os
+    import subprocess
+    code = ('import sys\n'
+            'from ai.backend.client.cli import main\n'
+            'print(",".join(m for m in ("aiohttp", "tqdm", "tabulate", "humanize") '
+            'if m in sys.modules))\n')
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, '-c', code], env=env,
+                            stdout=subprocess.PIPE, check=True)
+    assert result.stdout.decode().strip() == ''
+
+
+def test_aggregate_session_stats():
+    from ai.backend.client.cli.run import _aggregate_stats, _format_stats
+    stats_v1 = [
+        {'version': 1, 'status': 'terminated', 'cpu_used': 100, 'mem_max_bytes': 1024},
+        {'version': 1, 'status': 'terminated', 'cpu_used': 50, 'mem_max_bytes': 2048},
+    ]
+    aggregated = _aggregate_stats(stats_v1)
+    assert aggregated['cpu_used'] == 150
+    assert aggregated['mem_max_bytes'] == 3072
+    assert 'cpu_used_msec' in _format_stats(aggregated)
+
+    stats_v2 = [
+        {'version': 2, 'status': 'terminated',
+         'mem': {'current': '1024', 'stats.max': '2048', 'unit_hint': 'bytes'},
+         'cpu_util': {'current': '10.5', 'pct': '10.50', 'unit_hint': 'percent'}},
+        {'version': 2, 'status': 'terminated',
+         'mem': {'current': '1024', 'stats.max': '4096', 'unit_hint': 'bytes'},
+         'cpu_util': {'current': '20.5', 'pct': '20.50', 'unit_hint': 'percent'}},
+    ]
+    aggregated = _aggregate_stats(stats_v2)
+    assert aggregated['mem'] == {'current': '2048', 'stats.max': '6144', 'unit_hint': 'bytes'}
+    assert aggregated['cpu_util']['current'] == '15.50'
+    assert aggregated['cpu_util']['pct'] == '15.50'
+    assert re.search(r'cpu_util +15.5', _format_stats(aggregated))
+
+    # The percentage metrics without pct fall back to the averaged current value.
+    stats_v2_nopct = [
+        {'version': 2, 'status': 'terminated',
+         'cpu_util': {'current': '10.5', 'unit_hint': 'percent'}},
+        {'version': 2, 'status': 'terminated',
+         'cpu_util': {'current': '20.5', 'unit_hint': 'percent'}},
+    ]
+    aggregated = _aggregate_stats(stats_v2_nopct)
+    assert 'pct' not in aggregated['cpu_util']
+    assert re.search(r'cpu_util +15.5', _format_stats(aggregated))
+    assert _aggregate_stats(stats_v1 + stats_v2) is None
@@ -1,8 +1,12 @@
+import asyncio
 import os
 
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 import pytest
 
-from ai.backend.client.config import APIConfig, set_config
+from ai.backend.client.config import APIConfig, API_VERSION, set_config
+from ai.backend.client.versioning import APIVersionCache
 
 
 @pytest.fixture(autouse=True)
@@ -17,6 +21,14 @@ def defconfig():
     return c
 
 
+@pytest.fixture(autouse=True)
+def version_cache(tmp_path, monkeypatch):
+    # Prevent tests from reading and writing the user's local cache directory.
+    cache = APIVersionCache(tmp_path / 'api-versions.json')
+    monkeypatch.setattr('ai.backend.client.versioning._default_version_cache', cache)
+    return cache
+
+
 @pytest.fixture
 def userconfig():
     endpoint = os.environ.get('BACKEND_TEST_ENDPOINT', 'http://127.0.0.1:8081')
@@ -42,3 +54,63 @@ def user_keypair(userconfig):
 @pytest.fixture
 def dummy_endpoint(defconfig):
     return str(defconfig.endpoint) + '/'
+
+
+@pytest.fixture
+def api_server():
+    """
+    Returns a coroutine function that starts a local API server answering
+    the version query at ``/`` plus the given ``(method, path, handler)``
+    routes.  The caller is responsible for closing the returned server.
+    """
+
+    async def version(request):
+        return web.json_response({'version': 'v{}.{}'.format(*API_VERSION)})
+
+    async def start(routes=()):
+        app = web.Application()
+        app.router.add_get('/', version)
+        for method, path, handler in routes:
+            app.router.add_route(method, path, handler)
+        server = TestServer(app)
+        await server.start_server()
+        return server
+
+    return start
+
+
+@pytest.fixture
+def make_config(defconfig):
+    """
+    Returns a function that builds an API config with the test keypair,
+    pointing at a server started by the ``api_server`` fixture or the default
+    test endpoint if no server is given.
+    """
+
+    def make(server=None, **kwargs):
+        if server is not None:
+            kwargs.setdefault('endpoint', str(server.make_url('/')))
+            kwargs.setdefault('api_version_cache_ttl', 0)
+        kwargs.setdefault('endpoint', defconfig.endpoint)
+        kwargs.setdefault('access_key', defconfig.access_key)
+        kwargs.setdefault('secret_key', defconfig.secret_key)
+        return APIConfig(**kwargs)
+
+    return make
+
+
+@pytest.fixture
+def wait_until():
+    """
+    Returns a coroutine function that polls the given condition until it
+    holds or the timeout expires.
+    """
+
+    async def wait(condition, timeout=2.0):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+        while not condition():
+            assert loop.time() < deadline, 'timed out'
+            await asyncio.sleep(0.01)
+
+    return wait
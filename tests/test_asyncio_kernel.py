@@ -1,8 +1,11 @@
+import asyncio
 import secrets
 from unittest import mock
 
+from aiohttp import web
 import pytest
 
+from ai.backend.client.exceptions import BackendClientError
 from ai.backend.client.session import AsyncSession
 from ai.backend.client.versioning import get_naming
 from ai.backend.client.test_utils import AsyncContextMock, AsyncMock
@@ -34,7 +37,7 @@ async def test_create_kernel_url(mocker):
         prefix = get_naming(session.api_version, 'path')
         mock_req_cls.assert_called_once_with(
             session, 'POST', f'/{prefix}')
-        mock_req_obj.fetch.assert_called_once_with()
+        mock_req_obj.fetch.assert_called_once_with(rate_limit_category='create')
         mock_req_obj.fetch.return_value.json.assert_awaited_once_with()
 
 
@@ -100,3 +103,179 @@ async def test_execute_code_url(mocker):
         mock_req_cls.assert_called_once_with(
             session, 'POST', f'/{prefix}/{session_id}',
             params={})
+
+
+@pytest.mark.asyncio
+async def test_create_many(api_server, make_config):
+    running = 0
+    max_running = 0
+
+    async def create(request):
+        nonlocal running, max_running
+        params = await request.json()
+        name = params.get('name', params.get('clientSessionToken'))
+        running += 1
+        max_running = max(max_running, running)
+        try:
+            if name == 'sess-slow':
+                await asyncio.sleep(0.5)
+            else:
+                await asyncio.sleep(0.02)
+        finally:
+            running -= 1
+        if name == 'sess-fail':
+            return web.json_response({'type': 'https://api.backend.ai/probs/generic-bad-request',
+                                      'title': 'bad image'}, status=400)
+        return web.json_response({'created': True, 'status': 'RUNNING'}, status=201)
+
+    server = await api_server([
+        ('POST', '/kernel', create),
+        ('POST', '/session', create),
+    ])
+    try:
+        config = make_config(server)
+        specs = [{'image': 'python:3.7', 'name': f'sess-{i:02d}'} for i in range(10)]
+        specs[3]['name'] = 'sess-fail'
+        specs[7]['name'] = 'sess-slow'
+        completed = []
+        async with AsyncSession(config=config) as session:
+            summary = await session.ComputeSession.create_many(
+                iter(specs), concurrency=3, timeout=0.3,
+                on_result=lambda r: completed.append(r.index))
+        assert max_running == 3
+        assert sorted(completed) == list(range(10))
+        # The slow one finishes last since it times out.
+        assert completed[-1] == 7
+        assert [r.index for r in summary.results] == list(range(10))
+        assert [r.index for r in summary.failed] == [3, 7]
+        assert summary.results[3].error.status == 400
+        assert isinstance(summary.results[7].error, asyncio.TimeoutError)
+        assert [s.name for s in summary.sessions] == \
+            [spec['name'] for i, spec in enumerate(specs) if i not in (3, 7)]
+        assert len(summary.succeeded) == 8
+        assert summary.latency_percentile(100) >= 0.3
+        assert summary.latency_percentile(50) < 0.3
+        data = summary.to_json()
+        assert data['total'] == 10
+        assert data['failed'] == 2
+        assert set(data['errors']) == {3, 7}
+    finally:
+        # Let the timed-out request finish in the server.
+        while running:
+            await asyncio.sleep(0.01)
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_destroy_many(api_server, make_config):
+    owners = []
+
+    async def destroy(request):
+        name = request.match_info['name']
+        owners.append(request.query.get('owner_access_key'))
+        await asyncio.sleep(0.01)
+        if name == 'sess-404':
+            return web.json_response({'type': 'https://api.backend.ai/probs/session-not-found',
+                                      'title': 'No such session.'}, status=404)
+        if name == 'sess-nostat':
+            return web.Response(status=204)
+        return web.json_response({'stats': {'cpu_used': 100, 'mem_max_bytes': 1024}})
+
+    server = await api_server([
+        ('DELETE', '/kernel/{name}', destroy),
+        ('DELETE', '/session/{name}', destroy),
+    ])
+    try:
+        config = make_config(server)
+        names = ['sess-a', 'sess-404', 'sess-b', 'sess-nostat']
+        async with AsyncSession(config=config) as session:
+            summary = await session.ComputeSession.destroy_many(
+                names, owner_access_key='AKIAOWNER', concurrency=2)
+        assert owners == ['AKIAOWNER'] * 4
+        assert [r.name for r in summary.results] == names
+        assert [r.name for r in summary.failed] == ['sess-404']
+        assert summary.results[1].error.status == 404
+        assert summary.results[3].ok
+        assert summary.results[3].stats is None
+        assert summary.stats == [{'cpu_used': 100, 'mem_max_bytes': 1024}] * 2
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_by_events(api_server, make_config):
+    params_list = []
+    connects = {}
+
+    async def create(request):
+        params = await request.json()
+        params_list.append(params)
+        return web.json_response({'created': True, 'status': 'PENDING'}, status=201)
+
+    async def info(request):
+        return web.json_response({'status': 'PENDING'})
+
+    async def events(request):
+        name = request.query.get('name', request.query.get('sessionId'))
+        connects[name] = connects.get(name, 0) + 1
+        resp = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await resp.prepare(request)
+        await asyncio.sleep(0.02)
+        if name == 'sess-drop' and connects[name] == 1:
+            return resp
+        if name == 'sess-stall':
+            for _ in range(20):
+                await resp.write(b': ping\n\n')
+                await asyncio.sleep(0.02)
+            return resp
+        if name == 'sess-cancel':
+            event = 'session_cancelled'
+        else:
+            event = 'session_started'
+        data = '{"sessionName": "%s", "reason": "no-available-instances"}' % name
+        await resp.write(f'event: {event}\ndata: {data}\n\n'.encode())
+        return resp
+
+    routes = []
+    for prefix in ('kernel', 'session'):
+        routes.append(('POST', f'/{prefix}', create))
+        routes.append(('GET', f'/{prefix}/{{name}}', info))
+        routes.append(('GET', f'/stream/{prefix}/_/events', events))
+    server = await api_server(routes)
+    try:
+        config = make_config(server)
+        async with AsyncSession(config=config) as session:
+            sess = await session.ComputeSession.get_or_create(
+                'python:3.7', name='sess-ok', max_wait=5, wait_by_events=True)
+            assert sess.status == 'RUNNING'
+            assert params_list[-1]['enqueueOnly']
+
+            # The stream closed before the startup is reconnected.
+            sess = await session.ComputeSession.get_or_create(
+                'python:3.7', name='sess-drop', max_wait=5, wait_by_events=True)
+            assert sess.status == 'RUNNING'
+            assert connects['sess-drop'] == 2
+
+            with pytest.raises(BackendClientError) as e:
+                await session.ComputeSession.get_or_create(
+                    'python:3.7', name='sess-cancel', max_wait=5, wait_by_events=True)
+            assert 'no-available-instances' in str(e.value)
+
+            sess = await session.ComputeSession.get_or_create(
+                'python:3.7', name='sess-stall', max_wait=0.1, wait_by_events=True)
+            assert sess.status == 'TIMEOUT'
+
+            # Without max_wait, the creation request waits in the server as usual.
+            sess = await session.ComputeSession.get_or_create(
+                'python:3.7', name='sess-nowait', wait_by_events=True)
+            assert sess.status == 'PENDING'
+            assert not params_list[-1]['enqueueOnly']
+            assert 'sess-nowait' not in connects
+
+            # enqueue_only returns immediately so that the caller waits later.
+            sess = await session.ComputeSession.get_or_create(
+                'python:3.7', name='sess-later', enqueue_only=True)
+            assert sess.status == 'PENDING'
+            assert await sess.wait_until_running() == 'RUNNING'
+    finally:
+        await server.close()
@@ -2,7 +2,7 @@ from datetime import datetime
 
 from dateutil.tz import tzutc
 
-from ai.backend.client.auth import generate_signature
+from ai.backend.client.auth import generate_signature, get_sign_key
 
 
 def test_generate_signature(defconfig):
@@ -23,3 +23,29 @@ def test_generate_signature(defconfig):
     assert kwargs['hash_type'].upper() in headers['Authorization']
     assert kwargs['access_key'] in headers['Authorization']
     assert signature in headers['Authorization']
+
+
+def test_generate_signature_reuses_sign_key(defconfig):
+    get_sign_key.cache_clear()
+    kwargs = dict(
+        method='GET',
+        version=defconfig.version,
+        endpoint=defconfig.endpoint,
+        date=datetime.now(tzutc()),
+        rel_url='/path/to/api/',
+        content_type='plain/text',
+        content=b'',
+        access_key=defconfig.access_key,
+        secret_key=defconfig.secret_key,
+        hash_type='sha256',
+    )
+    _, sig1 = generate_signature(**kwargs)
+    _, sig2 = generate_signature(**kwargs)
+    assert sig1 == sig2
+    info = get_sign_key.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+    # A different hash type must derive a different key.
+    generate_signature(**{**kwargs, 'hash_type': 'md5'})
+    assert get_sign_key.cache_info().misses == 2
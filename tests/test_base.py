@@ -97,3 +97,19 @@ async def test_api_function_metaclass_async():
         assert await Dummy().calculate() == 'done'
         assert await Dummy.get_or_create() == 'created'
         assert await Dummy().calculate() == 'done'
+
+
+@pytest.mark.asyncio
+async def test_session_function_proxies():
+    async with AsyncSession() as session1, AsyncSession() as session2:
+        assert session1.ComputeSession is session1.ComputeSession
+        assert session1.ComputeSession.session is session1
+        assert session2.ComputeSession.session is session2
+        assert session1.ComputeSession is not session2.ComputeSession
+        # The wrapped API function class is shared across sessions.
+        assert session1.ComputeSession.__mro__[1] is session2.ComputeSession.__mro__[1]
+        # The API function methods accessed through the classes are reused.
+        assert session1.ComputeSession.get_or_create is session1.ComputeSession.get_or_create
+        assert session1.ComputeSession.get_or_create is not session2.ComputeSession.get_or_create
+        assert session1.KeyPair('dummy').session is session1
+        assert session1.Domain.session is session1
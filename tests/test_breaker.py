@@ -0,0 +1,142 @@
+import time
+
+import aiohttp
+from aioresponses import aioresponses
+import pytest
+from yarl import URL
+
+from ai.backend.client.breaker import CircuitBreaker, CircuitBreakerRegistry
+from ai.backend.client.exceptions import (
+    BackendAPIError, BackendClientError, CircuitOpenError,
+)
+from ai.backend.client.request import Request
+from ai.backend.client.retry import NO_RETRY
+from ai.backend.client.session import AsyncSession
+
+
+def test_trip_by_consecutive_failures():
+    breaker = CircuitBreaker('https://api.backend.ai', failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record_failure()
+    breaker.acquire()
+    breaker.record_success()
+    for _ in range(3):
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.acquire()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as e:
+        breaker.acquire()
+    assert isinstance(e.value, BackendClientError)
+    assert e.value.scope == 'https://api.backend.ai'
+    assert 59 < e.value.retry_after <= 60
+
+
+def test_trip_by_error_rate():
+    breaker = CircuitBreaker('x', failure_threshold=100, error_rate_threshold=0.5,
+                             window_size=10, min_requests=10)
+    for i in range(9):
+        breaker.acquire()
+        if i % 2 == 0:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_probe():
+    breaker = CircuitBreaker('x', failure_threshold=1, cooldown=0.05)
+    breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.acquire()
+    # Only a single probe is allowed at once.
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.release()
+    breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    breaker.acquire()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.acquire()
+    breaker.acquire()
+
+
+def test_registry_scopes():
+    endpoint = URL('https://api.backend.ai')
+    registry = CircuitBreakerRegistry()
+    assert registry.get(endpoint, 'kernel/abc') is registry.get(endpoint, 'folders')
+    registry = CircuitBreakerRegistry(path_depth=1, failure_threshold=7)
+    breaker = registry.get(endpoint, '/kernel/abc')
+    assert breaker is registry.get(endpoint, 'kernel/def?x=1')
+    assert breaker is not registry.get(endpoint, 'folders')
+    assert breaker.scope == 'https://api.backend.ai/kernel'
+    assert breaker.failure_threshold == 7
+
+
+def test_circuit_breaker_config(monkeypatch, defconfig, make_config):
+    assert defconfig.circuit_breakers is None
+    monkeypatch.setenv('BACKEND_CIRCUIT_BREAKER_THRESHOLD', '3')
+    monkeypatch.setenv('BACKEND_CIRCUIT_BREAKER_PATH_DEPTH', '1')
+    config = make_config(circuit_breaker_cooldown=5)
+    assert config.circuit_breaker_threshold == 3
+    assert config.circuit_breaker_error_rate == 0.5
+    breaker = config.circuit_breakers.get(config.endpoint, 'kernel/abc')
+    assert breaker.failure_threshold == 3
+    assert breaker.cooldown == 5
+    assert breaker.scope.endswith('/kernel')
+
+
+@pytest.mark.asyncio
+async def test_fetch_fails_fast_with_open_circuit(make_config, dummy_endpoint):
+    config = make_config(
+        circuit_breaker_threshold=2,
+        circuit_breaker_cooldown=0.1,
+    )
+    with aioresponses() as m:
+        async with AsyncSession(config=config, retry_policy=NO_RETRY) as session:
+            m.get(dummy_endpoint + 'function',
+                  exception=aiohttp.ServerDisconnectedError())
+            m.get(dummy_endpoint + 'function', status=500)
+            with pytest.raises(BackendClientError):
+                async with Request(session, 'GET', 'function').fetch():
+                    pass
+            with pytest.raises(BackendAPIError):
+                async with Request(session, 'GET', 'function').fetch():
+                    pass
+            m.get(dummy_endpoint + 'function', status=200, body=b'ok')
+            with pytest.raises(CircuitOpenError):
+                async with Request(session, 'GET', 'function').fetch():
+                    pass
+            assert len(m.requests[('GET', URL(dummy_endpoint + 'function'))]) == 2
+
+            time.sleep(0.1)
+            async with Request(session, 'GET', 'function').fetch() as resp:
+                assert await resp.text() == 'ok'
+            breaker = config.circuit_breakers.get(config.endpoint, 'function')
+            assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_fetch_avoids_open_circuit_endpoint(make_config):
+    good = 'http://127.0.0.1:8081'
+    bad = 'http://127.0.0.1:8082'
+    config = make_config(endpoint=f'{bad},{good}', circuit_breaker_threshold=1)
+    config.circuit_breakers.get(URL(bad), '').record_failure()
+    with aioresponses() as m:
+        m.get(good + '/function', status=200, body=b'ok', repeat=True)
+        m.get(bad + '/function', status=200, body=b'ok')
+        async with AsyncSession(config=config, retry_policy=NO_RETRY) as session:
+            for _ in range(2):
+                async with Request(session, 'GET', 'function').fetch() as resp:
+                    assert await resp.text() == 'ok'
+        assert ('GET', URL(bad + '/function')) not in m.requests
@@ -0,0 +1,91 @@
+import threading
+from unittest import mock
+
+from aioresponses import aioresponses
+import pytest
+from yarl import URL
+
+from ai.backend.client.cache import CachedResponse, ResponseCache
+from ai.backend.client.request import Request
+from ai.backend.client.session import AsyncSession
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_and_lru():
+    cache = ResponseCache(maxsize=2, ttls={'a': 10.0, 'b': 10.0, 'c': 0})
+    headers = {'Content-Type': 'application/json'}
+    with mock.patch('time.time', return_value=100.0):
+        await cache.set('a', 1, 200, 'OK', headers, b'1')
+        await cache.set('b', 1, 200, 'OK', headers, b'2')
+        await cache.set('c', 1, 200, 'OK', headers, b'3')
+        assert (await cache.get('a', 1)).body == b'1'
+        assert await cache.get('c', 1) is None
+        # "b" is the least recently used one.
+        await cache.set('a', 2, 200, 'OK', headers, b'4')
+        assert await cache.get('b', 1) is None
+        assert (await cache.get('a', 2)).content_type == 'application/json'
+    with mock.patch('time.time', return_value=110.0):
+        assert await cache.get('a', 1) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_disk_tier_and_invalidation(tmp_path):
+    cache1 = ResponseCache(ttls={'a': 10.0, 'b': 10.0}, disk_path=tmp_path)
+    await cache1.set('a', 1, 200, 'OK', {}, b'hello')
+    await cache1.set('b', 1, 200, 'OK', {}, b'world')
+    # Another process sees the entries stored in the disk.
+    cache2 = ResponseCache(ttls={'a': 10.0, 'b': 10.0}, disk_path=tmp_path)
+    assert (await cache2.get('a', 1)).body == b'hello'
+    await cache2.invalidate('a')
+    assert await cache2.get('a', 1) is None
+    await cache1.invalidate('a')
+    assert await cache1.get('a', 1) is None
+    assert (await cache1.get('b', 1)).body == b'world'
+    await cache1.invalidate()
+    assert await cache1.get('b', 1) is None
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation_off_the_event_loop(tmp_path):
+    cache = ResponseCache(ttls={'a': 10.0}, disk_path=tmp_path)
+    await cache.set('a', 1, 200, 'OK', {}, b'hello')
+    threads = []
+    orig_remove_files = cache._remove_files
+
+    def _remove_files(pattern):
+        threads.append(threading.current_thread())
+        orig_remove_files(pattern)
+
+    with mock.patch.object(cache, '_remove_files', _remove_files):
+        await cache.invalidate('a')
+    assert threads and threads[0] is not threading.main_thread()
+    assert not list(tmp_path.iterdir())
+
+
+def test_cache_write_failure_leaves_no_temp_file(tmp_path):
+    cache = ResponseCache(ttls={'a': 10.0}, disk_path=tmp_path)
+    entry = CachedResponse(200, 'OK', [], b'hello', 0)
+    with mock.patch('os.replace', side_effect=PermissionError):
+        cache._save(tmp_path / 'a.json', entry)
+    assert not list(tmp_path.iterdir())
+    with mock.patch('json.dump', side_effect=RuntimeError('oops')):
+        with pytest.raises(RuntimeError):
+            cache._save(tmp_path / 'a.json', entry)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_cached_fetch(dummy_endpoint):
+    cache = ResponseCache(ttls={'test': 10.0})
+    with aioresponses() as m:
+        m.get(dummy_endpoint + 'function', status=200, body=b'{"a": 1}',
+              headers={'Content-Type': 'application/json'})
+        async with AsyncSession(response_cache=cache) as session:
+            for _ in range(3):
+                rqst = Request(session, 'GET', 'function')
+                async with rqst.fetch(cache_name='test') as resp:
+                    assert resp.status == 200
+                    assert await resp.json() == {'a': 1}
+            calls = m.requests[('GET', URL(dummy_endpoint + 'function'))]
+            assert len(calls) == 1
@@ -0,0 +1,39 @@
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from ai.backend.client import codec
+
+
+@pytest.fixture(params=codec.available_codecs())
+def json_codec(request):
+    prev = codec.get_codec()
+    yield codec.set_codec(request.param)
+    codec.set_codec(prev.name)
+
+
+def test_default_codec_is_the_fastest():
+    assert codec.get_codec().name == codec.available_codecs()[0]
+    assert 'json' in codec.available_codecs()
+
+
+def test_codec_roundtrip(json_codec):
+    data = {'b': [1, 2.5, None, True], 'a': 'é한글', 'c': {'x': 'y'}}
+    result = codec.loads(codec.dumps(data))
+    assert result == data
+    assert type(result) is dict
+    assert [*result.keys()] == ['b', 'a', 'c']
+    assert codec.loads(codec.dumps(data).encode('utf-8')) == data
+
+
+def test_codec_extended_types(json_codec):
+    data = {'path': Path('/tmp/x'), 'amount': Decimal('0.1')}
+    assert codec.loads(codec.dumps(data)) == {'path': '/tmp/x', 'amount': '0.1'}
+    with pytest.raises(TypeError):
+        codec.dumps({'obj': object()})
+
+
+def test_set_unknown_codec():
+    with pytest.raises(ValueError):
+        codec.set_codec('xml')
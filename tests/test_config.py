@@ -116,3 +116,46 @@ def test_get_config_return_default_config_when_config_is_none(mocker, cfg_params
     assert cfg.version == APIConfig.DEFAULTS['version']
     assert cfg.access_key == cfg_params['access_key']
     assert cfg.secret_key == cfg_params['secret_key']
+
+
+def test_connection_pool_config(cfg_params):
+    cfg = APIConfig(**cfg_params)
+    assert cfg.connection_pool_size == APIConfig.DEFAULTS['connection_pool_size']
+    assert cfg.connection_pool_size_per_host == 0
+    assert cfg.keepalive_timeout == APIConfig.DEFAULTS['keepalive_timeout']
+    assert cfg.dns_cache_ttl == APIConfig.DEFAULTS['dns_cache_ttl']
+    assert not cfg.force_close
+
+    cfg = APIConfig(**cfg_params, connection_pool_size=500, force_close=True)
+    assert cfg.connection_pool_size == 500
+    assert cfg.force_close
+
+    with mock.patch.dict(os.environ, {
+        'BACKEND_CONNECTION_POOL_SIZE': '300',
+        'BACKEND_CONNECTION_POOL_SIZE_PER_HOST': '50',
+        'BACKEND_KEEPALIVE_TIMEOUT': '60',
+        'BACKEND_DNS_CACHE_TTL': 'none',
+        'BACKEND_FORCE_CLOSE': 'yes',
+    }):
+        cfg = APIConfig(**cfg_params)
+        assert cfg.connection_pool_size == 300
+        assert cfg.connection_pool_size_per_host == 50
+        assert cfg.keepalive_timeout == 60.0
+        assert cfg.dns_cache_ttl is None
+        assert cfg.force_close
+
+
+def test_unix_socket_endpoint(cfg_params):
+    cfg_params['endpoint'] = 'unix:///run/backend.ai/manager.sock'
+    cfg = APIConfig(**cfg_params)
+    assert cfg.unix_socket_path == '/run/backend.ai/manager.sock'
+    assert cfg.endpoints == [URL('http://localhost')]
+    assert cfg.endpoint == URL('http://localhost')
+    with pytest.raises(ValueError):
+        cfg_params['endpoint'] = 'unix:///run/manager.sock,http://127.0.0.1:8081'
+        APIConfig(**cfg_params)
+    with pytest.raises(ValueError):
+        cfg_params['endpoint'] = 'unix://'
+        APIConfig(**cfg_params)
+    cfg_params['endpoint'] = 'http://127.0.0.1:8081'
+    assert APIConfig(**cfg_params).unix_socket_path is None
@@ -0,0 +1,73 @@
+import asyncio
+from http.cookies import SimpleCookie
+import os
+from unittest import mock
+
+import pytest
+from yarl import URL
+
+from ai.backend.client.cookie import PersistentCookieJar
+
+
+def _get_cookies(jar, url='http://example.com/'):
+    return {k: v.value for k, v in jar.filter_cookies(URL(url)).items()}
+
+
+@pytest.mark.asyncio
+async def test_cookie_jar_reloads_only_changed_file(tmp_path):
+    path = tmp_path / 'cookie.dat'
+    other = PersistentCookieJar(path)
+    other.update_cookies(SimpleCookie('sid=1234'), URL('http://example.com/'))
+    other.save(path)
+
+    jar = PersistentCookieJar(path, check_interval=0)
+    assert jar.reload_if_changed()
+    assert _get_cookies(jar) == {'sid': '1234'}
+    assert not jar.reload_if_changed()
+
+    other.update_cookies(SimpleCookie('sid=5678'), URL('http://example.com/'))
+    other.save(path)
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert jar.reload_if_changed()
+    assert _get_cookies(jar) == {'sid': '5678'}
+    await other.flush()
+
+
+@pytest.mark.asyncio
+async def test_cookie_jar_throttles_mtime_checks(tmp_path):
+    path = tmp_path / 'cookie.dat'
+    jar = PersistentCookieJar(path, check_interval=60)
+    assert not jar.reload_if_changed()
+    PersistentCookieJar(path).save(path)
+    assert not jar.reload_if_changed()
+
+
+@pytest.mark.asyncio
+async def test_cookie_jar_persists_updated_cookies(tmp_path):
+    path = tmp_path / 'cookie.dat'
+    jar = PersistentCookieJar(path)
+    jar.update_cookies(SimpleCookie('sid=1234'), URL('http://example.com/'))
+    await jar.flush()
+    # It does not recreate the file removed by logout.
+    assert not path.exists()
+
+    jar.save(path)
+    jar.update_cookies(SimpleCookie('sid=5678'), URL('http://example.com/'))
+    await jar.flush()
+    await asyncio.sleep(0)
+    loaded = PersistentCookieJar(path)
+    loaded.load(path)
+    assert _get_cookies(loaded) == {'sid': '5678'}
+    # Our own writes do not trigger reloading.
+    assert not jar.reload_if_changed()
+
+
+@pytest.mark.asyncio
+async def test_cookie_jar_failed_write_leaves_no_temp_file(tmp_path):
+    path = tmp_path / 'cookie.dat'
+    jar = PersistentCookieJar(path)
+    jar.save(path)
+    with mock.patch('os.replace', side_effect=PermissionError):
+        assert jar._write(b'data') is None
+    assert [p.name for p in tmp_path.iterdir()] == ['cookie.dat']
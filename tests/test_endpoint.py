@@ -0,0 +1,141 @@
+from collections import Counter
+from unittest import mock
+
+from yarl import URL
+
+from ai.backend.client.endpoint import EndpointSelector
+
+
+endpoints = [
+    URL('https://api1.backend.ai'),
+    URL('https://api2.backend.ai'),
+    URL('https://api3.backend.ai'),
+]
+
+
+def select_many(selector, count=300, **kwargs):
+    return Counter(selector.select(**kwargs) for _ in range(count))
+
+
+def test_select_probes_unknown_endpoints_first():
+    selector = EndpointSelector(endpoints)
+    assert selector.select() == endpoints[0]
+    selector.report_success(endpoints[0], 0.1)
+    assert selector.select() == endpoints[1]
+    selector.report_success(endpoints[1], 0.05)
+    assert selector.select() == endpoints[2]
+    selector.report_success(endpoints[2], 0.2)
+    # The slowest one loses in every pair of choices.
+    counts = select_many(selector)
+    assert counts[endpoints[2]] == 0
+    assert counts[endpoints[1]] > counts[endpoints[0]] > 0
+
+
+def test_select_by_latency_and_error_rate():
+    selector = EndpointSelector(endpoints)
+    for e in endpoints:
+        selector.report_success(e, 0.1)
+    selector.report_success(endpoints[2], 0.01)
+    selector.report_success(endpoints[1], 0.2)
+    assert set(select_many(selector)) == {endpoints[0], endpoints[2]}
+    selector.report_failure(endpoints[2])
+    selector.report_failure(endpoints[2])
+    selector.report_success(endpoints[0], 0.09)
+    assert set(select_many(selector)) == {endpoints[0], endpoints[1]}
+    assert set(select_many(selector, exclude={endpoints[0]})) == {endpoints[1]}
+
+
+def test_spread_across_similar_endpoints():
+    selector = EndpointSelector(endpoints)
+    for e, latency in zip(endpoints, (0.100, 0.101, 0.102)):
+        selector.report_success(e, latency)
+    counts = select_many(selector, 3000)
+    # Each endpoint except the slowest one takes a fair share of the traffic.
+    assert counts[endpoints[0]] > 1500
+    assert counts[endpoints[1]] > 700
+    assert counts[endpoints[2]] == 0
+
+
+def test_probe_stale_endpoints():
+    selector = EndpointSelector(endpoints[:2], probe_interval=10.0)
+    with mock.patch('time.monotonic', return_value=100.0):
+        selector.report_success(endpoints[0], 0.01)
+        # A transient slow sample or a failure does not pin the traffic forever.
+        selector.report_success(endpoints[1], 5.0)
+        assert set(select_many(selector)) == {endpoints[0]}
+    with mock.patch('time.monotonic', return_value=109.0):
+        selector.report_success(endpoints[0], 0.01)
+    with mock.patch('time.monotonic', return_value=111.0):
+        assert selector.select() == endpoints[1]
+        # Only a single request probes it.
+        assert set(select_many(selector)) == {endpoints[0]}
+        selector.report_success(endpoints[1], 0.001)
+        assert selector.get_stats(endpoints[1]).latency < 5.0
+    selector = EndpointSelector(endpoints[:2], failure_threshold=1,
+                                cooldown=30.0, probe_interval=10.0)
+    with mock.patch('time.monotonic', return_value=100.0):
+        selector.report_success(endpoints[0], 0.01)
+        selector.report_failure(endpoints[1])
+        assert selector.get_stats(endpoints[1]).score == float('inf')
+    with mock.patch('time.monotonic', return_value=125.0):
+        selector.report_success(endpoints[0], 0.01)
+        assert set(select_many(selector)) == {endpoints[0]}
+    with mock.patch('time.monotonic', return_value=131.0):
+        # The failed endpoint is retried after the cooldown.
+        assert selector.select() == endpoints[1]
+
+
+def test_eject_and_recover():
+    selector = EndpointSelector(endpoints[:2], failure_threshold=2, cooldown=10.0)
+    selector.report_success(endpoints[0], 0.01)
+    selector.report_success(endpoints[1], 0.1)
+    with mock.patch('time.monotonic', return_value=100.0):
+        selector.report_failure(endpoints[0])
+        assert selector.get_stats(endpoints[0]).ejected_until == 0.0
+        selector.report_failure(endpoints[0])
+        assert selector.get_stats(endpoints[0]).ejected_until == 110.0
+        assert selector.select() == endpoints[1]
+    with mock.patch('time.monotonic', return_value=111.0):
+        assert selector.select() == endpoints[0]
+        # A single failure after the cooldown ejects it again.
+        selector.report_failure(endpoints[0])
+        assert selector.get_stats(endpoints[0]).ejected_until == 121.0
+        selector.report_failure(endpoints[1])
+        selector.report_failure(endpoints[1])
+        # When all endpoints are ejected, choose the one to recover earliest.
+        assert selector.select() == endpoints[0]
+    with mock.patch('time.monotonic', return_value=122.0):
+        selector.report_success(endpoints[0], 0.01)
+        assert selector.get_stats(endpoints[0]).ejected_until == 0.0
+        assert selector.get_stats(endpoints[0]).consecutive_failures == 0
+
+
+def test_latency_percentile():
+    selector = EndpointSelector(endpoints)
+    assert selector.get_latency_percentile(95) is None
+    for i in range(100):
+        selector.report_success(endpoints[i % 3], i / 100)
+    assert selector.get_latency_percentile(50) == 0.5
+    assert selector.get_latency_percentile(95) == 0.95
+    assert selector.get_latency_percentile(100) == 0.99
+
+
+def test_current_endpoint_without_side_effects():
+    selector = EndpointSelector(endpoints)
+    assert selector.current == endpoints[0]
+    assert selector.current == endpoints[0]
+    # Reading the current endpoint does not take the probes of unknown endpoints.
+    assert selector.select() == endpoints[0]
+    selector.report_success(endpoints[0], 0.1)
+    assert selector.select() == endpoints[1]
+    assert selector.current == endpoints[1]
+    assert all(selector.get_stats(e).latency is None for e in endpoints[1:])
+
+
+def test_config_endpoint_is_stable():
+    from ai.backend.client.config import APIConfig
+    config = APIConfig(endpoint=','.join(str(e) for e in endpoints))
+    selector = config.endpoint_selector
+    first = config.endpoint
+    assert all(config.endpoint == first for _ in range(10))
+    assert selector.select() == first
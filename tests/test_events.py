@@ -0,0 +1,175 @@
+import asyncio
+import json
+
+from aiohttp import web
+import pytest
+
+from ai.backend.client.events import SessionEventHub, STREAM_RECONNECTED
+from ai.backend.client.session import AsyncSession
+
+
+class EventServer:
+
+    def __init__(self, multiplexed=True):
+        self.multiplexed = multiplexed
+        self.streams = []
+        self.connects = []
+        self.server = None
+
+    async def start(self, api_server):
+
+        async def create(request):
+            return web.json_response({'created': True, 'status': 'PENDING'}, status=201)
+
+        async def info(request):
+            return web.json_response({'status': 'PENDING'})
+
+        async def events(request):
+            name = request.query['name']
+            if name == '*' and not self.multiplexed:
+                return web.json_response({'type': 'https://api.backend.ai/probs/invalid-api-params',
+                                          'title': 'Invalid session name'}, status=400)
+            self.connects.append(name)
+            resp = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+            await resp.prepare(request)
+            queue = asyncio.Queue()
+            entry = (name, queue)
+            self.streams.append(entry)
+            try:
+                while True:
+                    data = await queue.get()
+                    if data is None:
+                        break
+                    await resp.write(data)
+            finally:
+                self.streams.remove(entry)
+            return resp
+
+        self.server = await api_server([
+            ('POST', '/session', create),
+            ('GET', '/session/{name}', info),
+            ('GET', '/stream/session/_/events', events),
+        ])
+
+    def push(self, session_name, event, **data):
+        payload = json.dumps({'sessionName': session_name, **data})
+        message = f'event: {event}\ndata: {payload}\n\n'.encode()
+        for name, queue in self.streams:
+            if name in ('*', session_name):
+                queue.put_nowait(message)
+
+    def disconnect(self):
+        for _, queue in self.streams:
+            queue.put_nowait(None)
+
+    async def close(self):
+        self.disconnect()
+        await self.server.close()
+
+
+@pytest.mark.asyncio
+async def test_multiplexed_subscriptions(api_server, make_config):
+    server = EventServer()
+    await server.start(api_server)
+    try:
+        async with AsyncSession(config=make_config(server.server)) as api_session:
+            async with SessionEventHub(api_session) as hub:
+                assert hub.multiplexed
+                sub1 = await hub.subscribe('sess-1')
+                sub2 = await hub.subscribe('sess-2')
+                sub3 = await hub.subscribe('sess-2')
+                assert server.connects == ['*']
+                assert hub.get_stats() == {'streams': 1, 'sessions': 2, 'subscriptions': 3}
+
+                server.push('sess-2', 'session_started')
+                server.push('sess-1', 'session_terminated', reason='user-requested')
+                server.push('sess-9', 'session_started')
+                ev = await sub1.get()
+                assert ev['event'] == 'session_terminated'
+                assert json.loads(ev['data'])['reason'] == 'user-requested'
+                assert (await sub2.get())['event'] == 'session_started'
+                assert (await sub3.get())['event'] == 'session_started'
+
+                # Closing all subscriptions closes the stream.
+                sub1.close()
+                sub2.close()
+                assert await sub1.get() is None
+                assert hub.get_stats()['streams'] == 1
+                async with sub3:
+                    pass
+                assert hub.get_stats() == {'streams': 0, 'sessions': 0, 'subscriptions': 0}
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_fallback_to_per_session_streams(api_server, make_config):
+    server = EventServer(multiplexed=False)
+    await server.start(api_server)
+    try:
+        async with AsyncSession(config=make_config(server.server)) as api_session:
+            async with SessionEventHub(api_session) as hub:
+                sub1 = await hub.subscribe('sess-1')
+                sub2 = await hub.subscribe('sess-1')
+                sub3 = await hub.subscribe('sess-2')
+                assert not hub.multiplexed
+                # The subscriptions of the same session share the stream.
+                assert sorted(server.connects) == ['sess-1', 'sess-2']
+                server.push('sess-1', 'session_started')
+                server.push('sess-2', 'session_cancelled')
+                assert (await sub1.get())['event'] == 'session_started'
+                assert (await sub2.get())['event'] == 'session_started'
+                assert (await sub3.get())['event'] == 'session_cancelled'
+            # Closing the hub ends all subscriptions.
+            assert sub1.closed and sub3.closed
+            assert [ev async for ev in sub2] == []
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_stream(api_server, make_config):
+    server = EventServer()
+    await server.start(api_server)
+    try:
+        async with AsyncSession(config=make_config(server.server)) as api_session:
+            async with SessionEventHub(api_session) as hub:
+                subscription = await hub.subscribe('sess-1')
+                server.disconnect()
+                ev = await asyncio.wait_for(subscription.get(), 2)
+                assert ev['event'] == STREAM_RECONNECTED
+                assert server.connects == ['*', '*']
+                server.push('sess-1', 'session_started')
+                assert (await subscription.get())['event'] == 'session_started'
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_wait_many_sessions_with_hub(api_server, make_config):
+    server = EventServer()
+    await server.start(api_server)
+    try:
+        async with AsyncSession(config=make_config(server.server)) as api_session:
+            async with SessionEventHub(api_session) as hub:
+                names = [f'sess-{i:02d}' for i in range(10)]
+
+                async def _start_all():
+                    while len(server.connects) == 0 or \
+                            hub.get_stats()['sessions'] < len(names):
+                        await asyncio.sleep(0.01)
+                    for name in names:
+                        server.push(name, 'session_started')
+
+                starter = asyncio.ensure_future(_start_all())
+                summary = await api_session.ComputeSession.create_many(
+                    [{'image': 'python:3.7', 'name': name, 'wait_by_events': True,
+                      'max_wait': 5, 'event_hub': hub} for name in names],
+                    timeout=5)
+                await starter
+                assert len(summary.succeeded) == 10
+                assert all(s.status == 'RUNNING' for s in summary.sessions)
+                # All sessions have waited through a single stream.
+                assert server.connects == ['*']
+    finally:
+        await server.close()
@@ -61,10 +61,19 @@ def test_create_kernel_url(mocker):
         prefix = get_naming(session.api_version, 'path')
         session.ComputeSession.get_or_create('python:3.6-ubuntu18.04')
         mock_req.assert_called_once_with(session, 'POST', f'/{prefix}')
-        mock_req_obj.fetch.assert_called_once_with()
+        mock_req_obj.fetch.assert_called_once_with(rate_limit_category='create')
         mock_req_obj.fetch.return_value.json.assert_called_once_with()
 
 
+def test_create_kernel_by_events_requires_async_session(mocker):
+    mock_req = mocker.patch('ai.backend.client.func.session.Request')
+    with Session() as session:
+        with pytest.raises(TypeError):
+            session.ComputeSession.get_or_create(
+                'python:3.6-ubuntu18.04', max_wait=10, wait_by_events=True)
+        mock_req.assert_not_called()
+
+
 def test_destroy_kernel_url(mocker):
     mock_req_obj = mock.Mock()
     mock_req_obj.fetch.return_value = AsyncContextMock(status=204)
@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+from aiohttp import web
+import pytest
+
+from ai.backend.client.metrics import Histogram, SessionMetrics
+from ai.backend.client.request import Request
+from ai.backend.client.session import AsyncSession, Session
+
+
+async def hosts(request):
+    await asyncio.sleep(0.05)
+    return web.json_response({'default': 'local', 'allowed': ['local']})
+
+
+async def ws_echo(request):
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    async for msg in ws:
+        await ws.send_str(msg.data)
+    return ws
+
+
+routes = [
+    ('GET', '/folders/_/hosts', hosts),
+    ('GET', '/echo', ws_echo),
+]
+
+
+def test_histogram():
+    hist = Histogram(bounds=(0.1, 1.0))
+    assert hist.percentile(50) is None
+    assert hist.mean is None
+    for value in (0.05, 0.05, 0.5, 2.0):
+        hist.observe(value)
+    assert hist.counts == [2, 1, 1]
+    assert hist.count == 4
+    assert hist.min == 0.05
+    assert hist.max == 2.0
+    assert hist.mean == pytest.approx(0.65)
+    assert hist.percentile(50) == 0.1
+    assert hist.percentile(75) == 1.0
+    assert hist.percentile(99) == 2.0
+    data = hist.to_json()
+    assert data['buckets'] == {'0.1': 2, '1.0': 1, '+Inf': 1}
+    assert data['p50'] == 0.1
+
+
+def test_session_metrics_aggregation():
+    metrics = SessionMetrics()
+    metrics.observe('ttfb', 0.1, endpoint='https://a', function='System.get_versions')
+    metrics.observe('ttfb', 0.3, endpoint='https://a', function=None)
+    metrics.observe('ttfb', 0.2, endpoint='https://b', function='System.get_versions')
+    assert metrics.get_histogram('ttfb', endpoint='https://a').count == 2
+    assert metrics.get_histogram('ttfb', endpoint='https://b').count == 1
+    assert metrics.get_histogram('ttfb', function='System.get_versions').count == 2
+    assert metrics.get_histogram('body', endpoint='https://a') is None
+    data = json.loads(metrics.dumps())
+    assert set(data['endpoints']) == {'https://a', 'https://b'}
+    assert set(data['functions']) == {'System.get_versions'}
+    assert data['functions']['System.get_versions']['ttfb']['count'] == 2
+    metrics.reset()
+    assert metrics.to_json() == {'endpoints': {}, 'functions': {}}
+
+
+@pytest.mark.asyncio
+async def test_fetch_timings_per_endpoint_and_function(api_server, make_config):
+    server = await api_server(routes)
+    try:
+        # Disable keep-alive to make new connections for every request.
+        config = make_config(server, force_close=True)
+        endpoint = str(config.endpoint)
+        async with AsyncSession(config=config) as session:
+            await session.VFolder.list_hosts()
+            await session.VFolder.list_hosts()
+            metrics = session.metrics
+            ttfb = metrics.get_histogram('ttfb', function='VFolder.list_hosts')
+            assert ttfb.count == 2
+            assert ttfb.min >= 0.05
+            assert metrics.get_histogram('body', function='VFolder.list_hosts').count == 2
+            assert metrics.get_histogram('total', function='VFolder.list_hosts').count == 2
+            assert metrics.get_histogram('connect', endpoint=endpoint).count == 2
+            assert metrics.get_histogram('queue', endpoint=endpoint) is None
+            # Requests made out of API functions are recorded only per endpoint.
+            rqst = Request(session, 'GET', '/folders/_/hosts')
+            async with rqst.fetch() as resp:
+                await resp.json()
+            assert metrics.get_histogram('ttfb', endpoint=endpoint).count == 3
+            assert set(metrics.to_json()['functions']) == {'VFolder.list_hosts'}
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_timings_pool_starvation(api_server, make_config):
+    server = await api_server(routes)
+    try:
+        config = make_config(server, connection_pool_size=1)
+        async with AsyncSession(config=config) as session:
+            await asyncio.gather(*[session.VFolder.list_hosts() for _ in range(3)])
+            queue = session.metrics.get_histogram('queue', function='VFolder.list_hosts')
+            assert queue.count == 2
+            assert queue.max >= 0.05
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_websocket_timings(api_server, make_config):
+    server = await api_server(routes)
+    try:
+        config = make_config(server)
+        async with AsyncSession(config=config) as session:
+            rqst = Request(session, 'GET', '/echo')
+            async with rqst.connect_websocket(api_function='Test.echo') as ws:
+                await ws.send_str('hello')
+                assert await ws.receive_str() == 'hello'
+            metrics = session.metrics
+            assert metrics.get_histogram('ttfb', function='Test.echo').count == 1
+            assert metrics.get_histogram('total', function='Test.echo').count == 1
+            assert metrics.get_histogram('body', function='Test.echo') is None
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_metrics_with_sync_session(api_server, make_config):
+    server = await api_server(routes)
+    try:
+        config = make_config(server)
+        metrics = SessionMetrics()
+        loop = asyncio.get_event_loop()
+
+        def _call():
+            with Session(config=config, metrics=metrics) as session:
+                session.VFolder.list_hosts()
+
+        await loop.run_in_executor(None, _call)
+        async with AsyncSession(config=config, metrics=metrics) as session:
+            await session.VFolder.list_hosts()
+        assert metrics.get_histogram('total', function='VFolder.list_hosts').count == 2
+    finally:
+        await server.close()
@@ -0,0 +1,188 @@
+import asyncio
+
+from aiohttp import web
+import pytest
+
+from ai.backend.client.exceptions import BackendClientError
+from ai.backend.client.pool import SessionPool
+from ai.backend.client.session import AsyncSession
+
+
+def session_routes(status='RUNNING', create_delay=0):
+    state = {'created': [], 'restarted': [], 'destroyed': []}
+
+    async def create(request):
+        params = await request.json()
+        await asyncio.sleep(create_delay)
+        state['created'].append(params)
+        return web.json_response({'created': True, 'status': status}, status=201)
+
+    async def restart(request):
+        state['restarted'].append(request.match_info['name'])
+        return web.Response(status=204)
+
+    async def destroy(request):
+        state['destroyed'].append(request.match_info['name'])
+        return web.json_response({})
+
+    routes = [
+        ('POST', '/session', create),
+        ('PATCH', '/session/{name}', restart),
+        ('DELETE', '/session/{name}', destroy),
+    ]
+    return routes, state
+
+
+@pytest.mark.asyncio
+async def test_lease_and_release(api_server, make_config):
+    routes, state = session_routes()
+    server = await api_server(routes)
+    try:
+        async with AsyncSession(config=make_config(server)) as api_session:
+            async with SessionPool(api_session, size=2) as pool:
+                spec = {'resources': {'cpu': 1}, 'mounts': ['data']}
+                await pool.warm_up('python:3.7', **spec)
+                assert len(state['created']) == 2
+                assert pool.get_stats()['idle'] == 2
+
+                async with pool.lease('python:3.7', mounts=['data'],
+                                      resources={'cpu': 1}) as sess1:
+                    assert pool.get_stats()['leased'] == 1
+                # The released session is restarted and leased first.
+                assert state['restarted'] == [sess1.name]
+                sess2 = await pool.acquire('python:3.7', **spec)
+                assert sess2 is sess1
+                sess3 = await pool.acquire('python:3.7', **spec)
+                assert sess3 is not sess1
+                await pool.release(sess2)
+                await pool.release(sess3, discard=True)
+                with pytest.raises(ValueError):
+                    await pool.release(sess3)
+
+                # A different spec has its own idle sessions.
+                async with pool.lease('python:3.7', resources={'cpu': 2}):
+                    pass
+                await asyncio.sleep(0.1)
+                stats = pool.get_stats()
+                assert stats['specs'] == 2
+                assert stats['hits'] == 3
+                assert stats['misses'] == 1
+                assert stats['leased'] == 0
+                assert state['destroyed'] == [sess3.name]
+                assert all(p['config']['mounts'] == ['data']
+                           for p in state['created'][:2])
+            # Closing the pool destroys all idle sessions.
+            assert len(state['destroyed']) == len(state['created'])
+            assert pool.closed
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_recycle_sessions(api_server, make_config):
+    routes, state = session_routes()
+    server = await api_server(routes)
+    try:
+        async with AsyncSession(config=make_config(server)) as api_session:
+            async with SessionPool(api_session, size=1, max_uses=2,
+                                   reset=None) as pool:
+                await pool.warm_up('python:3.7')
+                names = []
+                for _ in range(3):
+                    async with pool.lease('python:3.7') as sess:
+                        names.append(sess.name)
+                        # Let the pool refill while leasing.
+                        await asyncio.sleep(0.05)
+                assert state['restarted'] == []
+                # The session leased twice is destroyed.
+                assert names[0] == names[1] != names[2]
+                await asyncio.sleep(0.05)
+                assert state['destroyed'] == names[:1]
+
+            async with SessionPool(api_session, size=1, reset='recreate') as pool:
+                async with pool.lease('python:3.7') as sess:
+                    pass
+                await asyncio.sleep(0.05)
+                assert sess.name in state['destroyed']
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_expire(api_server, make_config, wait_until):
+    routes, state = session_routes()
+    server = await api_server(routes)
+    try:
+        async with AsyncSession(config=make_config(server)) as api_session:
+            async with SessionPool(api_session, size=1, idle_timeout=0.1) as pool:
+                await pool.warm_up('python:3.7')
+                assert len(state['created']) == 1
+                first_name = state['created'][0]['name']
+                # The expired session is destroyed and refilled.
+                await wait_until(lambda: first_name in state['destroyed'])
+                await wait_until(lambda: len(state['created']) >= 2 and
+                                 pool.get_stats()['idle'] == 1)
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_lease_while_refilling(api_server, make_config, wait_until):
+    routes, state = session_routes(create_delay=0.1)
+    server = await api_server(routes)
+    try:
+        async with AsyncSession(config=make_config(server)) as api_session:
+            # Without the expiration, there is no periodic refill.
+            async with SessionPool(api_session, size=2, idle_timeout=0) as pool:
+                await pool.warm_up('python:3.7')
+                sess1 = await pool.acquire('python:3.7')
+                await asyncio.sleep(0.02)
+                assert pool.get_stats()['creating'] == 1
+                # The refill for the first lease is still in flight.
+                sess2 = await pool.acquire('python:3.7')
+                assert pool.get_stats()['idle'] == 0
+                # The shortage from the second lease is filled afterwards.
+                await wait_until(lambda: pool.get_stats()['idle'] == 2)
+                assert len(state['created']) == 4
+                await pool.release(sess1, discard=True)
+                await pool.release(sess2, discard=True)
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_not_running_sessions_are_discarded(api_server, make_config):
+    routes, state = session_routes(status='PENDING')
+    server = await api_server(routes)
+    try:
+        async with AsyncSession(config=make_config(server)) as api_session:
+            async with SessionPool(api_session, size=1) as pool:
+                await pool.warm_up('python:3.7')
+                assert pool.get_stats()['idle'] == 0
+                with pytest.raises(BackendClientError):
+                    await pool.acquire('python:3.7')
+                with pytest.raises(ValueError):
+                    await pool.acquire('python:3.7', name='mysession')
+            await asyncio.sleep(0.05)
+            assert len(state['destroyed']) >= 2
+            assert pool.get_stats()['leased'] == 0
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_sessions_are_destroyed(api_server, make_config):
+    routes, state = session_routes(create_delay=0.2)
+    server = await api_server(routes)
+    try:
+        async with AsyncSession(config=make_config(server)) as api_session:
+            async with SessionPool(api_session, size=1, create_timeout=0.05) as pool:
+                await pool.warm_up('python:3.7')
+                assert pool.get_stats()['idle'] == 0
+                with pytest.raises(asyncio.TimeoutError):
+                    await pool.acquire('python:3.7')
+            # Closing the pool waits for the late creations to destroy them.
+            assert len(state['created']) >= 2
+            assert len(state['destroyed']) == len(state['created'])
+    finally:
+        await server.close()
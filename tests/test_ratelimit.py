@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from aioresponses import aioresponses
+import pytest
+from yarl import URL
+
+from ai.backend.client.exceptions import BackendAPIError
+from ai.backend.client.ratelimit import RateLimiter, TokenBucket
+from ai.backend.client.request import Request
+from ai.backend.client.retry import RetryPolicy
+from ai.backend.client.session import AsyncSession
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.pause(1.0)
+    assert bucket.reserve() == pytest.approx(1.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(1.2, abs=0.01)
+
+
+def test_rate_limiter_categories():
+    limiter = RateLimiter(read_rate=10, create_rate=0.5)
+    endpoint1 = URL('https://api1.backend.ai')
+    endpoint2 = URL('https://api2.backend.ai')
+    assert limiter.get_bucket(endpoint1, 'mutate') is None
+    assert not limiter.pause(endpoint1, 'mutate', 1.0)
+    read_bucket = limiter.get_bucket(endpoint1, 'read')
+    assert read_bucket.rate == 10
+    assert read_bucket.burst == 10
+    assert limiter.get_bucket(endpoint1, 'read') is read_bucket
+    assert limiter.get_bucket(endpoint2, 'read') is not read_bucket
+    create_bucket = limiter.get_bucket(endpoint1, 'create')
+    assert create_bucket.burst == 1
+    assert limiter.pause(endpoint1, 'create', 1.0)
+
+
+def test_rate_limit_config(monkeypatch, defconfig, make_config):
+    assert defconfig.rate_limiter is None
+    monkeypatch.setenv('BACKEND_RATE_LIMIT_CREATE', '2')
+    monkeypatch.setenv('BACKEND_RATE_LIMIT_BURST', '4')
+    config = make_config(rate_limit_read=50)
+    assert config.rate_limit_read == 50
+    assert config.rate_limit_mutate == 0
+    assert config.rate_limit_create == 2
+    assert config.rate_limit_burst == 4
+    assert config.rate_limiter.get_bucket(config.endpoint, 'mutate') is None
+    assert config.rate_limiter.get_bucket(config.endpoint, 'create').burst == 4
+
+
+@pytest.mark.asyncio
+async def test_fetch_rate_limited(make_config, dummy_endpoint):
+    config = make_config(rate_limit_read=20, rate_limit_burst=1)
+    with aioresponses() as m:
+        async with AsyncSession(config=config) as session:
+            for _ in range(5):
+                m.get(dummy_endpoint + 'function', status=200, body=b'ok')
+                m.post(dummy_endpoint + 'function', status=200, body=b'ok')
+
+            async def _read():
+                rqst = Request(session, 'GET', 'function')
+                async with rqst.fetch() as resp:
+                    return await resp.text()
+
+            begin = time.monotonic()
+            assert await asyncio.gather(*[_read() for _ in range(5)]) == ['ok'] * 5
+            assert time.monotonic() - begin >= 0.19
+
+            # Mutating requests are not limited.
+            begin = time.monotonic()
+            for _ in range(5):
+                rqst = Request(session, 'POST', 'function')
+                async with rqst.fetch() as resp:
+                    assert await resp.text() == 'ok'
+            assert time.monotonic() - begin < 0.19
+
+
+@pytest.mark.asyncio
+async def test_fetch_retry_after_rate_limited(make_config, dummy_endpoint):
+    config = make_config(rate_limit_create=100)
+    policy = RetryPolicy(max_attempts=2, base_delay=0)
+    with aioresponses() as m:
+        async with AsyncSession(config=config, retry_policy=policy) as session:
+            m.post(dummy_endpoint + 'function', status=429, headers={'Retry-After': '0.2'})
+            m.post(dummy_endpoint + 'function', status=200, body=b'ok')
+            begin = time.monotonic()
+            rqst = Request(session, 'POST', 'function')
+            async with rqst.fetch(rate_limit_category='create') as resp:
+                assert await resp.text() == 'ok'
+            assert time.monotonic() - begin >= 0.19
+
+            # Other requests in the same category are held as well.
+            m.post(dummy_endpoint + 'function', status=429, headers={'Retry-After': '0.2'})
+            m.post(dummy_endpoint + 'function', status=429, headers={'Retry-After': '0.2'})
+            rqst = Request(session, 'POST', 'function')
+            with pytest.raises(BackendAPIError) as e:
+                async with rqst.fetch(rate_limit_category='create'):
+                    pass
+            assert e.value.status == 429
+            m.post(dummy_endpoint + 'function', status=200, body=b'ok')
+            begin = time.monotonic()
+            rqst = Request(session, 'POST', 'function')
+            async with rqst.fetch(rate_limit_category='create') as resp:
+                assert await resp.text() == 'ok'
+            assert time.monotonic() - begin >= 0.15
@@ -1,15 +1,19 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import io
 import json
 from unittest import mock
 
 import aiohttp
+from aiohttp import web
 from aioresponses import aioresponses
 import pytest
 
 from ai.backend.client.config import get_config, API_VERSION
 from ai.backend.client.exceptions import BackendClientError, BackendAPIError
+from ai.backend.client.hedging import HedgePolicy
 from ai.backend.client.request import Request, Response, AttachedFile
+from ai.backend.client.retry import RetryPolicy, NO_RETRY
 from ai.backend.client.session import Session, AsyncSession
 from ai.backend.client.test_utils import AsyncMock
 
@@ -273,3 +277,357 @@ async def test_response_async(defconfig, dummy_endpoint):
             async with rqst.fetch() as resp:
                 assert await resp.text() == '{"test": 5678}'
                 assert await resp.json() == {'test': 5678}
+
+
+def test_fetch_from_multiple_threads(dummy_endpoint):
+    num_threads = 8
+    with aioresponses() as m, Session() as session:
+        for idx in range(num_threads):
+            body = json.dumps({'idx': idx}).encode()
+            m.get(
+                dummy_endpoint + f'function/{idx}', status=200, body=body,
+                headers={'Content-Type': 'application/json',
+                         'Content-Length': str(len(body))},
+            )
+
+        def _fetch(idx):
+            rqst = Request(session, 'GET', f'function/{idx}')
+            with rqst.fetch() as resp:
+                return resp.json()['idx']
+
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            results = list(pool.map(_fetch, range(num_threads)))
+        assert results == list(range(num_threads))
+
+
+@pytest.mark.asyncio
+async def test_fetch_failover_to_healthy_endpoint(make_config):
+    config = make_config(endpoint='http://127.0.0.1:8081,http://127.0.0.2:8081')
+    bad, good = config.endpoint_selector.endpoints
+    with aioresponses() as m:
+        m.get(str(bad / 'function'), exception=aiohttp.ClientConnectionError())
+        m.get(str(good / 'function'), status=200, body=b'ok')
+        m.get(str(good / 'function'), status=200, body=b'ok')
+        async with AsyncSession(config=config) as session:
+            rqst = Request(session, 'GET', 'function')
+            async with rqst.fetch() as resp:
+                assert await resp.text() == 'ok'
+            assert config.endpoint_selector.get_stats(bad).error_rate > 0
+            assert config.endpoint_selector.get_stats(good).latency is not None
+            # The next request goes to the healthy endpoint directly.
+            assert config.endpoint == good
+            rqst = Request(session, 'GET', 'function')
+            async with rqst.fetch() as resp:
+                assert await resp.text() == 'ok'
+
+
+@pytest.mark.asyncio
+async def test_fetch_retry_on_unavailable(dummy_endpoint):
+    policy = RetryPolicy(base_delay=0)
+    with aioresponses() as m:
+        async with AsyncSession(retry_policy=policy) as session:
+            m.get(dummy_endpoint + 'function', status=503)
+            m.get(dummy_endpoint + 'function', status=200, body=b'ok')
+            rqst = Request(session, 'GET', 'function')
+            async with rqst.fetch() as resp:
+                assert await resp.text() == 'ok'
+
+            # Non-idempotent requests are not retried by default.
+            m.post(dummy_endpoint + 'function', status=503)
+            m.post(dummy_endpoint + 'function', status=200, body=b'ok')
+            rqst = Request(session, 'POST', 'function')
+            with pytest.raises(BackendAPIError) as e:
+                async with rqst.fetch():
+                    pass
+            assert e.value.status == 503
+
+            # The per-call policy overrides the session's one.
+            m.get(dummy_endpoint + 'function', status=503)
+            m.get(dummy_endpoint + 'function', status=200, body=b'ok')
+            rqst = Request(session, 'GET', 'function')
+            with pytest.raises(BackendAPIError):
+                async with rqst.fetch(retry_policy=NO_RETRY):
+                    pass
+
+
+@pytest.mark.asyncio
+async def test_fetch_retry_exhausted(dummy_endpoint):
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    with aioresponses() as m:
+        async with AsyncSession(retry_policy=policy) as session:
+            for _ in range(3):
+                m.get(dummy_endpoint + 'function',
+                      exception=aiohttp.ServerDisconnectedError())
+            m.get(dummy_endpoint + 'function', status=200, body=b'ok')
+            rqst = Request(session, 'GET', 'function')
+            with pytest.raises(BackendClientError):
+                async with rqst.fetch():
+                    pass
+
+
+@pytest.mark.asyncio
+async def test_fetch_hedged_read(make_config):
+    config = make_config(endpoint='http://127.0.0.1:8081,http://127.0.0.2:8081')
+    slow, fast = config.endpoint_selector.endpoints
+    slow_cancelled = asyncio.Event()
+
+    async def slow_handler(url, **kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            slow_cancelled.set()
+            raise
+
+    with aioresponses() as m:
+        m.post(str(slow / 'admin/graphql'), callback=slow_handler)
+        m.post(str(fast / 'admin/graphql'), status=200, payload={'images': []})
+        async with AsyncSession(config=config,
+                                hedge_policy=HedgePolicy(delay=0.05)) as session:
+            rqst = Request(session, 'POST', '/admin/graphql')
+            rqst.set_json({'query': 'query { images { name } }'})
+            assert rqst.is_read_only
+            async with rqst.fetch() as resp:
+                assert await resp.json() == {'images': []}
+            assert slow_cancelled.is_set()
+
+            # Mutations are never hedged.
+            rqst = Request(session, 'POST', '/admin/graphql')
+            rqst.set_json({'query': 'mutation { delete_image }'})
+            assert not rqst.is_read_only
+            fetch_ctx = rqst.fetch()
+            assert fetch_ctx.hedge_policy is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_coalesced_reads(dummy_endpoint):
+    num_calls = 0
+
+    async def handler(url, **kwargs):
+        nonlocal num_calls
+        num_calls += 1
+        await asyncio.sleep(0.05)
+
+    async def _fetch(session):
+        rqst = Request(session, 'GET', 'function', params={'a': '1'})
+        async with rqst.fetch() as resp:
+            data = await resp.json()
+            data['mine'] = True
+            return data, await resp.aread(5)
+
+    with aioresponses() as m:
+        m.get(dummy_endpoint + 'function?a=1', callback=handler,
+              status=200, body=b'{"x": 1}',
+              headers={'Content-Type': 'application/json'})
+        async with AsyncSession(coalesce_reads=True) as session:
+            results = await asyncio.gather(*[_fetch(session) for _ in range(5)])
+            assert num_calls == 1
+            for data, head in results:
+                assert data == {'x': 1, 'mine': True}
+                assert head == b'{"x":'
+            assert len({id(data) for data, _ in results}) == 5
+            assert not session._inflight_reads
+
+
+@pytest.mark.asyncio
+async def test_fetch_coalesced_reads_error(dummy_endpoint):
+
+    async def handler(url, **kwargs):
+        await asyncio.sleep(0.05)
+
+    async def _fetch(session):
+        rqst = Request(session, 'GET', 'function')
+        async with rqst.fetch():
+            pass
+
+    with aioresponses() as m:
+        m.get(dummy_endpoint + 'function', callback=handler, status=404,
+              body=b'{"title": "not found"}')
+        async with AsyncSession(coalesce_reads=True) as session:
+            results = await asyncio.gather(*[_fetch(session) for _ in range(3)],
+                                           return_exceptions=True)
+            assert all(isinstance(r, BackendAPIError) for r in results)
+            assert not session._inflight_reads
+
+
+async def _echo_request(request):
+    if request.content_type.startswith('multipart/'):
+        reader = await request.multipart()
+        parts = {}
+        async for part in reader:
+            parts[part.filename] = (await part.read()).decode()
+        body = parts
+    else:
+        body = (await request.read()).decode()
+    return web.json_response({
+        'content_encoding': request.headers.get('Content-Encoding'),
+        'body': body,
+    })
+
+
+echo_routes = [
+    ('POST', '/echo', _echo_request),
+]
+
+
+@pytest.mark.asyncio
+async def test_fetch_compressed(api_server, make_config):
+    server = await api_server(echo_routes)
+    try:
+        config = make_config(
+            server,
+            request_compression='gzip',
+            request_compression_threshold=1024,
+        )
+        async with AsyncSession(config=config) as session:
+
+            async def _echo(rqst):
+                async with rqst.fetch() as resp:
+                    return await resp.json()
+
+            large_body = {'items': ['x' * 10] * 200}
+            rqst = Request(session, 'POST', '/echo')
+            rqst.set_json(large_body)
+            result = await _echo(rqst)
+            assert result['content_encoding'] == 'gzip'
+            assert json.loads(result['body']) == large_body
+
+            rqst = Request(session, 'POST', '/echo')
+            rqst.set_json({'small': True})
+            result = await _echo(rqst)
+            assert result['content_encoding'] is None
+
+            # Only the allowed content types are compressed.
+            rqst = Request(session, 'POST', '/echo', 'x' * 2048,
+                           content_type='application/octet-stream')
+            result = await _echo(rqst)
+            assert result['content_encoding'] is None
+
+            rqst = Request(session, 'POST', '/echo')
+            rqst.attach_files([
+                AttachedFile('data.csv', io.BytesIO(b'a,b\n1,2\n' * 200), 'text/csv'),
+                AttachedFile('data.txt', io.BytesIO(b'hello'), 'text/plain'),
+            ])
+            result = await _echo(rqst)
+            assert result['content_encoding'] == 'gzip'
+            assert result['body'] == {
+                'data.csv': 'a,b\n1,2\n' * 200,
+                'data.txt': 'hello',
+            }
+
+            # Any incompressible part makes the whole body sent as-is.
+            rqst = Request(session, 'POST', '/echo')
+            rqst.attach_files([
+                AttachedFile('data.csv', io.BytesIO(b'a,b\n1,2\n' * 200), 'text/csv'),
+                AttachedFile('blob.zip', io.BytesIO(b'PK\x03\x04'), 'application/zip'),
+            ])
+            result = await _echo(rqst)
+            assert result['content_encoding'] is None
+            assert result['body'] == {
+                'data.csv': 'a,b\n1,2\n' * 200,
+                'blob.zip': 'PK\x03\x04',
+            }
+    finally:
+        await server.close()
+
+
+def test_compression_not_applied_to_signed_bodies(make_config):
+    config = make_config(
+        version='v4.20181215',
+        request_compression='deflate',
+        request_compression_threshold=0,
+    )
+    with Session(config=config) as session:
+        rqst = Request(session, 'POST', '/echo')
+        rqst.set_json({'x': 1})
+        assert rqst._get_content_encoding() == 'deflate'
+    config = make_config(
+        version='v4.20181125',
+        request_compression='deflate',
+        request_compression_threshold=0,
+    )
+    with Session(config=config) as session:
+        rqst = Request(session, 'POST', '/echo')
+        rqst.set_json({'x': 1})
+        assert rqst._get_content_encoding() is None
+
+
+def test_compression_of_attached_files(make_config):
+    config = make_config(
+        request_compression='gzip',
+        request_compression_threshold=0,
+    )
+
+    class _Stream(io.RawIOBase):
+        def readable(self):
+            return True
+
+    with Session(config=config) as session:
+        rqst = Request(session, 'POST', '/echo')
+        rqst.attach_files([AttachedFile('data.txt', io.BytesIO(b'hello'), 'text/plain')])
+        assert rqst._get_content_encoding() == 'gzip'
+        # The generic binary files are judged by their names.
+        rqst = Request(session, 'POST', '/echo')
+        rqst.attach_files([
+            AttachedFile('data.txt', io.BytesIO(b'hello'), 'application/octet-stream'),
+        ])
+        assert rqst._get_content_encoding() == 'gzip'
+        rqst = Request(session, 'POST', '/echo')
+        rqst.attach_files([
+            AttachedFile('data.txt', io.BytesIO(b'hello'), 'application/octet-stream'),
+            AttachedFile('photo.jpg', io.BytesIO(b'hello'), 'application/octet-stream'),
+        ])
+        assert rqst._get_content_encoding() is None
+        rqst = Request(session, 'POST', '/echo')
+        rqst.attach_files([
+            AttachedFile('data.txt', io.BytesIO(b'hello'), 'text/plain'),
+            AttachedFile('pipe.txt', _Stream(), 'text/plain'),
+        ])
+        assert rqst._get_content_encoding() is None
+
+
+async def _hello(request):
+    return web.json_response({'peer': request.transport.get_extra_info('peername')})
+
+
+@pytest.mark.asyncio
+async def test_fetch_via_unix_socket(make_config, tmp_path):
+    app = web.Application()
+    app.router.add_get('/hello', _hello)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    socket_path = tmp_path / 'manager.sock'
+    site = web.UnixSite(runner, str(socket_path))
+    await site.start()
+    try:
+        config = make_config(endpoint=f'unix://{socket_path}')
+        async with AsyncSession(config=config) as session:
+            assert isinstance(session.aiohttp_session.connector, aiohttp.UnixConnector)
+            rqst = Request(session, 'GET', '/hello')
+            async with rqst.fetch() as resp:
+                assert resp.status == 200
+                assert (await resp.json())['peer'] == ''
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_custom_connector_factory(api_server, make_config):
+    server = await api_server(echo_routes)
+    created = []
+
+    def _create_connector(config):
+        connector = aiohttp.TCPConnector(limit=1)
+        created.append((config, connector))
+        return connector
+
+    try:
+        config = make_config(server)
+        async with AsyncSession(config=config,
+                                connector_factory=_create_connector) as session:
+            assert created == [(config, session.aiohttp_session.connector)]
+            rqst = Request(session, 'POST', '/echo', b'hello')
+            async with rqst.fetch() as resp:
+                assert (await resp.json())['body'] == 'hello'
+        assert created[0][1].closed
+    finally:
+        await server.close()
@@ -0,0 +1,42 @@
+import asyncio
+from unittest import mock
+
+import aiohttp
+
+from ai.backend.client.retry import RetryPolicy, NO_RETRY
+
+
+def test_idempotent_methods():
+    policy = RetryPolicy()
+    assert policy.is_idempotent('GET')
+    assert policy.is_idempotent('delete')
+    assert not policy.is_idempotent('POST')
+    assert not policy.is_idempotent('PATCH')
+    assert RetryPolicy(retry_non_idempotent=True).is_idempotent('POST')
+
+
+def test_should_retry():
+    policy = RetryPolicy()
+    assert policy.should_retry_status(503, True)
+    assert not policy.should_retry_status(503, False)
+    assert not policy.should_retry_status(500, True)
+
+    conn_key = mock.Mock(ssl=None, host='localhost', port=8081)
+    connector_error = aiohttp.ClientConnectorError(conn_key, OSError())
+    assert policy.should_retry_error(connector_error, False)
+    assert policy.should_retry_error(aiohttp.ServerDisconnectedError(), True)
+    assert not policy.should_retry_error(aiohttp.ServerDisconnectedError(), False)
+    assert policy.should_retry_error(asyncio.TimeoutError(), True)
+    assert not policy.should_retry_error(asyncio.TimeoutError(), False)
+    assert not RetryPolicy(retry_timeouts=False) \
+        .should_retry_error(asyncio.TimeoutError(), True)
+
+
+def test_get_delay():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    for attempt, upper in [(1, 1.0), (2, 2.0), (3, 4.0), (10, 4.0)]:
+        for _ in range(20):
+            assert 0 <= policy.get_delay(attempt) <= upper
+    assert policy.get_delay(1, '30') >= 30.0
+    assert policy.get_delay(1, 'Wed, 21 Oct 2015 07:28:00 GMT') <= 1.0
+    assert NO_RETRY.max_attempts == 1
@@ -0,0 +1,190 @@
+import time
+from unittest import mock
+
+from aioresponses import aioresponses
+import pytest
+from yarl import URL
+
+from ai.backend.client import helper
+from ai.backend.client.exceptions import BackendAPIError
+from ai.backend.client.request import Request
+from ai.backend.client.session import AsyncSession, _version_refresh_tasks
+from ai.backend.client.versioning import (
+    APIVersionCache, is_api_version_mismatch, is_version_dependent_path,
+)
+
+
+def test_version_cache_ttl_and_invalidation(tmp_path):
+    cache = APIVersionCache(tmp_path / 'versions.json')
+    cache.set('api:http://a', 'v5.20191215')
+    cache.set('api:http://b', 'v4.20190615')
+    version, age = cache.get('api:http://a', 60)
+    assert version == 'v5.20191215'
+    assert 0 <= age < 60
+    with mock.patch('time.time', return_value=time.time() + 120):
+        assert cache.get('api:http://a', 60) is None
+    # Other processes see the same entries.
+    other = APIVersionCache(tmp_path / 'versions.json')
+    other.invalidate('api:http://a')
+    assert cache.get('api:http://a', 60) is None
+    assert cache.get('api:http://b', 60)[0] == 'v4.20190615'
+    cache.invalidate()
+    assert cache.get('api:http://b', 60) is None
+
+
+def test_version_cache_ignores_broken_file(tmp_path):
+    (tmp_path / 'versions.json').write_text('{broken')
+    cache = APIVersionCache(tmp_path / 'versions.json')
+    assert cache.get('api:http://a', 60) is None
+    cache.set('api:http://a', 'v5.20191215')
+    assert cache.get('api:http://a', 60)[0] == 'v5.20191215'
+
+
+def test_version_cache_removes_temporary_file_on_failure(tmp_path):
+    cache = APIVersionCache(tmp_path / 'versions.json')
+    cache.set('api:http://a', 'v5.20191215')
+    with mock.patch('json.dump', side_effect=RuntimeError('oops')):
+        with pytest.raises(RuntimeError):
+            cache.set('api:http://b', 'v4.20190615')
+    with mock.patch('os.replace', side_effect=PermissionError()):
+        cache.set('api:http://b', 'v4.20190615')
+    assert [p.name for p in tmp_path.iterdir()] == ['versions.json']
+    assert cache.get('api:http://b', 60) is None
+
+
+def test_is_api_version_mismatch():
+    assert is_api_version_mismatch(400, '{"title": "Unsupported API major version."}')
+    assert is_api_version_mismatch(400, '{"title": "Unsupported API version."}')
+    assert is_api_version_mismatch(400, '{"title": "Unsupported API minor version."}')
+    assert not is_api_version_mismatch(400, '{"title": "Invalid parameters."}')
+    assert not is_api_version_mismatch(500, 'API version')
+
+
+def test_is_version_dependent_path():
+    assert is_version_dependent_path('/kernel/mysession')
+    assert is_version_dependent_path('/session')
+    assert is_version_dependent_path('/stream/session/_/events')
+    assert is_version_dependent_path('/admin/graphql')
+    assert not is_version_dependent_path('/folders')
+    assert not is_version_dependent_path('/stream')
+    assert not is_version_dependent_path('')
+
+
+@pytest.mark.asyncio
+async def test_negotiation_uses_cached_version(dummy_endpoint, version_cache):
+    root = URL(dummy_endpoint.rstrip('/'))
+    with aioresponses() as m:
+        m.get(dummy_endpoint, status=200, payload={'version': 'v4.20190615'},
+              repeat=True)
+        async with AsyncSession() as session:
+            assert session.api_version == (4, '20190615')
+        async with AsyncSession() as session:
+            assert session.api_version == (4, '20190615')
+        assert len(m.requests[('GET', root)]) == 1
+
+        # A version mismatch error makes the session negotiate it again.
+        m.get(dummy_endpoint + 'function', status=400,
+              payload={'title': 'Unsupported API version.'})
+        async with AsyncSession() as session:
+            rqst = Request(session, 'GET', 'function')
+            with pytest.raises(BackendAPIError):
+                async with rqst.fetch():
+                    pass
+        async with AsyncSession() as session:
+            assert session.api_version == (4, '20190615')
+        assert len(m.requests[('GET', root)]) == 2
+
+
+@pytest.mark.asyncio
+async def test_renegotiate_stale_cached_version(make_config, dummy_endpoint, version_cache):
+    config = make_config(api_version_cache_ttl=60)
+    key = version_cache.make_key(config)
+    version_cache.set(key, 'v4.20190615')
+    root = URL(dummy_endpoint.rstrip('/'))
+    with aioresponses() as m:
+        # The server has been upgraded after caching its version,
+        # so the requests made with the cached one fail.
+        m.get(dummy_endpoint, status=200, payload={'version': 'v5.20191215'},
+              repeat=True)
+        m.get(dummy_endpoint + 'function', status=404,
+              payload={'title': 'Not found.'}, repeat=True)
+        m.get(dummy_endpoint + 'session/mysession', status=404,
+              payload={'title': 'Not found.'}, repeat=True)
+        async with AsyncSession(config=config) as session:
+            assert session.api_version == (4, '20190615')
+            # The failures of the paths that do not depend on the API version
+            # do not trigger the negotiation.
+            for _ in range(2):
+                rqst = Request(session, 'GET', 'function')
+                with pytest.raises(BackendAPIError):
+                    async with rqst.fetch():
+                        pass
+            assert len(m.requests.get(('GET', root), [])) == 0
+            for _ in range(2):
+                rqst = Request(session, 'GET', 'session/mysession')
+                with pytest.raises(BackendAPIError):
+                    async with rqst.fetch():
+                        pass
+            # Only the first failure triggers the negotiation.
+            assert session.api_version == (5, '20191215')
+            assert len(m.requests[('GET', root)]) == 1
+        assert version_cache.get(key, 60)[0] == 'v5.20191215'
+
+
+@pytest.mark.asyncio
+async def test_negotiation_refreshes_aging_version(make_config, dummy_endpoint, version_cache):
+    config = make_config(api_version_cache_ttl=60)
+    key = version_cache.make_key(config)
+    with mock.patch('time.time', return_value=time.time() - 40):
+        version_cache.set(key, 'v4.20190615')
+    with aioresponses() as m:
+        m.get(dummy_endpoint, status=200, payload={'version': 'v5.20191215'})
+        async with AsyncSession(config=config) as session:
+            # The stale-but-valid entry is used while refreshing it.
+            assert session.api_version == (4, '20190615')
+            await _version_refresh_tasks[session.aiohttp_session]
+        assert version_cache.get(key, 60)[0] == 'v5.20191215'
+
+
+@pytest.mark.asyncio
+async def test_negotiation_without_cache(make_config, dummy_endpoint, version_cache):
+    config = make_config(api_version_cache_ttl=0)
+    with aioresponses() as m:
+        m.get(dummy_endpoint, status=200, payload={'version': 'v4.20190615'},
+              repeat=True)
+        for _ in range(2):
+            async with AsyncSession(config=config) as session:
+                assert session.api_version == (4, '20190615')
+        assert len(m.requests[('GET', URL(dummy_endpoint.rstrip('/')))]) == 2
+    assert version_cache.get(version_cache.make_key(config), 60) is None
+
+
+@pytest.mark.asyncio
+async def test_session_is_legacy_server(make_config, dummy_endpoint):
+    with aioresponses() as m:
+        m.get(dummy_endpoint, status=200, payload={'version': 'v4.20181215'})
+        async with AsyncSession() as session:
+            assert session.is_legacy_server
+        m.get(dummy_endpoint, status=200, payload={'version': 'v4.20190615'})
+        config = make_config(api_version_cache_ttl=0)
+        async with AsyncSession(config=config) as session:
+            assert not session.is_legacy_server
+
+
+@pytest.mark.asyncio
+async def test_session_is_admin_is_fetched_once(dummy_endpoint):
+    with aioresponses() as m:
+        m.get(dummy_endpoint, status=200, payload={'version': 'v5.20191215'})
+        m.post(dummy_endpoint + 'admin/graphql', status=200,
+               payload={'keypair': {'is_admin': True}}, repeat=True)
+        async with AsyncSession() as session:
+            with pytest.raises(RuntimeError):
+                session.is_admin
+            with pytest.raises(TypeError):
+                helper.is_admin(session)
+            assert await session.fetch_is_admin() is True
+            assert await session.fetch_is_admin() is True
+            assert session.is_admin is True
+        calls = m.requests[('POST', URL(dummy_endpoint + 'admin/graphql'))]
+        assert len(calls) == 1
+        assert 'secret_key' not in calls[0].kwargs['data'].decode()